@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'cloudinary_storage',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'cloudinary',
     'rest_framework',
     'corsheaders',
@@ -60,6 +61,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Volitelné měření endpointů (SQL dotazy, latence) - výsledky na /api/manager/metrics/
+if os.getenv('STORE_METRICS') == '1':
+    MIDDLEWARE.insert(0, 'store.middleware.QueryMetricsMiddleware')
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -83,6 +88,20 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Pool spojení (psycopg 3) - každý proces drží otevřená spojení a request si jen půjčí jedno,
+# místo nového připojení (TCP + autentizace) na každý request. Velikost je na proces:
+# workery * DB_POOL_MAX_SIZE musí být pod max_connections PostgreSQL (výchozí 100)
+DB_POOL = os.getenv('DB_POOL', '1') == '1'
+DB_POOL_OPTIONS = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)), # Jak dlouho request čeká na volné spojení (s)
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)), # Spojení starší než tohle pool zavře a otevře nové
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)), # Nevyužitá spojení nad min_size se po téhle době zavřou
+}
+# Před použitím spojení ověří, že žije (restart DB, síť) - s poolem při každém půjčení (ConnectionPool.check_connection)
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -91,6 +110,10 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        'OPTIONS': {'pool': DB_POOL_OPTIONS} if DB_POOL else {},
+        # Bez poolu aspoň trvalá spojení (DB_CONN_MAX_AGE sekund); s poolem musí být 0, spojení drží pool
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': DB_HEALTH_CHECKS,
     }
 }
 
@@ -135,10 +158,33 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
 
+# Cache (odpovědi katalogu, strom kategorií, verze scopů a rolí)
+# Verze musí vidět všechny workery, jinak by změna v jednom procesu ostatní nezneplatnila - proto Redis.
+# Redis v docker-compose maže jen klíče s expirací (volatile-lru), verze (bez expirace) tak nikdy nevypadnou.
+# Bez REDIS_URL je to paměť procesu - stačí pro runserver (jeden proces), víc workerů potřebuje Redis
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # Výchozích 300 záznamů katalog zaplní hned a cache by pořád promazávala
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))},
+        }
+    }
+
 # Nastavení REST Frameworku - použití JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication + cache uživatelů v paměti (store/authentication.py)
+        'store.authentication.CachedJWTAuthentication',
     )
 }
 
@@ -148,6 +194,9 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60), # Token platí hodinu
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),    # Refresh token den
+    # Tokeny nesou role (is_staff, skupiny) - manažerské endpointy pak nemusí do DB, viz store/tokens.py
+    'TOKEN_OBTAIN_SERIALIZER': 'store.tokens.StoreTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'store.tokens.StoreTokenRefreshSerializer',
 }
 
 CLOUDINARY_STORAGE = {
@@ -165,3 +214,15 @@ STORAGES = {
     },
 }
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# MEDIA_STORAGE=local -> obrázky na disk do MEDIA_ROOT místo Cloudinary (vývoj offline)
+if os.getenv('MEDIA_STORAGE') == 'local':
+    STORAGES["default"] = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    }
+
+# Zmenšené varianty obrázků produktů (store/images.py) - vlastní alias, aby šly uložit jinam než originály
+STORAGES["image_variants"] = dict(STORAGES["default"])
+
@@ -1,9 +1,16 @@
 from django.contrib import admin
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.safestring import mark_safe  # ZMĚNA: Používáme mark_safe místo format_html
 import json
 
 # Import tvých modelů
 from .models import Product, Category, Order, OrderItem, UserProfile, Cart, CartItem, SavedCard
+from .rollups import record_orders_paid
+from .inventory import set_sharded_stock
+from .pagination import EstimatedCountPaginator
+from .search import search_products
 
 # --- 1. DEFINICE ŠABLON (JSON TEMPLATES) ---
 PRODUCT_TEMPLATES = {
@@ -52,6 +59,39 @@ PRODUCT_TEMPLATES = {
     }
 }
 
+# --- VELKÉ TABULKY ---
+# Produkty, objednávky a košíky mají miliony řádků - changelist musí mít pevný počet dotazů
+# a žádný nesmí číst celou tabulku (přesný COUNT, SELECT DISTINCT, icontains bez indexu)
+
+class IndexedValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    list_filter pro sloupec s btree indexem: místo SELECT DISTINCT přes celou tabulku
+    skáče po indexu (loose index scan) - jeden krok na každou různou hodnotu.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        table = model._meta.db_table
+        column = connection.ops.quote_name(field.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH RECURSIVE loose AS ("
+                f"  (SELECT {column} AS value FROM {table} WHERE {column} IS NOT NULL ORDER BY {column} LIMIT 1)"
+                f"  UNION ALL"
+                f"  SELECT (SELECT {column} FROM {table} WHERE {column} > loose.value ORDER BY {column} LIMIT 1)"
+                f"  FROM loose WHERE loose.value IS NOT NULL"
+                f") SELECT value FROM loose WHERE value IS NOT NULL"
+            )
+            self.lookup_choices = [row[0] for row in cursor.fetchall()]
+        if field.null:
+            self.lookup_choices.append(None) # Volba "prázdné", jako u AllValuesFieldListFilter
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Odhad počtu řádků místo COUNT(*) a bez druhého COUNT pro "(celkem X)" u filtrovaného výpisu"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 # --- 2. KATEGORIE ---
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -62,11 +102,13 @@ class CategoryAdmin(admin.ModelAdmin):
 
 # --- 3. PRODUKTY (OPRAVENO) ---
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display = ('name', 'category', 'brand', 'price', 'stock', 'is_available')
-    list_filter = ('category', 'brand', 'is_available')
+    list_filter = ('category', ('brand', IndexedValuesFieldListFilter), 'is_available')
     list_editable = ('stock', 'is_available')
-    search_fields = ('name', 'brand')
+    list_select_related = ('category',)
+    search_fields = ('name', 'brand') # Hledá se přes search_vector, viz get_search_results
+    autocomplete_fields = ('category',)
     prepopulated_fields = {'slug': ('name',)}
     
     # Toto pole musí být v readonly, jinak Django vyhodí chybu, že neexistuje v modelu
@@ -103,18 +145,55 @@ class ProductAdmin(admin.ModelAdmin):
 
     json_templates.short_description = "Nástroje JSON"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Fulltext přes GIN index (název + značka + popis) místo icontains - platí i pro autocomplete
+        return search_products(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Rozdělený sklad (StockShard) - Product.stock je jen zobrazení, nový stav se musí rozložit do slotů
+        if obj.sharded_stock and 'stock' in form.changed_data:
+            set_sharded_stock(obj.pk, obj.stock)
+
 # --- 4. OBJEDNÁVKY ---
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    raw_id_fields = ['product']
+    fields = ['product', 'product_name', 'quantity', 'price']
+    readonly_fields = ['product_name'] # Název z doby nákupu, doplní se při uložení (OrderAdmin.save_formset)
+    autocomplete_fields = ['product']
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ('id', 'created_at', 'full_name', 'total_amount', 'paid', 'shipping_method', 'status_emoji')
-    list_filter = ('paid', 'created_at', 'shipping_method')
-    search_fields = ('full_name', 'email', 'id')
+    list_filter = ('paid', 'created_at', ('shipping_method', IndexedValuesFieldListFilter))
+    search_fields = ('full_name', 'email') # GIN trigram indexy (Order.Meta), číslo objednávky viz get_search_results
+    autocomplete_fields = ['user']
     inlines = [OrderItemInline]
+
+    def save_formset(self, request, form, formset, change):
+        # Položky změněné v adminu: údaje vybraného produktu + přepočet počtu kusů objednávky
+        for item_form in formset.forms:
+            item = item_form.instance
+            if 'product' in item_form.changed_data and item.product_id:
+                item.snapshot(item.product)
+        super().save_formset(request, form, formset, change)
+
+        if formset.model is OrderItem:
+            order = form.instance
+            order.item_count = order.items.aggregate(units=Sum('quantity'))['units'] or 0
+            Order.objects.filter(pk=order.pk).update(item_count=order.item_count)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        # Číslo objednávky ("1234" nebo "#1234") přes primární klíč - icontains na id by index nepoužil
+        order_id = search_term.strip().lstrip('#')
+        if order_id.isdigit():
+            results |= queryset.filter(pk=order_id)
+        return results, may_have_duplicates
     
     def get_readonly_fields(self, request, obj=None):
         if request.user.is_superuser:
@@ -125,7 +204,11 @@ class OrderAdmin(admin.ModelAdmin):
 
     @admin.action(description='Označit vybrané jako ZAPLACENÉ')
     def mark_as_paid(self, request, queryset):
-        updated = queryset.update(paid=True)
+        # Jen ty, které ještě zaplacené nebyly - a hned je přičteme do statistik tržeb
+        with transaction.atomic():
+            order_ids = list(queryset.filter(paid=False).values_list('id', flat=True))
+            updated = Order.objects.filter(id__in=order_ids).update(paid=True)
+            record_orders_paid(order_ids)
         self.message_user(request, f"{updated} objednávek bylo označeno jako zaplacené.")
 
     def status_emoji(self, obj):
@@ -136,13 +219,17 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'full_name', 'city', 'phone')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'full_name', 'email')
+    autocomplete_fields = ('user',)
 
 # --- 6. ULOŽENÉ KARTY ---
 @admin.register(SavedCard)
 class SavedCardAdmin(admin.ModelAdmin):
     list_display = ('user', 'brand', 'last_4', 'expiry')
     list_filter = ('brand',)
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     
     def has_add_permission(self, request):
         return False
@@ -150,14 +237,27 @@ class SavedCardAdmin(admin.ModelAdmin):
 # --- 7. KOŠÍKY ---
 class CartItemInline(admin.TabularInline):
     model = CartItem
-    raw_id_fields = ['product']
+    autocomplete_fields = ['product']
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display = ('user', 'created_at', 'item_count')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     inlines = [CartItemInline]
 
+    def get_queryset(self, request):
+        # Počet položek jako poddotaz v SELECTu - spočítá se jen pro řádky na stránce, bez GROUP BY přes všechny košíky
+        items = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart').annotate(count=Count('*')).values('count')
+        return super().get_queryset(request).annotate(
+            item_count=Coalesce(Subquery(items, output_field=IntegerField()), 0)
+        )
+
     def item_count(self, obj):
-        return obj.items.count()
-    item_count.short_description = "Počet položek"
\ No newline at end of file
+        return obj.item_count
+    item_count.short_description = "Počet položek"
+    item_count.admin_order_field = 'item_count'
\ No newline at end of file
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class StoreConfig(AppConfig):
     name = 'store'
+
+    def ready(self):
+        # Registrace signálů (index filtrů atd.)
+        from . import signals  # noqa: F401
+        # Kontrola sdílené cache (manage.py check, runserver)
+        from . import checks  # noqa: F401
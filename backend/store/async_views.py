@@ -0,0 +1,82 @@
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from .models import Product
+from .catalog import filter_products, facet_rows, build_filter_options
+from .categories import aget_category_tree
+from .search import search_products
+from .pagination import AsyncProductCursorPagination
+from .response_cache import AsyncCachedResponseMixin, request_category_scope, product_scope
+from .serializers import ProductSerializer
+
+# Async varianty veřejných katalogových endpointů (/api/async/...) pro běh pod ASGI serverem (uvicorn).
+# Vrací stejná data jako views.py - filtry a serializace jsou sdílené, DB se čte přes async ORM.
+# Serializery tu nesmí sahat do DB (Django by vyhodil SynchronousOnlyOperation), ProductSerializer nesahá.
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    # Stejný renderer jako DRF, aby odpověď byla bajt po bajtu stejná jako u sync views
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status_code)
+
+
+class AsyncCatalogView(AsyncCachedResponseMixin, View):
+    http_method_names = ['get', 'head', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            return await super().get(request, *args, **kwargs)
+        except APIException as e:
+            # Např. neplatný ?cursor= (NotFound) - stejná odpověď jako od DRF
+            return json_response({'detail': e.detail}, e.status_code)
+
+
+class AsyncCategoryListView(AsyncCatalogView):
+    async def respond(self, request):
+        return json_response((await aget_category_tree()).data)
+
+
+class AsyncProductListView(AsyncCatalogView):
+    def cache_scopes(self, request, *args, **kwargs):
+        return [request_category_scope(request.GET.get('category'))]
+
+    async def respond(self, request):
+        drf_request = Request(request)
+        queryset = filter_products(Product.objects.filter(is_available=True), request.GET, await aget_category_tree())
+        queryset = search_products(queryset, request.GET.get('search'))
+
+        paginator = AsyncProductCursorPagination()
+        page = await paginator.apaginate_queryset(queryset, drf_request)
+        data = ProductSerializer(page, many=True, context={'request': drf_request}).data
+        return json_response(paginator.get_paginated_response(data).data)
+
+
+class AsyncProductDetailView(AsyncCatalogView):
+    def cache_scopes(self, request, *args, **kwargs):
+        return [product_scope(kwargs['slug'])]
+
+    async def respond(self, request, slug):
+        product = await Product.objects.filter(slug=slug).afirst()
+        if product is None:
+            # Stejná hláška jako get_object_or_404 v ProductDetailView
+            raise NotFound(f"No {Product._meta.object_name} matches the given query.")
+        return json_response(ProductSerializer(product, context={'request': Request(request)}).data)
+
+
+class AsyncFilterOptionsView(AsyncCatalogView):
+    def cache_scopes(self, request, *args, **kwargs):
+        return [request_category_scope(request.GET.get('category'))]
+
+    async def respond(self, request):
+        category_id = request.GET.get('category')
+        if not category_id:
+            return json_response({"error": "Category ID required"}, status.HTTP_400_BAD_REQUEST)
+
+        category = (await aget_category_tree()).get(category_id)
+        if category is None:
+            return json_response({"filters": []})
+
+        rows = [row async for row in facet_rows(category)]
+        return json_response(build_filter_options(rows))
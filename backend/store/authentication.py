@@ -0,0 +1,98 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .response_cache import get_versions, versions_shared
+from .tokens import role_claims, roles_scope
+
+# Kolik uživatelů držíme v paměti procesu a jak dlouho (s)
+USER_CACHE_SIZE = getattr(settings, 'STORE_USER_CACHE_SIZE', 1000)
+USER_CACHE_TTL = getattr(settings, 'STORE_USER_CACHE_TTL', 60)
+
+
+class UserCache:
+    """
+    LRU cache celých User objektů v paměti procesu s omezenou životností (TTL).
+    Záznam platí, dokud sedí verze rolí ve sdílené cache (posouvá ji každé uložení Usera,
+    viz store/signals.py) - uložení v jiném procesu se tak projeví hned, ne až po TTL.
+    To platí jen se sdílenou cache (Redis) - s cache v paměti procesu se user_cache nepoužívá.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users = OrderedDict() # str(user_id) -> (user, expires_at, roles_version) - v tokenu je id jako string
+
+    def get(self, user_id, version):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at, cached_version = entry
+            if expires_at < time.monotonic() or cached_version != version:
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+        # Každý request dostane vlastní kopii - ať si views navzájem nepřepisují atributy
+        return copy.copy(user)
+
+    def set(self, user, version):
+        user_id = str(user.pk)
+        with self._lock:
+            self._users[user_id] = (user, time.monotonic() + self.ttl, version)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, která Usera nenačítá z DB při každém requestu, ale bere ho z user_cache"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token) # Vyhodí stejnou chybu jako simplejwt
+        if not versions_shared():
+            # Deaktivaci v jiném workeru bychom nepoznali - is_active se ověří v DB
+            return super().get_user(validated_token)
+
+        version = get_versions([roles_scope(user_id)])[0]
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token) # SELECT + kontrola is_active
+            user_cache.set(user, version)
+            user = copy.copy(user)
+        return user
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    """
+    Pro endpointy, kterým stačí user.id (košík, objednávky, karty): uživatel se poskládá jen z tokenu
+    (TokenUser: id, is_staff), DB ani user_cache se neptáme. Pokud se uživatel od vydání tokenu
+    změnil (verze rolí nesedí - např. deaktivace), načte se celý User přes user_cache.
+    Bez sdílené cache (Redis) role_claims nic nevrátí a User se vždy načte z DB.
+    Views s tímhle ověřením musí filtrovat přes user_id=request.user.id, ne user=request.user.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and role_claims(validated_token, user_id) is not None:
+            return TokenUser(validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,211 @@
+import math
+import re
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from .admin import PRODUCT_TEMPLATES
+from .models import BuildPart, Product
+
+# Sloty konfigurátoru PC -> šablona specifikace z adminu (PRODUCT_TEMPLATES)
+SLOT_TEMPLATES = {
+    'cpu': 'CPU',
+    'motherboard': 'Motherboard',
+    'ram': 'RAM',
+    'gpu': 'GPU',
+    'ssd': 'SSD',
+    'psu': 'PSU',
+}
+REQUIRED_SLOTS = ('cpu', 'motherboard', 'ram', 'ssd', 'psu') # GPU může nahradit integrovaná grafika
+
+# Zdroj musí utáhnout (procesor + grafika + zbytek sestavy) s rezervou
+BASE_POWER = getattr(settings, 'STORE_BUILD_BASE_POWER', 75) # Deska, RAM, disky, větráky (W)
+PSU_HEADROOM = getattr(settings, 'STORE_BUILD_PSU_HEADROOM', 1.3) # 30 % rezerva
+
+# Odběr podle řady / čipu, když specifikace nemá vlastní klíč "tdp" (např. "125W")
+CPU_POWER = {
+    'Core i3': 89, 'Core i5': 154, 'Core i7': 253, 'Core i9': 253,
+    'Ryzen 5': 88, 'Ryzen 7': 142, 'Ryzen 9': 230,
+}
+GPU_POWER = {
+    'RTX 4050': 115, 'RTX 4060': 115, 'RTX 4060 Ti': 160, 'RTX 4070': 200, 'RTX 4070 Ti': 285,
+    'RTX 4080': 320, 'RTX 4090': 450, 'RX 7600': 165, 'RX 7800 XT': 263, 'RX 7900 XTX': 355, 'Arc A770': 225,
+}
+# Slot -> (tabulka odběru, klíč specifikace, výchozí odběr)
+POWER_SOURCES = {'cpu': (CPU_POWER, 'series', 125), 'gpu': (GPU_POWER, 'chip', 200)}
+
+# Sloupce produktu, ze kterých se index počítá - jiné změny (např. sklad) index nepřepočítávají
+BUILD_FIELDS = ('specification', 'price', 'is_available')
+
+DEFAULT_CANDIDATE_LIMIT = 20
+
+
+class BuildError(Exception):
+    pass
+
+
+def detect_slot(specification):
+    """Slot podle klíčů specifikace (musí mít všechny klíče šablony), jinak None - produkt do PC nepatří"""
+    keys = set(specification or {})
+    matches = [slot for slot, template in SLOT_TEMPLATES.items() if set(PRODUCT_TEMPLATES[template]) <= keys]
+    return max(matches, key=lambda slot: len(PRODUCT_TEMPLATES[SLOT_TEMPLATES[slot]]), default=None)
+
+
+def parse_watts(value):
+    match = re.search(r'\d+', str(value or ''))
+    return int(match.group()) if match else 0
+
+
+def _normalize(value):
+    return str(value or '').strip().upper()
+
+
+def _lookup_power(table, name, default):
+    name = _normalize(name)
+    # Delší názvy dřív - "RTX 4070 Ti" nesmí skončit jako "RTX 4070"
+    for key in sorted(table, key=len, reverse=True):
+        if key.upper() in name:
+            return table[key]
+    return default
+
+
+def build_part_for(product):
+    """Neuložený BuildPart pro produkt, nebo None"""
+    specification = product.specification or {}
+    slot = detect_slot(specification)
+    if slot is None:
+        return None
+
+    part = BuildPart(product_id=product.pk, slot=slot, price=product.price, is_available=product.is_available)
+    if slot in ('cpu', 'motherboard'):
+        part.socket = _normalize(specification.get('socket'))
+    if slot == 'motherboard':
+        part.ram_type = _normalize(specification.get('ram_type'))
+    if slot == 'ram':
+        part.ram_type = _normalize(specification.get('type'))
+    if slot in POWER_SOURCES:
+        table, key, default = POWER_SOURCES[slot]
+        if 'tdp' in specification:
+            part.power_draw = parse_watts(specification['tdp'])
+        else:
+            part.power_draw = _lookup_power(table, specification.get(key), default)
+    if slot == 'psu':
+        part.psu_watts = parse_watts(specification.get('power'))
+    return part
+
+
+def refresh_build_part(product):
+    """Volá se při uložení produktu (store/signals.py)"""
+    part = build_part_for(product)
+    if part is None:
+        BuildPart.objects.filter(pk=product.pk).delete()
+    else:
+        part.save()
+
+
+def rebuild_build_index(batch_size=2000):
+    """Přepočítá celý index od nuly (po importu, loaddata, bulk_create). Po dávkách - paměť neroste s katalogem."""
+    products = Product.objects.filter(specification__isnull=False).only('id', *BUILD_FIELDS)
+    parts = (part for part in map(build_part_for, products.iterator(chunk_size=batch_size)) if part)
+    count = 0
+
+    with transaction.atomic():
+        BuildPart.objects.all().delete()
+        # bulk_create si celý vstup převede na seznam - dávky mu proto podáváme po jedné
+        while batch := list(islice(parts, batch_size)):
+            BuildPart.objects.bulk_create(batch)
+            count += len(batch)
+    return count
+
+
+def required_psu_watts(*power_draws):
+    return math.ceil((BASE_POWER + sum(power_draws)) * PSU_HEADROOM)
+
+
+def _power_budget(psu_watts, other_draw):
+    """Kolik W zbývá pro další díl, aby zdroj pořád stačil"""
+    return math.floor(psu_watts / PSU_HEADROOM) - BASE_POWER - other_draw
+
+
+def load_parts(selected):
+    """{slot: product_id} -> {slot: BuildPart} jedním dotazem"""
+    found = BuildPart.objects.select_related('product').in_bulk(selected.values())
+    parts = {}
+    for slot, product_id in selected.items():
+        part = found.get(product_id)
+        if part is None or part.slot != slot:
+            raise BuildError(f"Produkt {product_id} není {SLOT_TEMPLATES[slot]}")
+        parts[slot] = part
+    return parts
+
+
+def build_problems(parts):
+    """Nekompatibility mezi vybranými díly"""
+    cpu, board, ram, gpu, psu = (parts.get(name) for name in ('cpu', 'motherboard', 'ram', 'gpu', 'psu'))
+    problems = []
+
+    for slot, part in parts.items():
+        if not part.product.is_available:
+            problems.append({'slots': [slot], 'message': f"{part.product.name} není dostupný"})
+        elif part.product.stock <= 0:
+            problems.append({'slots': [slot], 'message': f"{part.product.name} není skladem"})
+
+    if cpu and board and cpu.socket != board.socket:
+        problems.append({'slots': ['cpu', 'motherboard'], 'message': f"Procesor má socket {cpu.socket}, deska {board.socket}"})
+    if ram and board and ram.ram_type != board.ram_type:
+        problems.append({'slots': ['ram', 'motherboard'], 'message': f"Paměť je {ram.ram_type}, deska podporuje {board.ram_type}"})
+    if psu:
+        required = required_psu_watts(*(part.power_draw for part in (cpu, gpu) if part))
+        if psu.psu_watts < required:
+            problems.append({'slots': ['psu'], 'message': f"Zdroj {psu.psu_watts} W nestačí, potřeba aspoň {required} W"})
+    return problems
+
+
+def compatible_parts(parts, slot, limit=DEFAULT_CANDIDATE_LIMIT):
+    """
+    Díly pro volný slot kompatibilní se vším vybraným, od nejlevnějšího - jeden dotaz přes částečný index.
+    Sklad (a dostupnost) se kontroluje přímo na produktu - pokladna ho mění přes update() bez signálů,
+    kopie v BuildPart by zastarala.
+    """
+    cpu, board, ram, gpu, psu = (parts.get(name) for name in ('cpu', 'motherboard', 'ram', 'gpu', 'psu'))
+    queryset = BuildPart.objects.filter(slot=slot, is_available=True, product__is_available=True, product__stock__gt=0)
+
+    if slot == 'cpu':
+        if board:
+            queryset = queryset.filter(socket=board.socket)
+        if psu:
+            queryset = queryset.filter(power_draw__lte=_power_budget(psu.psu_watts, gpu.power_draw if gpu else 0))
+    elif slot == 'motherboard':
+        if cpu:
+            queryset = queryset.filter(socket=cpu.socket)
+        if ram:
+            queryset = queryset.filter(ram_type=ram.ram_type)
+    elif slot == 'ram':
+        if board:
+            queryset = queryset.filter(ram_type=board.ram_type)
+    elif slot == 'gpu':
+        if psu:
+            queryset = queryset.filter(power_draw__lte=_power_budget(psu.psu_watts, cpu.power_draw if cpu else 0))
+    elif slot == 'psu':
+        queryset = queryset.filter(psu_watts__gte=required_psu_watts(*(part.power_draw for part in (cpu, gpu) if part)))
+
+    return [part.product for part in queryset.select_related('product').order_by('price', 'product_id')[:limit]]
+
+
+def check_build(selected, limit=DEFAULT_CANDIDATE_LIMIT):
+    """
+    Vybrané díly -> problémy, chybějící sloty, kandidáti pro volné sloty a odhad spotřeby.
+    Kompletní sestava (všechny povinné sloty) se tím zároveň zvaliduje.
+    """
+    parts = load_parts(selected)
+    problems = build_problems(parts)
+    missing = [slot for slot in REQUIRED_SLOTS if slot not in parts]
+    draw = [part.power_draw for part in parts.values()]
+
+    return {
+        'parts': {slot: part.product for slot, part in parts.items()},
+        'candidates': {slot: compatible_parts(parts, slot, limit) for slot in SLOT_TEMPLATES if slot not in parts},
+        'problems': problems,
+        'missing': missing,
+        'valid': not problems and not missing,
+        'power': {'estimated_draw': BASE_POWER + sum(draw), 'recommended_psu': required_psu_watts(*draw)},
+    }
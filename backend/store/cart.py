@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from .models import Cart, CartItem, Product
+from .serializers import CartSerializer
+
+# Režimy jedné změny v košíku
+MODE_SET = 'set' # Nastav množství přesně (0 = odebrat)
+MODE_ADD = 'add' # Přičti/odečti (záporné číslo = ubrat), pod 1 kus řádek zmizí
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids):
+        super().__init__(product_ids)
+        self.product_ids = product_ids
+
+
+def get_cart(user, lock=False):
+    """Košík uživatele (založí ho, pokud neexistuje). lock=True zamkne řádek do konce transakce."""
+    cart, _ = Cart.objects.get_or_create(user_id=user.id) # user může být i TokenUser (jen id z tokenu)
+    if lock:
+        # Souběžné změny košíku jednoho uživatele se tím seřadí za sebe
+        Cart.objects.select_for_update().filter(pk=cart.pk).values_list('pk').first()
+    return cart
+
+
+def serialize_cart(cart):
+    """Data košíku - položky i s produkty jedním dotazem (select_related), ať je košík jakkoliv velký"""
+    prefetch_related_objects(
+        [cart], Prefetch('items', queryset=CartItem.objects.select_related('product').order_by('id'))
+    )
+    return CartSerializer(cart).data
+
+
+def apply_cart_changes(user, changes):
+    """
+    Provede změny košíku [(product_id, quantity, mode), ...] najednou.
+    Počet dotazů je stejný pro 1 i 100 změn: produkty, stávající řádky, upsert, smazání.
+    """
+    with transaction.atomic():
+        cart = get_cart(user, lock=True)
+
+        product_ids = {product_id for product_id, _, _ in changes}
+        existing_products = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        unknown = product_ids - existing_products
+        if unknown:
+            raise UnknownProducts(sorted(unknown))
+
+        quantities = dict(
+            CartItem.objects.filter(cart=cart, product_id__in=product_ids).values_list('product_id', 'quantity')
+        )
+        for product_id, quantity, mode in changes:
+            if mode == MODE_SET:
+                quantities[product_id] = quantity
+            else:
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        to_keep = [
+            CartItem(cart=cart, product_id=product_id, quantity=quantity)
+            for product_id, quantity in quantities.items() if quantity > 0
+        ]
+        to_remove = [product_id for product_id, quantity in quantities.items() if quantity <= 0]
+
+        if to_keep:
+            # INSERT ... ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = EXCLUDED.quantity
+            CartItem.objects.bulk_create(
+                to_keep, update_conflicts=True, unique_fields=['cart', 'product'], update_fields=['quantity']
+            )
+        if to_remove:
+            CartItem.objects.filter(cart=cart, product_id__in=to_remove).delete()
+
+    return cart
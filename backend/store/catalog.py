@@ -0,0 +1,134 @@
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from .models import Product, ProductFacet
+from .categories import subtree_q
+from .facets import BRAND_FACET_KEY
+from .spec_filters import apply_spec_filters
+
+# Sdílené části katalogových endpointů - používají je synchronní DRF views (views.py)
+# i async varianty pro ASGI (async_views.py), aby vracely totéž
+
+# Histogram cen pro posuvník (?buckets=)
+HISTOGRAM_BUCKETS = 20
+MAX_HISTOGRAM_BUCKETS = 100
+PRICE_PARAMS = ('min_price', 'max_price')
+
+
+def filter_products(queryset, params, tree):
+    """Filtry výpisu produktů z query params (?category=, ?brand=, ?min_price=, ?max_price=, ?specs=)"""
+    # 1. Kategorie (včetně všech podkategorií, libovolně hluboko)
+    category_id = params.get('category')
+    if category_id:
+        category = tree.get(category_id)
+        if category is None:
+            return Product.objects.none()
+        queryset = queryset.filter(subtree_q(category))
+
+    # 2. Značka (Brand) - Samostatný sloupec
+    brand = params.get('brand')
+    if brand:
+        queryset = queryset.filter(brand__iexact=brand)
+
+    # 3. Cena (Min & Max)
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+
+    if min_price:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(price__lte=max_price)
+
+    # 4. Specifikace (JSON Field: specification)
+    # Převádí se na jsonb containment (@>), který obslouží GIN index - viz store/spec_filters.py
+    specs_param = params.get('specs')
+    if specs_param:
+        queryset = apply_spec_filters(queryset, specs_param)
+
+    return queryset
+
+
+def facet_rows(category):
+    """Dvojice (klíč, hodnota) z předpočítaného indexu (ProductFacet) pro kategorii i podkategorie"""
+    return ProductFacet.objects.filter(
+        subtree_q(category)
+    ).filter(product_count__gt=0).values_list('key', 'value').distinct()
+
+
+def build_filter_options(rows):
+    specs_map = {}
+    for key, value in rows:
+        specs_map.setdefault(key, set()).add(value)
+
+    filters = []
+
+    # 1. FILTR: BRAND (Výrobce)
+    brands = sorted(specs_map.pop(BRAND_FACET_KEY, set()))
+
+    if brands:
+        filters.append({
+            "id": "brand",
+            "label": "Výrobce",
+            "options": brands
+        })
+
+    # 2. FILTR: DYNAMICKÉ SPECIFIKACE (JSON)
+    for key, values in specs_map.items():
+        # Hezký název (např. "cpu_family" -> "Cpu Family")
+        label = key.replace("_", " ").title()
+
+        filters.append({
+            "id": key,
+            "label": label,
+            "options": sorted(values)
+        })
+
+    return filters
+
+
+def price_histogram(queryset, buckets=HISTOGRAM_BUCKETS):
+    """
+    Min, max a histogram cen pro posuvník - jeden agregační dotaz, řádky produktů se do Pythonu netahají.
+    width_bucket() rozdělí <min, max> na stejně široké koše; maximum by padlo do koše buckets + 1,
+    proto LEAST. Když mají všechny produkty stejnou cenu, je jen jeden koš (width_bucket by spadl).
+    """
+    empty = {'min': None, 'max': None, 'count': 0, 'buckets': []}
+    try:
+        sql, params = queryset.order_by().values('price').query.sql_with_params()
+    except EmptyResultSet: # Product.objects.none() - např. neexistující kategorie
+        return empty
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH filtered AS ({sql}),"
+            f"  bounds AS (SELECT MIN(price) AS low, MAX(price) AS high FROM filtered) "
+            f"SELECT bounds.low, bounds.high,"
+            f"  CASE WHEN bounds.low = bounds.high THEN 1"
+            f"    ELSE LEAST(width_bucket(filtered.price, bounds.low, bounds.high, %s), %s) END AS bucket,"
+            f"  COUNT(*) "
+            f"FROM filtered CROSS JOIN bounds GROUP BY 1, 2, 3 ORDER BY 3",
+            [*params, buckets, buckets],
+        )
+        rows = cursor.fetchall()
+
+    if not rows:
+        return empty
+
+    low, high = rows[0][0], rows[0][1]
+    counts = {bucket: count for _, _, bucket, count in rows}
+    if low == high:
+        buckets = 1
+    width = (high - low) / buckets
+
+    return {
+        'min': low,
+        'max': high,
+        'count': sum(counts.values()),
+        'buckets': [
+            {
+                'from': round(low + width * index, 2),
+                'to': high if index == buckets - 1 else round(low + width * (index + 1), 2),
+                'count': counts.get(index + 1, 0),
+            }
+            for index in range(buckets)
+        ],
+    }
@@ -0,0 +1,339 @@
+import csv
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+from .models import Category, Product
+from .admin import PRODUCT_TEMPLATES
+
+PRODUCT_FIELDS = ['slug', 'name', 'category', 'brand', 'price', 'stock', 'is_available', 'description', 'specification']
+CATEGORY_FIELDS = ['slug', 'name', 'parent']
+
+# Sloupce, které import přepisuje u existujících produktů
+PRODUCT_UPDATE_FIELDS = ['name', 'category', 'brand', 'price', 'stock', 'is_available', 'description', 'specification']
+
+# Kolik kandidátů slugu (název, název-2, ... název-N) zkusíme, než přidáme náhodnou příponu
+SLUG_CANDIDATES = 10
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ano'}
+
+
+MAX_REPORTED_ERRORS = 100
+SLUG_MAX_LENGTH = Product._meta.get_field('slug').max_length
+CATEGORY_SLUG_MAX_LENGTH = Category._meta.get_field('slug').max_length
+
+
+class CatalogRowError(ValueError):
+    """Chyba v jednom řádku importu (řádek se přeskočí a započítá do chyb)"""
+
+
+# --- ČTENÍ / ZÁPIS (po řádcích, nic se nedrží v paměti celé) ---
+
+def detect_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(stream, fmt):
+    """
+    Záznamy souboru jeden po druhém. Rozbitý řádek JSON Lines (neplatný JSON, nebo ne objekt)
+    se vrátí jako CatalogRowError - importér ho započítá do chyb a pokračuje dalším řádkem.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield CatalogRowError(f"neplatný JSON ({e})")
+                continue
+            yield record if isinstance(record, dict) else CatalogRowError("řádek musí být JSON objekt")
+
+
+def write_records(stream, fmt, fields, records):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=fields)
+        writer.writeheader()
+        for record in records:
+            if isinstance(record.get('specification'), dict):
+                record = dict(record, specification=json.dumps(record['specification'], ensure_ascii=False))
+            writer.writerow(record)
+            count += 1
+    else:
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            count += 1
+    return count
+
+
+def export_products(batch_size=2000):
+    products = Product.objects.order_by('id').values_list(
+        'slug', 'name', 'category__slug', 'brand', 'price', 'stock', 'is_available', 'description', 'specification'
+    )
+    for row in products.iterator(chunk_size=batch_size):
+        record = dict(zip(PRODUCT_FIELDS, row))
+        record['price'] = str(record['price'])
+        yield record
+
+
+def export_categories():
+    for slug, name, parent in Category.objects.order_by('path').values_list('slug', 'name', 'parent__slug'):
+        yield {'slug': slug, 'name': name, 'parent': parent}
+
+
+# --- KONTROLA SPECIFIKACE PROTI PRODUCT_TEMPLATES ---
+
+def _template_shape(template):
+    return {key: type(value) for key, value in template.items()}
+
+TEMPLATE_SHAPES = {label: _template_shape(template) for label, template in PRODUCT_TEMPLATES.items()}
+
+
+def check_specification(specification, template=None):
+    """
+    Vrátí název šablony, které specifikace odpovídá (stejné klíče a typy hodnot), jinak CatalogRowError.
+    Když řádek uvádí 'template' (např. "CPU"), kontroluje se jen proti ní.
+    """
+    if not specification:
+        return None
+    if not isinstance(specification, dict):
+        raise CatalogRowError("specification musí být JSON objekt")
+
+    shape = {key: type(value) for key, value in specification.items()}
+    candidates = {template: TEMPLATE_SHAPES.get(template)} if template else TEMPLATE_SHAPES
+    for label, template_shape in candidates.items():
+        if template_shape == shape:
+            return label
+
+    raise CatalogRowError(
+        f"specification neodpovídá šabloně {template}" if template else "specification neodpovídá žádné šabloně z PRODUCT_TEMPLATES"
+    )
+
+
+# --- IMPORT ---
+
+def check_slug(slug, max_length):
+    if len(slug) > max_length or slug != slugify(slug):
+        raise CatalogRowError(f"neplatný slug '{slug}'")
+    return slug
+
+
+def parse_whole_number(value, field):
+    """Celé číslo z CSV/JSON - "1299", 1299 i 1299.0 projdou, 1299.5 se odmítne (neuřízne)"""
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise CatalogRowError(f"{field} musí být číslo")
+    if not number.is_finite() or number != number.to_integral_value():
+        raise CatalogRowError(f"{field} musí být celé číslo, ne '{value}'")
+    return int(number)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ProductImporter:
+    """
+    Import produktů po dávkách: řádky se slugem -> upsert podle slugu, bez slugu -> bulk_create s vygenerovaným slugem.
+    Každá dávka je vlastní transakce, takže paměť ani zámky nerostou s velikostí souboru.
+    """
+
+    def __init__(self, batch_size=1000, strict_specs=False, dry_run=False):
+        self.batch_size = batch_size
+        self.strict_specs = strict_specs
+        self.dry_run = dry_run
+        self.categories = dict(Category.objects.values_list('slug', 'id')) # Kategorií je málo
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = [] # Prvních MAX_REPORTED_ERRORS chyb (číslo řádku, důvod)
+        self.spec_warnings = 0
+
+    def run(self, records):
+        for line_offset, chunk in enumerate(chunked(records, self.batch_size)):
+            self.import_chunk(chunk, first_line=line_offset * self.batch_size + 1)
+        return self
+
+    def parse(self, record):
+        if isinstance(record, CatalogRowError):
+            raise record # Řádek, který nešel ani přečíst (read_records)
+        name = (record.get('name') or '').strip()
+        if not name:
+            raise CatalogRowError("chybí name")
+
+        category_slug = record.get('category') or None
+        category_id = None
+        if category_slug:
+            category_id = self.categories.get(category_slug)
+            if category_id is None:
+                raise CatalogRowError(f"neznámá kategorie '{category_slug}'")
+
+        specification = record.get('specification') or {}
+        if isinstance(specification, str):
+            try:
+                specification = json.loads(specification)
+            except ValueError:
+                raise CatalogRowError("specification není platný JSON")
+        try:
+            check_specification(specification, record.get('template') or None)
+        except CatalogRowError:
+            if self.strict_specs:
+                raise
+            self.spec_warnings += 1
+
+        price = parse_whole_number(record.get('price') or 0, 'price') # Ceny jsou v celých Kč (decimal_places=0)
+        stock = parse_whole_number(record.get('stock'), 'stock') if record.get('stock') not in (None, '') else 1
+
+        is_available = record.get('is_available', True)
+        if isinstance(is_available, str):
+            is_available = is_available.strip().lower() in TRUE_VALUES
+
+        slug = (record.get('slug') or '').strip() or None
+        if slug:
+            check_slug(slug, SLUG_MAX_LENGTH)
+
+        return {
+            'slug': slug,
+            'name': name,
+            'category_id': category_id,
+            'brand': record.get('brand') or None,
+            'price': price,
+            'stock': stock,
+            'is_available': bool(is_available),
+            'description': record.get('description') or '',
+            'specification': specification,
+        }
+
+    def generate_slugs(self, rows, reserved):
+        """Slugy pro řádky bez slugu {číslo řádku: slug} - jeden dotaz na unikátní index pro celou dávku"""
+        if not rows:
+            return {}
+        bases = {line: slugify(data['name'])[:40] or 'produkt' for line, data in rows}
+        candidates = {
+            base if i == 1 else f"{base}-{i}" for base in bases.values() for i in range(1, SLUG_CANDIDATES + 1)
+        }
+        taken = set(Product.objects.filter(slug__in=candidates).values_list('slug', flat=True)) | set(reserved)
+
+        slugs = {}
+        for line, base in bases.items():
+            for i in range(1, SLUG_CANDIDATES + 1):
+                slug = base if i == 1 else f"{base}-{i}"
+                if slug not in taken:
+                    break
+            else:
+                slug = f"{base}-{uuid.uuid4().hex[:8]}"
+            taken.add(slug) # Ať dva řádky v jedné dávce nedostanou stejný slug
+            slugs[line] = slug
+        return slugs
+
+    def add_error(self, line, reason):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, reason))
+
+    def import_chunk(self, chunk, first_line):
+        parsed = []
+        for i, record in enumerate(chunk):
+            try:
+                parsed.append((first_line + i, self.parse(record)))
+            except CatalogRowError as e:
+                self.add_error(first_line + i, str(e))
+
+        with_slug = {}
+        for line, data in parsed:
+            if data['slug'] in with_slug:
+                # Jeden upsert nemůže měnit stejný řádek dvakrát - platí pozdější řádek, jako mezi dávkami
+                self.add_error(with_slug[data['slug']][0], f"slug '{data['slug']}' se opakuje na řádku {line}, platí pozdější")
+            if data['slug']:
+                with_slug[data['slug']] = (line, data)
+        without_slug = [(line, data) for line, data in parsed if not data['slug']]
+
+        with transaction.atomic():
+            existing = set(Product.objects.filter(slug__in=with_slug.keys()).values_list('slug', flat=True))
+
+            # Řádky se slugem: upsert přes unikátní index na slug (INSERT ... ON CONFLICT (slug) DO UPDATE).
+            # bulk_update by skládal CASE WHEN pro každé pole a řádek - na velkých dávkách řádově pomalejší.
+            to_upsert = [Product(**data) for line, data in with_slug.values()]
+
+            slugs = self.generate_slugs(without_slug, reserved=with_slug.keys())
+            to_create = [Product(**dict(data, slug=slugs[line])) for line, data in without_slug]
+
+            if not self.dry_run:
+                Product.objects.bulk_create(
+                    to_upsert,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=['slug'],
+                    update_fields=PRODUCT_UPDATE_FIELDS,
+                )
+                Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+
+        self.created += len(to_create) + len(with_slug) - len(existing)
+        self.updated += len(existing)
+
+
+def import_categories(records, dry_run=False):
+    """Kategorie: upsert podle slugu přes Category.save() (kvůli materializované cestě). Vrátí (nové, upravené)."""
+    records = list(records) # Kategorií jsou desítky
+    created = updated = 0
+
+    # Kategorie se importují celé, nebo vůbec - první chyba import zastaví
+    for number, record in enumerate(records, start=1):
+        if isinstance(record, CatalogRowError):
+            raise CatalogRowError(f"řádek {number}: {record}")
+        slug = (record.get('slug') or '').strip()
+        if not slug:
+            raise CatalogRowError(f"řádek {number}: chybí slug")
+        try:
+            record['slug'] = check_slug(slug, CATEGORY_SLUG_MAX_LENGTH)
+        except CatalogRowError as e:
+            raise CatalogRowError(f"řádek {number}: {e}")
+
+    with transaction.atomic():
+        by_slug = {category.slug: category for category in Category.objects.all()}
+        pending = records
+        # Rodič může být v souboru až za dítětem - opakujeme, dokud se něco daří založit
+        while pending:
+            postponed = []
+            for record in pending:
+                parent_slug = record.get('parent') or None
+                if parent_slug and parent_slug not in by_slug:
+                    postponed.append(record)
+                    continue
+
+                category = by_slug.get(record['slug'])
+                if category is None:
+                    category = Category(slug=record['slug'])
+                    created += 1
+                else:
+                    updated += 1
+                category.name = record.get('name') or record['slug']
+                category.parent = by_slug[parent_slug] if parent_slug else None
+                try:
+                    category.save()
+                except ValidationError as e: # Cyklus v rodičích (Category.save)
+                    raise CatalogRowError(f"kategorie '{category.slug}': {' '.join(e.messages)}")
+                by_slug[category.slug] = category
+
+            if len(postponed) == len(pending):
+                missing = sorted({record.get('parent') for record in postponed})
+                raise CatalogRowError(f"neznámé nadřazené kategorie: {', '.join(missing)}")
+            pending = postponed
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return created, updated
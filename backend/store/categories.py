@@ -0,0 +1,142 @@
+import logging
+import threading
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from .models import Category
+
+# Verze stromu ve sdílené cache - když ji kdokoliv změní, ostatní procesy si strom načtou znovu
+CATEGORY_TREE_VERSION_KEY = 'store:category_tree_version'
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_tree = None
+
+
+class CategoryTree:
+    """Celý strom kategorií v paměti procesu (kategorií jsou desítky, ne miliony)"""
+
+    def __init__(self, categories, version):
+        self.version = version
+        self.by_id = {category.id: category for category in categories}
+        # Hotová odpověď pro CategoryListView - serializujeme jen jednou
+        # (import až tady: serializers -> inventory -> categories by byl kruhový import)
+        from .serializers import CategorySerializer
+        self.data = CategorySerializer(categories, many=True).data
+
+    def get(self, category_id):
+        """Vrátí kategorii podle id (i když přijde jako string z query params), jinak None"""
+        try:
+            return self.by_id.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+
+def subtree_q(category, field='category'):
+    """Podmínka "produkt je v kategorii nebo v libovolné podkategorii" - jeden indexovaný LIKE"""
+    return Q(**{f"{field}__path__startswith": category.path})
+
+
+def category_tree_version():
+    version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    if version is None:
+        cache.add(CATEGORY_TREE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    return version
+
+
+def _fill_paths(categories):
+    """
+    Kategorie nahrané přes loaddata (fixtures) nejdou přes Category.save(), takže nemají cestu.
+    Strom máme celý v ruce, tak cesty rovnou dopočítáme. Vrátí kategorie, které je třeba uložit.
+    """
+    by_id = {category.id: category for category in categories}
+    paths = {}
+
+    def build(category, chain):
+        if category.id not in paths:
+            chain = chain | {category.id}
+            parent = by_id.get(category.parent_id)
+            if parent is not None and parent.id in chain:
+                # Cyklus v rodičích (fixtures, ruční UPDATE) - Category.clean ho nepustí, ale katalog musí běžet dál
+                logger.warning("Kategorie %s je v cyklu rodičů, bere se jako kořen", category.id)
+                parent = None
+            paths[category.id] = (build(parent, chain) if parent else '') + f"{category.id}/"
+        return paths[category.id]
+
+    stale = []
+    for category in categories:
+        path = build(category, frozenset())
+        if category.path != path:
+            category.path = path
+            stale.append(category)
+    return stale
+
+
+def _load_categories():
+    categories = list(Category.objects.order_by('id'))
+    stale = _fill_paths(categories)
+    if stale:
+        Category.objects.bulk_update(stale, ['path'])
+    return categories
+
+
+def _changed_in_transaction():
+    """Čeká v transakci tohoto vlákna posun verze stromu? (commit i rollback ho z run_on_commit odeberou)"""
+    return any(func is _bump_tree_version for savepoints, func, robust in transaction.get_connection().run_on_commit)
+
+
+def get_category_tree():
+    global _tree
+    version = category_tree_version()
+    if _changed_in_transaction():
+        # Kategorie změněné v téhle transakci ostatní ještě nevidí - strom jen pro ni, do _tree ho neukládáme
+        # (pod starou verzí by po rollbacku zůstal). Kategorií jsou desítky, načtení je levné.
+        return CategoryTree(_load_categories(), version)
+
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+
+    with _lock:
+        if _tree is None or _tree.version != version:
+            _tree = CategoryTree(_load_categories(), version)
+        return _tree
+
+
+async def acategory_tree_version():
+    version = await cache.aget(CATEGORY_TREE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATEGORY_TREE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = await cache.aget(CATEGORY_TREE_VERSION_KEY)
+    return version
+
+
+async def aget_category_tree():
+    """Async varianta get_category_tree pro async_views.py (sdílí s ní strom v paměti procesu)"""
+    global _tree
+    version = await acategory_tree_version()
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+
+    # Bez zámku - při souběhu se strom načte víckrát, ale výsledek je stejný
+    categories = [category async for category in Category.objects.order_by('id')]
+    stale = _fill_paths(categories)
+    if stale:
+        await Category.objects.abulk_update(stale, ['path'])
+    _tree = CategoryTree(categories, version)
+    return _tree
+
+
+def _bump_tree_version():
+    cache.set(CATEGORY_TREE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_category_tree():
+    global _tree
+    _tree = None
+    # Verze až po COMMITu - souběžný request by jinak pod novou verzí uložil strom ze starých řádků
+    transaction.on_commit(_bump_tree_version)
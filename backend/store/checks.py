@@ -0,0 +1,15 @@
+from django.core.checks import Tags, Warning, register
+from .response_cache import versions_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Verze v cache (katalog, strom kategorií, role v JWT) musí být sdílené mezi workery"""
+    if versions_shared():
+        return []
+    return [Warning(
+        "Cache je jen v paměti procesu (LocMemCache) - posun verzí v jednom workeru ostatní nezneplatní.",
+        hint="Pro víc workerů (gunicorn, uvicorn --workers) nastavte REDIS_URL, paměť procesu stačí jen pro runserver. "
+             "Role z JWT i uživatelé (is_active) se do té doby vždy ověřují v DB.",
+        id='store.W001',
+    )]
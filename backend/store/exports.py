@@ -0,0 +1,63 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Kolik objednávek (i s položkami) načítáme z DB najednou
+EXPORT_CHUNK_SIZE = 500
+
+ORDER_CSV_HEADER = [
+    'order_id', 'created_at', 'full_name', 'email', 'address', 'city', 'zip_code', 'paid',
+    'shipping_method', 'payment_method', 'total_amount', 'product_id', 'product_name', 'quantity', 'price',
+]
+
+
+class Echo:
+    """Pseudo-soubor pro csv.writer - místo zápisu řádek rovnou vrátí (viz Django docs o streamování CSV)"""
+
+    def write(self, value):
+        return value
+
+
+def _order_fields(order):
+    return {
+        'id': order.id,
+        'created_at': order.created_at,
+        'full_name': order.full_name,
+        'email': order.email,
+        'address': order.address,
+        'city': order.city,
+        'zip_code': order.zip_code,
+        'paid': order.paid,
+        'shipping_method': order.shipping_method,
+        'payment_method': order.payment_method,
+        'total_amount': order.total_amount,
+    }
+
+
+def order_csv_rows(orders):
+    """Jeden řádek CSV = jedna položka objednávky (údaje objednávky se opakují)"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_CSV_HEADER)
+
+    for order in orders.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        head = list(_order_fields(order).values())
+        head[1] = order.created_at.isoformat()
+        for item in order.items.all():
+            yield writer.writerow(head + [item.product_id, item.product_name, item.quantity, item.price])
+
+
+def order_ndjson_rows(orders):
+    """Jeden řádek = jedna objednávka jako JSON (i s položkami)"""
+    for order in orders.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        data = _order_fields(order)
+        data['items'] = [
+            {'product_id': item.product_id, 'product_name': item.product_name, 'quantity': item.quantity, 'price': item.price}
+            for item in order.items.all()
+        ]
+        yield json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+ORDER_EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', order_csv_rows),
+    'ndjson': ('application/x-ndjson; charset=utf-8', order_ndjson_rows),
+}
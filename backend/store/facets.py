@@ -0,0 +1,105 @@
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import Product, ProductFacet
+from .spec_filters import EXACT_SEPARATOR, SUBSTRING_SEPARATOR
+
+# Klíč, pod kterým ukládáme do indexu výrobce (Product.brand je samostatný sloupec, ne specifikace).
+# S ':' se nepotká s klíčem specifikace - ty s oddělovačem ?specs= do indexu nejdou (nedalo by se podle nich filtrovat).
+BRAND_FACET_KEY = ':brand'
+
+# Sloupce produktu, které ovlivňují index - jiné změny (např. sklad) index nepřepočítávají
+FACET_FIELDS = ('category_id', 'brand', 'specification', 'is_available')
+
+MAX_KEY_LENGTH = ProductFacet._meta.get_field('key').max_length
+MAX_VALUE_LENGTH = ProductFacet._meta.get_field('value').max_length
+
+
+def is_facet_key(key):
+    """Klíč specifikace, podle kterého jde filtrovat (?specs=key:value) a který se vejde do ProductFacet.key"""
+    return len(key) <= MAX_KEY_LENGTH and EXACT_SEPARATOR not in key and SUBSTRING_SEPARATOR not in key
+
+
+def facet_entries(category_id, brand, specification, is_available):
+    """Vrátí seznam (category_id, key, value), kterými produkt přispívá do indexu"""
+    if not category_id or not is_available:
+        return []
+
+    entries = []
+    if brand:
+        entries.append((category_id, BRAND_FACET_KEY, brand[:MAX_VALUE_LENGTH]))
+
+    for key, value in (specification or {}).items():
+        # Oříznutý klíč by nic nenašel a delší by v post_save shodil uložení produktu (DataError)
+        if not is_facet_key(key):
+            continue
+        # Stejně jako dřív ve FilterOptionsView - hodnoty porovnáváme jako string
+        entries.append((category_id, key, str(value)[:MAX_VALUE_LENGTH]))
+
+    return entries
+
+
+def product_facet_entries(product):
+    return facet_entries(product.category_id, product.brand, product.specification, product.is_available)
+
+
+def _increment(category_id, key, value, amount):
+    updated = ProductFacet.objects.filter(category_id=category_id, key=key, value=value).update(
+        product_count=F('product_count') + amount
+    )
+    if updated:
+        return
+
+    try:
+        # Savepoint - když řádek mezitím založil jiný request, jen ho navýšíme
+        with transaction.atomic():
+            ProductFacet.objects.create(category_id=category_id, key=key, value=value, product_count=amount)
+    except IntegrityError:
+        ProductFacet.objects.filter(category_id=category_id, key=key, value=value).update(
+            product_count=F('product_count') + amount
+        )
+
+
+def _decrement(category_id, key, value, amount):
+    ProductFacet.objects.filter(
+        category_id=category_id, key=key, value=value, product_count__gt=amount
+    ).update(product_count=F('product_count') - amount)
+    # Hodnoty, které už žádný produkt nemá, z indexu rovnou smažeme
+    ProductFacet.objects.filter(
+        category_id=category_id, key=key, value=value, product_count__lte=amount
+    ).delete()
+
+
+def apply_facet_change(old_entries, new_entries):
+    """Promítne změnu jednoho produktu do indexu (odečte staré hodnoty, přičte nové)"""
+    old_counts = Counter(old_entries)
+    new_counts = Counter(new_entries)
+
+    with transaction.atomic():
+        for entry, amount in (old_counts - new_counts).items():
+            _decrement(*entry, amount)
+        for entry, amount in (new_counts - old_counts).items():
+            _increment(*entry, amount)
+
+
+def rebuild_facet_index(batch_size=2000):
+    """Přepočítá celý index od nuly. Produkty čte po dávkách, aby nezabraly celou paměť."""
+    counts = Counter()
+    products = Product.objects.filter(is_available=True, category__isnull=False).values_list(
+        'category_id', 'brand', 'specification', 'is_available'
+    )
+
+    for row in products.iterator(chunk_size=batch_size):
+        counts.update(facet_entries(*row))
+
+    with transaction.atomic():
+        ProductFacet.objects.all().delete()
+        ProductFacet.objects.bulk_create(
+            (
+                ProductFacet(category_id=category_id, key=key, value=value, product_count=amount)
+                for (category_id, key, value), amount in counts.items()
+            ),
+            batch_size=batch_size,
+        )
+
+    return len(counts)
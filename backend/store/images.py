@@ -0,0 +1,128 @@
+import logging
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import InvalidStorageError, default_storage, storages
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Velikosti variant (maximální šířka/výška v px) - menší originál se nezvětšuje
+IMAGE_VARIANTS = {
+    'thumb': 160,   # košík, našeptávač
+    'card': 480,    # karta ve výpisu produktů
+    'detail': 1200, # detail produktu
+}
+
+WEBP_QUALITY = 80
+FALLBACK_QUALITY = 85
+
+VARIANT_DIR = 'products/variants'
+
+
+def variant_storage():
+    """Kam se varianty ukládají - STORAGES['image_variants'], jinak stejné úložiště jako originály"""
+    try:
+        return storages['image_variants']
+    except InvalidStorageError:
+        return default_storage
+
+
+def _encode(image, fmt, quality):
+    buffer = BytesIO()
+    image.save(buffer, fmt, quality=quality, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_variants(product):
+    """
+    Z product.image vyrobí všechny varianty (WebP + JPEG/PNG jako záloha pro starší prohlížeče)
+    a vrátí mapu, která se ukládá do Product.image_variants.
+    """
+    storage = variant_storage()
+    with product.image.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    # Průhlednost umí jen PNG, jinak je záloha JPEG
+    has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+    fallback_format, fallback_ext = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+
+    stem = os.path.splitext(os.path.basename(product.image.name))[0]
+    variants = {'source': product.image.name}
+    for name, size in IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        base = f"{VARIANT_DIR}/{stem}-{name}"
+        variants[name] = {
+            'width': image.width,
+            'height': image.height,
+            'webp': storage.save(f"{base}.webp", _encode(image, 'WEBP', WEBP_QUALITY)),
+            'fallback': storage.save(f"{base}.{fallback_ext}", _encode(image, fallback_format, FALLBACK_QUALITY)),
+        }
+    return variants
+
+
+def delete_variants(variants):
+    storage = variant_storage()
+    for name in IMAGE_VARIANTS:
+        for key in ('webp', 'fallback'):
+            path = (variants or {}).get(name, {}).get(key)
+            if not path:
+                continue
+            try:
+                storage.delete(path)
+            except Exception as e:
+                # Nesmazaný soubor jen zabírá místo - uložení ani smazání produktu kvůli tomu neselže
+                logger.warning("Variantu obrázku %s se nepodařilo smazat: %s", path, e)
+
+
+def refresh_variants(product, force=False):
+    """
+    Přegeneruje varianty, pokud se změnil obrázek (nebo force). Ukládá přes update(),
+    takže se znovu nespustí signály. Vrátí True, když se varianty změnily.
+    Ze signálu se volá až po COMMITu uložení produktu (store/signals.py).
+    """
+    old = product.image_variants or {}
+    source = product.image.name if product.image else None
+    if not force and old.get('source') == source:
+        return False
+
+    variants = {}
+    if source:
+        try:
+            variants = generate_variants(product)
+        except Exception:
+            # Běží po uložení produktu - chyba úložiště (Cloudinary API, síť), poškozený nebo obří obrázek
+            # (DecompressionBombError) nesmí shodit uložení produktu. Serializer pak vrátí originál.
+            logger.exception("Varianty obrázku produktu %s se nepodařilo vytvořit", product.pk)
+
+    delete_variants(old)
+    product.image_variants = variants
+    type(product).objects.filter(pk=product.pk).update(image_variants=variants)
+    return True
+
+
+def variant_urls(variants):
+    """{'thumb': {'webp': url, 'fallback': url, 'width': 160, 'height': 120}, ...} pro API"""
+    if not variants:
+        return {}
+    storage = variant_storage()
+    return {
+        name: dict(variants[name], webp=storage.url(variants[name]['webp']), fallback=storage.url(variants[name]['fallback']))
+        for name in IMAGE_VARIANTS if name in variants
+    }
+
+
+def variant_srcset(urls):
+    """Z variant_urls poskládá hodnoty pro <source srcset> / <img srcset>: {'webp': 'a.webp 160w, ...', 'fallback': ...}"""
+    if not urls:
+        return {}
+    # Malý originál se nezvětšuje, takže víc variant může mít stejnou šířku - v srcset stačí jedna
+    by_width = {variant['width']: variant for variant in reversed(list(urls.values()))}
+    return {
+        key: ', '.join(f"{variant[key]} {width}w" for width, variant in sorted(by_width.items()))
+        for key in ('webp', 'fallback')
+    }
@@ -0,0 +1,208 @@
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from .models import Product, StockShard
+from .categories import get_category_tree
+from .response_cache import bump_versions, product_scopes
+
+# Na kolik slotů se sklad hot produktu rozdělí - zhruba kolik nákupů ho může odepisovat současně
+DEFAULT_SHARDS = 8
+
+
+class OutOfStock(Exception):
+    """Některý produkt nemá na skladě požadované množství"""
+
+    def __init__(self, product_name):
+        super().__init__(product_name)
+        self.product_name = product_name
+
+
+def reserve_stock(lines, sharded_ids=()):
+    """
+    Odečte ze skladu položky objednávky [(product_id, množství), ...] najednou.
+    Musí běžet uvnitř transaction.atomic() - při chybě se vrátí i objednávka.
+
+    Počet dotazů nezávisí na počtu položek:
+      1. SELECT ... FOR UPDATE (zamkne řádky vždy ve stejném pořadí podle id -> žádný deadlock)
+      2. jeden podmíněný UPDATE ... SET stock = stock - CASE ... WHERE (id = X AND stock >= Q) OR ...
+
+    Produkty z sharded_ids (Product.sharded_stock) mají sklad ve slotech - jejich řádek se nezamyká,
+    viz claim_sharded_stock.
+    """
+    quantities = Counter()
+    for product_id, quantity in lines:
+        quantities[product_id] += quantity # Stejný produkt může být v objednávce víckrát
+    if not quantities:
+        return
+
+    # 1. Rozdělený sklad - každý produkt zvlášť, bez zámku na Product
+    for product_id in sorted(set(sharded_ids) & set(quantities)):
+        claimed = claim_sharded_stock(product_id, quantities[product_id])
+        if claimed is False:
+            raise OutOfStock(Product.objects.filter(pk=product_id).values_list('name', flat=True).first() or f"#{product_id}")
+        if claimed:
+            del quantities[product_id]
+        # None = produkt mezitím přestal být rozdělený, odečte se normálně níže
+    if not quantities:
+        return
+
+    locked = list(
+        Product.objects.select_for_update()
+        .filter(id__in=quantities.keys())
+        .order_by('id')
+        .values_list('id', 'name', 'stock', 'slug', 'category_id', 'sharded_stock')
+    )
+
+    for product_id, name, stock, slug, category_id, sharded in locked:
+        # Rozdělený mezitím (shard_stock drží stejný zámek) - stock je jen pro zobrazení, bereme ze slotů
+        if sharded:
+            if not claim_sharded_stock(product_id, quantities.pop(product_id)):
+                raise OutOfStock(name)
+        elif stock < quantities[product_id]:
+            raise OutOfStock(name)
+    locked = [row for row in locked if not row[5]]
+    if not quantities:
+        return
+
+    condition = Q()
+    for product_id, quantity in quantities.items():
+        condition |= Q(id=product_id, stock__gte=quantity)
+
+    updated = Product.objects.filter(condition).update(
+        stock=F('stock') - Case(
+            *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            default=Value(0),
+        )
+    )
+
+    # Produkt mezitím někdo smazal (zamčené řádky jinak projdou vždy)
+    if updated != len(quantities):
+        missing = set(quantities) - {row[0] for row in locked}
+        raise OutOfStock(f"#{min(missing)}" if missing else '')
+
+    # Změna skladu jde mimo Product.save(), takže cache katalogu zneplatníme sami (až po commitu)
+    tree = get_category_tree()
+    scopes = []
+    for product_id, name, stock, slug, category_id, sharded in locked:
+        category = tree.get(category_id)
+        scopes += product_scopes(slug, category.path if category else '')
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+# --- ROZDĚLENÝ SKLAD (StockShard) ---
+# Hot produkt při výprodeji: všechny nákupy by se řadily za zámek jednoho řádku Product.
+# Sklad se proto rozdělí do N slotů a každý nákup si bere z jiného (SKIP LOCKED = nečeká na cizí zámky).
+# Product.stock je pak jen pro zobrazení a dopočítává ho consolidate_stock().
+
+def claim_sharded_stock(product_id, quantity):
+    """
+    Odečte množství ze slotů produktu. True = odečteno, False = nestačí sklad,
+    None = produkt sloty nemá (není rozdělený). Musí běžet uvnitř transaction.atomic().
+    """
+    table = StockShard._meta.db_table
+    pick = (
+        f"UPDATE {table} SET quantity = quantity - %s WHERE id = ("
+        f"  SELECT id FROM {table} WHERE product_id = %s AND quantity >= %s"
+        f"  ORDER BY random() LIMIT 1 FOR UPDATE{{}}"
+        f")"
+    )
+    with connection.cursor() as cursor:
+        # 1. Náhodný volný slot, na kterém zrovna nikdo nestojí
+        cursor.execute(pick.format(' SKIP LOCKED'), [quantity, product_id, quantity])
+        if cursor.rowcount:
+            return True
+        # 2. Všechny sloty s dostatkem jsou zamčené (víc nákupů než slotů) - počkáme na jeden z nich
+        cursor.execute(pick.format(''), [quantity, product_id, quantity])
+        if cursor.rowcount:
+            return True
+
+    # 3. Žádný slot sám nestačí (dochází zboží) - zamkneme všechny a složíme množství z více slotů
+    shards = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('slot'))
+    if not shards:
+        return None
+    if sum(shard.quantity for shard in shards) < quantity:
+        return False
+
+    remaining = quantity
+    changed = []
+    for shard in shards:
+        take = min(shard.quantity, remaining)
+        if take:
+            shard.quantity -= take
+            remaining -= take
+            changed.append(shard)
+        if not remaining:
+            break
+    StockShard.objects.bulk_update(changed, ['quantity'])
+    return True
+
+
+def _write_shards(product_id, total, shards):
+    base, extra = divmod(max(total, 0), shards)
+    StockShard.objects.filter(product_id=product_id).delete()
+    StockShard.objects.bulk_create([
+        StockShard(product_id=product_id, slot=slot, quantity=base + (1 if slot < extra else 0))
+        for slot in range(shards)
+    ])
+    Product.objects.filter(pk=product_id).update(sharded_stock=True, stock=max(total, 0))
+
+
+def _locked_shard_total(product_id):
+    # Zamkne všechny sloty - počká na rozběhnuté nákupy a další nepustí, dokud nedoběhne transakce
+    return sum(StockShard.objects.select_for_update().filter(product_id=product_id).values_list('quantity', flat=True))
+
+
+def shard_stock(product_id, shards=DEFAULT_SHARDS):
+    """Rozdělí sklad produktu do slotů (už rozdělený přerozdělí rovnoměrně). Vrací celkový sklad."""
+    with transaction.atomic():
+        product = Product.objects.select_for_update().only('stock', 'sharded_stock').get(pk=product_id)
+        total = _locked_shard_total(product_id) if product.sharded_stock else product.stock
+        _write_shards(product_id, total, shards)
+    return total
+
+
+def unshard_stock(product_id):
+    """Vrátí sklad ze slotů zpátky do Product.stock. Vrací celkový sklad."""
+    with transaction.atomic():
+        product = Product.objects.select_for_update().only('slug', 'category_id').get(pk=product_id)
+        total = _locked_shard_total(product_id)
+        StockShard.objects.filter(product_id=product_id).delete()
+        Product.objects.filter(pk=product_id).update(sharded_stock=False, stock=total)
+
+    category = get_category_tree().get(product.category_id)
+    bump_versions(product_scopes(product.slug, category.path if category else ''))
+    return total
+
+
+def set_sharded_stock(product_id, quantity):
+    """Nový stav skladu rozděleného produktu (naskladnění, ruční oprava v adminu) - rozloží se do stávajících slotů"""
+    with transaction.atomic():
+        shards = StockShard.objects.select_for_update().filter(product_id=product_id).count()
+        _write_shards(product_id, quantity, shards or DEFAULT_SHARDS)
+
+
+def consolidate_stock():
+    """
+    Přepíše Product.stock rozdělených produktů součtem slotů (pro zobrazení v katalogu).
+    Sloty čte bez zámků, takže běžící nákupy neblokuje. Vrací počet změněných produktů.
+    """
+    totals = dict(
+        StockShard.objects.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+    products = Product.objects.filter(sharded_stock=True).values_list('id', 'stock', 'slug', 'category_id')
+
+    tree = get_category_tree()
+    scopes = []
+    changed = 0
+    for product_id, stock, slug, category_id in products:
+        total = totals.get(product_id, 0)
+        if total == stock:
+            continue
+        Product.objects.filter(pk=product_id).update(stock=total)
+        category = tree.get(category_id)
+        scopes += product_scopes(slug, category.path if category else '')
+        changed += 1
+
+    if scopes:
+        bump_versions(scopes)
+    return changed
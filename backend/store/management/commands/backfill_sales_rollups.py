@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from store.rollups import backfill_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Spočítá od nuly statistiky tržeb (SalesRollup) z celé historie objednávek."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = backfill_sales_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistiky tržeb přepočítány: {count} řádků za {time.perf_counter() - started:.1f} s."
+        ))
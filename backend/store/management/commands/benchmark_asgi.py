@@ -0,0 +1,174 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+WSGI_PORT = 8101
+ASGI_PORT = 8102
+
+
+class Command(BaseCommand):
+    help = (
+        "Zátěžový test katalogu: WSGI (gunicorn, sync views) proti ASGI (uvicorn, async views /api/async/...). "
+        "Bez --wsgi-url/--asgi-url si oba servery spustí sám. Vypíše requesty/s a latence p50/p99."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/products/', help="Sync endpoint, async je stejná cesta pod /api/async/")
+        parser.add_argument('--concurrency', type=int, default=200, help="Počet souběžných spojení")
+        parser.add_argument('--duration', type=float, default=10, help="Délka měření v sekundách")
+        parser.add_argument('--warmup', type=float, default=2)
+        parser.add_argument('--bust-cache', action='store_true',
+                            help="Každý request jiná URL (?_bench=N) - měří cestu do DB místo cache odpovědí")
+        parser.add_argument('--workers', type=int, default=4, help="Procesy serveru (při spuštění serverů)")
+        parser.add_argument('--threads', type=int, default=8, help="Vlákna na gunicorn worker")
+        parser.add_argument('--wsgi-url', help="Už běžící WSGI server, např. http://127.0.0.1:8000")
+        parser.add_argument('--asgi-url', help="Už běžící ASGI server, např. http://127.0.0.1:8001")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        async_path = path.replace('/api/', '/api/async/', 1)
+        servers = []
+
+        try:
+            wsgi_url = options['wsgi_url'] or self.start_server(servers, [
+                'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{WSGI_PORT}',
+                '--workers', str(options['workers']), '--threads', str(options['threads']), '--log-level', 'warning',
+            ], WSGI_PORT)
+            asgi_url = options['asgi_url'] or self.start_server(servers, [
+                'uvicorn', 'core.asgi:application', '--host', '127.0.0.1', '--port', str(ASGI_PORT),
+                '--workers', str(options['workers']), '--log-level', 'warning', '--no-access-log',
+            ], ASGI_PORT)
+
+            targets = [
+                ("WSGI sync", wsgi_url + path),
+                ("ASGI sync", asgi_url + path), # Sync view pod ASGI běží ve vlákně - pro srovnání
+                ("ASGI async", asgi_url + async_path),
+            ]
+
+            self.stdout.write(
+                f"{options['concurrency']} spojení, {options['duration']:.0f} s na cíl"
+                f"{', bez cache odpovědí' if options['bust_cache'] else ''}\n"
+            )
+            self.stdout.write(f"{'cíl':<12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'chyby':>8}")
+            for label, url in targets:
+                result = asyncio.run(run_load(url, options['concurrency'], options['warmup'], options['duration'], options['bust_cache']))
+                self.stdout.write(
+                    f"{label:<12} {result['rps']:>10.0f} {result['p50']:>10.1f} {result['p99']:>10.1f} {result['errors']:>8}"
+                )
+        finally:
+            for process in servers:
+                process.terminate()
+                process.wait(timeout=10)
+
+    def start_server(self, servers, command, port):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'))
+        try:
+            process = subprocess.Popen([sys.executable, '-m', *command], cwd=settings.BASE_DIR, env=env)
+        except OSError as e:
+            raise CommandError(f"Server se nepodařilo spustit ({command[0]}): {e}")
+        servers.append(process)
+
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"{command[0]} skončil hned po startu (je nainstalovaný?)")
+            try:
+                asyncio.run(fetch_once(url + '/api/categories/'))
+                return url
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"{command[0]} nenaběhl do 30 s")
+
+
+# --- MINIMÁLNÍ HTTP/1.1 KLIENT (keep-alive, bez závislostí) ---
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("spojení uzavřeno")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2) # data + \r\n
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def fetch_once(url):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    writer.write(f"GET {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status, _ = await read_response(reader)
+    writer.close()
+    return status
+
+
+async def run_load(url, concurrency, warmup, duration, bust_cache):
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else '')
+    separator = '&' if parts.query else '?'
+    latencies = []
+    errors = 0
+    counter = 0
+
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors, counter
+        reader = writer = None
+        while time.perf_counter() < stop_at:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+                counter += 1
+                request_target = f"{target}{separator}_bench={counter}" if bust_cache else target
+                writer.write(f"GET {request_target} HTTP/1.1\r\nHost: {parts.netloc}\r\n\r\n".encode())
+                request_started = time.perf_counter()
+                await writer.drain()
+                status, keep_alive = await read_response(reader)
+                finished = time.perf_counter()
+
+                if finished >= measure_from:
+                    if status == 200:
+                        latencies.append(finished - request_started)
+                    else:
+                        errors += 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                if time.perf_counter() >= measure_from:
+                    errors += 1
+                if writer is not None:
+                    writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {'rps': len(latencies) / duration, 'p50': percentile(0.5), 'p99': percentile(0.99), 'errors': errors}
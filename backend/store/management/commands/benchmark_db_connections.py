@@ -0,0 +1,139 @@
+import statistics
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+APPLICATION_NAME = 'benchmark_db_connections'
+
+# Dotaz jednoho "requestu" - čtení produktu podle id, jako detail v katalogu
+QUERY = "SELECT id, name, price, stock FROM store_product WHERE id >= %s ORDER BY id LIMIT 1"
+
+
+def register_connection(alias, mode):
+    """Vlastní alias pro každý režim - pool drží Django podle aliasu, s hlavním spojením se nepotká"""
+    connections.settings[alias] = connection_config(mode)
+    return connections[alias]
+
+
+def connection_config(mode):
+    """Nastavení spojení pro daný režim - vychází z DATABASES['default'] a proměnných DB_* (core/settings.py)"""
+    config = dict(connections['default'].settings_dict)
+    options = {key: value for key, value in config.get('OPTIONS', {}).items() if key != 'pool'}
+    options['application_name'] = APPLICATION_NAME # Podle toho je --terminate-every najde
+
+    if mode == 'new':
+        config.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    elif mode == 'persistent':
+        config.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=settings.DB_HEALTH_CHECKS)
+    elif mode == 'pool':
+        options['pool'] = dict(settings.DB_POOL_OPTIONS)
+        config.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=settings.DB_HEALTH_CHECKS)
+    config['OPTIONS'] = options
+    return config
+
+
+class Command(BaseCommand):
+    help = (
+        "Latence requestu podle práce se spojením do PostgreSQL: nové spojení na každý request, "
+        "trvalé spojení (CONN_MAX_AGE) a pool (DB_POOL_*). Každý request = začátek a konec requestu "
+        "jako v Django handleru + jeden dotaz. --terminate-every mezitím shazuje spojení (restart DB) "
+        "a ověří, že health checky spojení obnoví."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Počet requestů na vlákno")
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--modes', default='new,persistent,pool')
+        parser.add_argument('--terminate-every', type=int, default=0,
+                            help="Každých N requestů (na vlákno 0) ukončit všechna spojení benchmarku na straně DB")
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - {'new', 'persistent', 'pool'}
+        if unknown:
+            raise CommandError(f"Neznámé režimy: {', '.join(sorted(unknown))}")
+
+        pool = settings.DB_POOL_OPTIONS
+        self.stdout.write(
+            f"Pool: min {pool['min_size']}, max {pool['max_size']}, health checky {'ano' if settings.DB_HEALTH_CHECKS else 'ne'}; "
+            f"{options['threads']} vláken x {options['requests']} requestů"
+        )
+        self.stdout.write(f"{'režim':12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'chyby':>6}")
+
+        results = {}
+        for mode in modes:
+            latencies, errors, elapsed = self.run(mode, options)
+            total = len(latencies) + errors
+            results[mode] = statistics.median(latencies) if latencies else 0
+            self.stdout.write(
+                f"{mode:12} {total / elapsed:8.0f} {results[mode]:8.2f} "
+                f"{statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else 0:8.2f} {errors:6}"
+            )
+
+        if 'new' in results and 'pool' in results and results['pool']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Pool ušetří {results['new'] - results['pool']:.2f} ms na request (p50)."
+            ))
+
+    def run(self, mode, options):
+        alias = f"benchmark_{mode}"
+        register_connection(alias, mode)
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(index):
+            connection = connections[alias] # Každé vlákno má vlastní spojení (u poolu si ho půjčuje)
+            mine = []
+            failed = 0
+            try:
+                for number in range(options['requests']):
+                    if index == 0 and options['terminate_every'] and number and number % options['terminate_every'] == 0:
+                        self.terminate_connections()
+
+                    started = time.perf_counter()
+                    try:
+                        # Totéž, co dělá Django na signálech request_started / request_finished
+                        connection.close_if_unusable_or_obsolete()
+                        with connection.cursor() as cursor:
+                            cursor.execute(QUERY, [number])
+                            cursor.fetchone()
+                    except DatabaseError:
+                        failed += 1 # Request by skončil chybou 500
+                    else:
+                        mine.append((time.perf_counter() - started) * 1000)
+                    finally:
+                        connection.close_if_unusable_or_obsolete()
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(mine)
+                    errors.append(failed)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if mode == 'pool':
+            connections[alias].close_pool()
+        del connections.settings[alias]
+        return latencies, sum(errors), elapsed
+
+    def terminate_connections(self):
+        """Simulace restartu DB - shodí spojení všech vláken (i ta odložená v poolu)"""
+        admin = register_connection('benchmark_terminate', 'new')
+        try:
+            with admin.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE application_name = %s AND pid <> pg_backend_pid()",
+                    [APPLICATION_NAME],
+                )
+        finally:
+            admin.close()
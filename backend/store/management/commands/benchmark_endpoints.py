@@ -0,0 +1,266 @@
+import json
+import statistics
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from store import urls
+from store.authentication import user_cache
+from store.builds import SLOT_TEMPLATES
+from store.models import BuildPart, Cart, CartItem, Category, Order, OrderItem, Product
+from store.rollups import record_order_placed
+from store.tokens import StoreTokenObtainPairSerializer
+
+# Identity benchmarku - prefix "gen-", takže je smaže i generate_catalog --clear
+BENCH_USER = 'gen-bench-user'
+BENCH_STAFF = 'gen-bench-staff'
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# Dotazy, které jen obalují vnořené transakce - v produkci (bez našeho atomic kolem requestu) nevzniknou
+TRANSACTION_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+MODES = {
+    'cache': "opakovaný stejný request (cache odpovědí i uživatelů zahřátá)",
+    'db': "pokaždé jiná URL (?_bench=N) a prázdná cache uživatelů - cesta až do DB",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark všech endpointů ze store/urls.py nad daty z generate_catalog: latence (p50/p95) "
+        "a počet SQL dotazů. --save-baseline uloží výsledky, další běh je s nimi porovná a skončí chybou, "
+        "když se latence zhorší o víc než --threshold nebo přibude dotaz. Zapisující requesty se vrací (rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Měřených requestů na endpoint")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+        parser.add_argument('--only', help="Jen endpointy, jejichž název obsahuje tenhle text")
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help="Uložit výsledky jako nový baseline")
+        parser.add_argument('--threshold', type=float, default=0.5,
+                            help="Povolené zhoršení p50 latence oproti baseline (0.5 = o 50 %%)")
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help="Menší zhoršení latence (v ms) se ignoruje - šum u rychlých endpointů")
+
+    def handle(self, *args, **options):
+        fixtures = prepare_fixtures()
+        cases = build_cases(fixtures)
+
+        # 1. Každá routa z urls.py musí mít aspoň jeden případ - nový endpoint se nesmí ztratit
+        covered = {case['route'] for case in cases}
+        missing = [pattern.name for pattern in urls.urlpatterns if pattern.name not in covered]
+        if missing:
+            raise CommandError(f"Chybí benchmark pro endpointy: {', '.join(missing)} (doplň je do build_cases)")
+
+        if options['only']:
+            cases = [case for case in cases if options['only'] in case['label']]
+        modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+
+        # 2. Měření
+        client = Client()
+        results = {}
+        failures = []
+        self.stdout.write(f"{'endpoint':<44} {'p50 ms':>8} {'p95 ms':>8} {'SQL':>5}")
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for mode in modes:
+                for case in cases:
+                    key = f"{case['label']} ({mode})"
+                    result = measure(client, case, mode, options['warmup'], options['repeat'])
+                    if result['status'] != case['status']:
+                        failures.append(f"{key}: HTTP {result['status']}, čekáno {case['status']}")
+                    results[key] = result
+                    self.stdout.write(f"{key:<44} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['queries']:>5}")
+
+        if failures:
+            raise CommandError("Endpointy vrátily neočekávaný status:\n" + "\n".join(failures))
+
+        # 3. Baseline - uložit, nebo porovnat
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps({
+                'repeat': options['repeat'],
+                'products': fixtures['product_count'],
+                'results': results,
+            }, indent=2, ensure_ascii=False) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline uložen do {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f"Baseline {baseline_path} neexistuje - ulož ho přes --save-baseline."))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get('products') != fixtures['product_count']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline je změřený nad {baseline.get('products')} produkty, teď jich je {fixtures['product_count']} - "
+                "latence nejsou přímo srovnatelné."
+            ))
+
+        regressions = compare(baseline['results'], results, options['threshold'], options['min_delta_ms'])
+        if regressions:
+            raise CommandError("Regrese oproti baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"Bez regresí oproti {baseline_path} (práh {options['threshold']:.0%})."))
+
+
+def prepare_fixtures():
+    """Uživatelé, tokeny a data, na která se benchmark ptá. Košík a objednávky uživatele se pokaždé srovnají na stejný stav."""
+    products = list(
+        Product.objects.filter(slug__startswith='gen-', is_available=True, stock__gte=10)
+        .select_related('category').order_by('id')[:5]
+    )
+    if len(products) < 5:
+        raise CommandError("Chybí data - nejdřív spusť: python manage.py generate_catalog")
+
+    user, _ = User.objects.get_or_create(username=BENCH_USER, defaults={'email': f"{BENCH_USER}@example.com"})
+    staff, _ = User.objects.get_or_create(
+        username=BENCH_STAFF, defaults={'email': f"{BENCH_STAFF}@example.com", 'is_staff': True}
+    )
+
+    # Stejný košík a stejné objednávky při každém běhu, ať se počty dotazů dají porovnávat
+    cart, _ = Cart.objects.get_or_create(user=user)
+    CartItem.objects.filter(cart=cart).delete()
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=1) for product in products[:3]])
+
+    Order.objects.filter(user=user).delete()
+    for product in products[:5]:
+        order = Order.objects.create(
+            user=user, full_name="Benchmark", email=user.email, address="Testovací 1", city="Praha",
+            zip_code="11000", total_amount=product.price, item_count=1,
+        )
+        OrderItem(order=order, product=product, price=product.price, quantity=1).snapshot(product).save()
+        record_order_placed(order) # Smazání při dalším běhu je zase odečte (store/signals.py)
+
+    root = Category.objects.get(pk=products[0].category.path.split('/')[0])
+    # Jeden díl do každého slotu konfigurátoru (kompatibilitu neřešíme - měří se i hledání problémů)
+    build = {
+        slot: BuildPart.objects.filter(slot=slot, product__slug__startswith='gen-').order_by('pk').values_list('pk', flat=True).first()
+        for slot in SLOT_TEMPLATES
+    }
+    return {
+        'products': products,
+        'root_category': root,
+        'build': {slot: product_id for slot, product_id in build.items() if product_id},
+        'order': order,
+        'product_count': Product.objects.count(),
+        'user_token': str(StoreTokenObtainPairSerializer.get_token(user).access_token),
+        'staff_token': str(StoreTokenObtainPairSerializer.get_token(staff).access_token),
+    }
+
+
+def build_cases(fixtures):
+    """
+    Jeden případ = jeden request. 'route' je název z store/urls.py (kontroluje se pokrytí),
+    auth je None / 'user' / 'staff', 'write' znamená, že se request vrátí rollbackem.
+    """
+    products = fixtures['products']
+    product = products[0]
+    category_id = fixtures['root_category'].id
+    build = fixtures['build']
+    full_build = '&'.join(f"{slot}={product_id}" for slot, product_id in build.items())
+    order_data = {
+        'full_name': 'Benchmark', 'email': 'bench@example.com', 'address': 'Testovací 1', 'city': 'Praha',
+        'zip_code': '11000', 'total_amount': int(sum(p.price for p in products[:2])),
+        'items': [{'product': p.id, 'quantity': 1, 'price': int(p.price)} for p in products[:2]],
+    }
+
+    def case(label, route, path, method='GET', auth=None, data=None, status=200):
+        return {'label': label, 'route': route, 'path': path, 'method': method, 'data': data, 'status': status,
+                'token': fixtures[f'{auth}_token'] if auth else None, 'write': method != 'GET'}
+
+    return [
+        case("categories", 'categories', '/api/categories/'),
+        case("products", 'product-list', '/api/products/'),
+        case("products ?category", 'product-list', f'/api/products/?category={category_id}'),
+        case("products ?search", 'product-list', '/api/products/?search=RTX'),
+        case("product detail", 'product-detail', f'/api/products/{product.slug}/'),
+        case("product recommendations", 'product-recommendations', f'/api/products/{product.slug}/recommendations/'),
+        case("filters", 'product-filters', f'/api/filters/?category={category_id}'),
+        case("price histogram", 'price-histogram', f'/api/price-histogram/?category={category_id}'),
+        case("build ?cpu", 'build-check', f"/api/build/?cpu={build.get('cpu', '')}"),
+        case("build full", 'build-check', f'/api/build/?{full_build}'),
+        case("orders POST", 'create-order', '/api/orders/', 'POST', 'user', order_data, 201),
+        case("my-orders", 'my-orders', '/api/my-orders/', auth='user'),
+        case("my-order detail", 'my-order-detail', f"/api/my-orders/{fixtures['order'].id}/", auth='user'),
+        case("save-card POST", 'save-card', '/api/save-card/', 'POST', 'user',
+             {'cardNumber': '4111 1111 1111 1111', 'expiry': '12/30'}, 201),
+        case("saved-cards", 'saved-cards', '/api/saved-cards/', auth='user'),
+        case("manager orders", 'manager-orders', '/api/manager/orders/', auth='staff'),
+        case("manager export csv", 'manager-orders-export', '/api/manager/orders/export/csv/', auth='staff'),
+        case("manager analytics", 'manager-sales-analytics', '/api/manager/analytics/sales/?group_by=category', auth='staff'),
+        case("manager metrics", 'manager-metrics', '/api/manager/metrics/', auth='staff'),
+        case("manager prometheus", 'manager-metrics-prometheus', '/api/manager/metrics/prometheus/', auth='staff'),
+        case("register POST", 'register', '/api/register/', 'POST', None,
+             {'username': 'gen-bench-new', 'email': 'gen-bench-new@example.com', 'password': 'benchmark-heslo'}, 201),
+        case("profile", 'user-profile', '/api/profile/', auth='user'),
+        case("cart", 'cart', '/api/cart/', auth='user'),
+        case("cart POST", 'cart', '/api/cart/', 'POST', 'user', {'product_id': products[3].id, 'quantity': 1}),
+        case("cart DELETE", 'cart', '/api/cart/', 'DELETE', 'user', {'product_id': products[0].id}),
+        case("cart batch POST", 'cart-batch', '/api/cart/batch/', 'POST', 'user', {'items': [
+            {'product_id': p.id, 'quantity': 2, 'mode': 'set'} for p in products
+        ]}),
+        case("async categories", 'async-categories', '/api/async/categories/'),
+        case("async products", 'async-product-list', f'/api/async/products/?category={category_id}'),
+        case("async product detail", 'async-product-detail', f'/api/async/products/{product.slug}/'),
+        case("async filters", 'async-product-filters', f'/api/async/filters/?category={category_id}'),
+    ]
+
+
+def measure(client, case, mode, warmup, repeat):
+    headers = {'HTTP_AUTHORIZATION': f"Bearer {case['token']}"} if case['token'] else {}
+    body = json.dumps(case['data']) if case['data'] is not None else ''
+
+    timings = []
+    query_counts = []
+    status = None
+    for i in range(warmup + repeat):
+        path = case['path']
+        if mode == 'db':
+            # Jiná URL = jiný klíč v cache odpovědí; uživatel se načte znovu z DB
+            path += ('&' if '?' in path else '?') + f"_bench={time.perf_counter_ns()}"
+            user_cache.clear()
+
+        # Zapisující request běží v transakci, kterou na konci vrátíme - data zůstanou stejná
+        with transaction.atomic() if case['write'] else nullcontext():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.generic(case['method'], path, body, content_type='application/json', **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content) # Export se počítá až při čtení
+                elapsed = time.perf_counter() - started
+            if case['write']:
+                transaction.set_rollback(True)
+
+        status = response.status_code
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            query_counts.append(sum(1 for query in queries.captured_queries if not query['sql'].startswith(TRANSACTION_SQL)))
+
+    timings.sort()
+    return {
+        'status': status,
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'queries': max(query_counts),
+    }
+
+
+def compare(baseline, results, threshold, min_delta_ms):
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue # Nový endpoint - do baseline se dostane při příštím --save-baseline
+        if result['queries'] > before['queries']:
+            regressions.append(f"{key}: SQL dotazů {before['queries']} -> {result['queries']}")
+        delta = result['p50_ms'] - before['p50_ms']
+        if delta > min_delta_ms and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append(f"{key}: p50 {before['p50_ms']:.1f} ms -> {result['p50_ms']:.1f} ms")
+    return regressions
@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from store.models import Product
+from store.search import build_search_query
+
+WORDS = [
+    "herní", "grafická", "karta", "procesor", "základní", "deska", "paměť", "zdroj", "chladič",
+    "tichý", "výkonný", "modulární", "rgb", "gaming", "nvme", "ddr5", "ryzen", "core", "geforce",
+    "radeon", "rtx", "4060", "4070", "b650", "z790", "atx", "wifi", "bluetooth", "úsporný", "černý",
+]
+BRANDS = ["ASUS", "MSI", "Gigabyte", "AMD", "Intel", "Corsair", "Kingston", "Samsung", "Seasonic"]
+TERMS = ["rtx 4060", "grafická karta", "graficka karta", "modulární zdroj", "ryzen", "nonexistentword"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Porovná původní icontains hledání s fulltextem (search_vector) na syntetickém katalogu. "
+        "Vše běží v transakci, která se na konci vrátí zpět - data v DB nezůstanou."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stderr.write(self.style.ERROR("Benchmark vyžaduje PostgreSQL (search_vector je tsvector)."))
+            return
+
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.generate_catalog(rng, options['products'])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE store_product")
+
+            self.stdout.write(f"{'dotaz':<22} {'icontains ms':>14} {'fulltext ms':>14} {'zásahy':>8}")
+            for term in TERMS:
+                old_ms, _ = self.measure(lambda: self.icontains_page(term), options['repeat'])
+                new_ms, new_hits = self.measure(lambda: self.fulltext_page(term), options['repeat'])
+                self.stdout.write(f"{term:<22} {old_ms:>14.2f} {new_ms:>14.2f} {new_hits:>8}")
+
+            transaction.set_rollback(True)
+
+    def generate_catalog(self, rng, count):
+        started = time.perf_counter()
+        batch = []
+        for i in range(count):
+            batch.append(Product(
+                name=" ".join(rng.sample(WORDS, 4)).capitalize(),
+                slug=f"bench-search-{i}",
+                description=" ".join(rng.choices(WORDS, k=40)),
+                brand=rng.choice(BRANDS),
+                price=rng.randint(500, 60000),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        self.stdout.write(f"Vygenerováno {count} produktů za {time.perf_counter() - started:.1f} s")
+
+    def measure(self, func, repeat):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), result
+
+    # Původní chování: DRF SearchFilter nad name + description (icontains)
+    def icontains_page(self, term):
+        queryset = Product.objects.filter(is_available=True)
+        for word in term.split():
+            queryset = queryset.filter(Q(name__icontains=word) | Q(description__icontains=word))
+        return len(queryset.order_by('-created_at', '-id')[:24])
+
+    # Nové chování: stejný dotaz jako ProductSearchFilter (GIN index) + řazení podle relevance
+    def fulltext_page(self, term):
+        query = build_search_query(term)
+        queryset = Product.objects.filter(is_available=True, search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+        return len(queryset.order_by('-search_rank', '-id')[:24])
@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from rest_framework import serializers
+from store.inventory import DEFAULT_SHARDS, consolidate_stock, shard_stock
+from store.models import Order, Product
+from store.serializers import OrderSerializer
+
+ORDER_DATA = {
+    'full_name': 'Výprodej Test',
+    'email': 'flash@example.com',
+    'address': 'Testovací 1',
+    'city': 'Praha',
+    'zip_code': '11000',
+    'total_amount': 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Propustnost pokladny při výprodeji: mnoho vláken kupuje jeden hot produkt, "
+        "nejdřív s běžným skladem (zámek řádku Product), pak s rozděleným (StockShard). "
+        "Ověří, že se nepřeprodá. Vytvořené produkty a objednávky na konci smaže."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=400, help="Počet nákupů (po 1 kusu) v každém běhu")
+        parser.add_argument('--stock', type=int, default=400, help="Počáteční sklad hot produktu")
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+        parser.add_argument('--hold-ms', type=float, default=20.0,
+                            help="Jak dlouho zůstane transakce objednávky otevřená po odečtení skladu "
+                                 "(simuluje zbytek pokladny, např. volání platební brány)")
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        products = []
+        order_ids = []
+
+        try:
+            results = {}
+            for label, sharded in (('běžný sklad', False), ('rozdělený sklad', True)):
+                hot = Product.objects.create(
+                    name=f"Flash {run_id} {label}", slug=f"flash-{run_id}-{int(sharded)}",
+                    price=100, stock=options['stock'],
+                )
+                products.append(hot)
+                if sharded:
+                    shard_stock(hot.id, options['shards'])
+
+                # 1. Souběžné nákupy
+                sold, latencies, elapsed = self.run(hot, options)
+                order_ids += sold
+
+                # 2. Kontrola skladu (rozdělený se do Product.stock dostane až konsolidací)
+                if sharded:
+                    consolidate_stock()
+                hot.refresh_from_db()
+                if hot.stock < 0 or len(sold) > options['stock'] or hot.stock != options['stock'] - len(sold):
+                    raise CommandError(f"{label}: přeprodáno! Sklad {hot.stock}, prodáno {len(sold)}.")
+
+                results[label] = len(sold) / elapsed
+                self.stdout.write(
+                    f"{label:>16}: {len(sold)} objednávek za {elapsed:.2f} s = {results[label]:.0f} obj/s, "
+                    f"p50 {statistics.median(latencies):.1f} ms, zbývá skladem {hot.stock}"
+                )
+
+            before, after = results.values()
+            self.stdout.write(self.style.SUCCESS(f"OK - žádné přeprodání, propustnost {after / before:.1f}x."))
+        finally:
+            Order.objects.filter(id__in=order_ids).delete()
+            Product.objects.filter(id__in=[product.id for product in products]).delete()
+
+    def run(self, hot, options):
+        """Vlákna si berou nákupy ze společného počítadla; vrací (id objednávek, latence v ms, doba běhu)"""
+        remaining = iter(range(options['orders']))
+        lock = threading.Lock()
+        sold = []
+        latencies = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    order_id = self.place_order(hot, options['hold_ms'] / 1000)
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                        if order_id:
+                            sold.append(order_id)
+            finally:
+                connections.close_all() # Každé vlákno má vlastní spojení do DB
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sold, latencies, time.perf_counter() - started
+
+    def place_order(self, hot, hold):
+        data = dict(ORDER_DATA, items=[{'product': hot.id, 'quantity': 1, 'price': hot.price}])
+        serializer = OrderSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                order = serializer.save()
+                time.sleep(hold) # Zámky ze skladu se drží až do COMMITu
+            return order.id
+        except serializers.ValidationError:
+            return None
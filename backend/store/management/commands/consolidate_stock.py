@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from store.inventory import consolidate_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Přepíše Product.stock produktů s rozděleným skladem součtem slotů (StockShard), aby katalog "
+        "ukazoval aktuální stav. Pouštět pravidelně (cron), nebo s --every běžet ve smyčce."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0, help="Opakovat každých N sekund (0 = jednou)")
+
+    def handle(self, *args, **options):
+        while True:
+            changed = consolidate_stock()
+            self.stdout.write(f"Sklad přepočítán: {changed} změněných produktů.")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,36 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from store.catalog_io import CATEGORY_FIELDS, PRODUCT_FIELDS, detect_format, export_categories, export_products, write_records
+
+
+class Command(BaseCommand):
+    help = "Vyexportuje produkty nebo kategorie do JSON Lines / CSV (streamuje po dávkách, paměť neroste s katalogem)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['products', 'categories'], default='products')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help="Výchozí podle přípony --output, jinak jsonl")
+        parser.add_argument('--output', help="Cílový soubor (bez něj se píše na stdout)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Počet produktů načtených z DB najednou")
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = detect_format(output or '', options['format'])
+
+        if options['model'] == 'products':
+            fields, records = PRODUCT_FIELDS, export_products(batch_size=options['batch_size'])
+        else:
+            fields, records = CATEGORY_FIELDS, export_categories()
+
+        started = time.perf_counter()
+        if output:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                count = write_records(stream, fmt, fields, records)
+        else:
+            count = write_records(sys.stdout, fmt, fields, records)
+        elapsed = time.perf_counter() - started
+
+        # Report jde na stderr, ať nerozbije export na stdout
+        self.stderr.write(self.style.SUCCESS(
+            f"Exportováno {count} záznamů za {elapsed:.1f} s ({count / elapsed if elapsed else 0:.0f} řádků/s)."
+        ))
@@ -0,0 +1,285 @@
+import random
+import time
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from django.utils.text import slugify
+from store.admin import PRODUCT_TEMPLATES
+from store.builds import rebuild_build_index
+from store.categories import invalidate_category_tree
+from store.facets import rebuild_facet_index
+from store.models import Cart, CartItem, Category, Order, OrderItem, Product
+from store.recommendations import rebuild_recommendations
+from store.rollups import backfill_sales_rollups
+
+# Vygenerovaná data poznáme podle prefixu slugu / uživatelského jména (kvůli --clear)
+PREFIX = 'gen'
+PASSWORD = 'benchmark-heslo'
+
+# Stromy kategorií: kořen -> typ produktu (šablona z adminu) -> značka -> (--depth) řady
+CATEGORY_GROUPS = {
+    'Komponenty': ['CPU', 'GPU', 'Motherboard', 'RAM', 'SSD', 'PSU'],
+    'Počítače': ['PC Gaming'],
+    'Notebooky': ['Laptop'],
+}
+
+TEMPLATE_NAMES = {
+    'CPU': 'Procesory', 'GPU': 'Grafické karty', 'Motherboard': 'Základní desky', 'RAM': 'Paměti RAM',
+    'SSD': 'Disky SSD', 'PSU': 'Zdroje', 'PC Gaming': 'Herní PC', 'Laptop': 'Herní notebooky',
+}
+
+BRANDS = {
+    'CPU': ['Intel', 'AMD'],
+    'GPU': ['ASUS', 'MSI', 'Gigabyte', 'Sapphire'],
+    'Motherboard': ['ASUS', 'MSI', 'Gigabyte', 'ASRock'],
+    'RAM': ['Kingston', 'Corsair', 'G.Skill'],
+    'SSD': ['Samsung', 'Kingston', 'WD'],
+    'PSU': ['Seasonic', 'Corsair', 'be quiet!'],
+    'PC Gaming': ['HAL3000', 'Lenovo', 'MSI'],
+    'Laptop': ['Lenovo', 'ASUS', 'Acer', 'HP'],
+}
+
+PRICE_RANGES = {
+    'CPU': (2500, 18000), 'GPU': (5000, 45000), 'Motherboard': (2000, 12000), 'RAM': (800, 6000),
+    'SSD': (900, 9000), 'PSU': (1200, 5000), 'PC Gaming': (20000, 90000), 'Laptop': (15000, 80000),
+}
+
+# Možné hodnoty klíčů ze šablon - klíč, který tu není, dostane hodnotu přímo ze šablony
+SPEC_VALUES = {
+    'series': ['Core i3', 'Core i5', 'Core i7', 'Core i9', 'Ryzen 5', 'Ryzen 7', 'Ryzen 9'],
+    'cores': [4, 6, 8, 12, 16, 24],
+    'socket': ['LGA1700', 'LGA1851', 'AM4', 'AM5'],
+    'chip': ['RTX 4060', 'RTX 4070', 'RTX 4080', 'RX 7600', 'RX 7800 XT', 'Arc A770'],
+    'vram': ['8GB', '12GB', '16GB', '24GB'],
+    'chipset': ['B650', 'X670', 'B760', 'Z790', 'Z890'],
+    'format': ['ATX', 'mATX', 'Mini-ITX'],
+    'ram_type': ['DDR4', 'DDR5'],
+    'gpu_model': ['RTX 4060', 'RTX 4070', 'RTX 4080', 'RX 7800 XT'],
+    'cpu_family': ['Ryzen 5', 'Ryzen 7', 'Core i5', 'Core i7'],
+    'ram_size': ['16GB', '32GB', '64GB'],
+    'resolution': ['1080p Gaming', '1440p Gaming', '4K Gaming'],
+    'display': ['14"', '15.6"', '16"', '17.3"'],
+    'gpu': ['RTX 4050', 'RTX 4060', 'RTX 4070'],
+    'cpu': ['Core i5', 'Core i7', 'Ryzen 7'],
+    'ram': ['8GB', '16GB', '32GB'],
+    'storage': ['512GB SSD', '1TB SSD', '2TB SSD'],
+    'type': ['DDR4', 'DDR5'],
+    'capacity': ['8GB', '16GB', '32GB', '64GB'],
+    'frequency': ['3200 MHz', '3600 MHz', '5600 MHz', '6000 MHz', '6400 MHz'],
+    'power': ['550W', '650W', '750W', '850W', '1000W'],
+    'certification': ['Bronze', 'Gold', 'Platinum'],
+    'modular': ['Nemodulární', 'Semi-modulární', 'Plně modulární'],
+}
+
+# Klíče se stejným názvem, ale jinými hodnotami podle šablony
+SPEC_VALUES_BY_TEMPLATE = {
+    'SSD': {
+        'type': ['SSD NVMe', 'SSD SATA'],
+        'capacity': ['500GB', '1TB', '2TB', '4TB'],
+        'interface': ['PCIe 3.0', 'PCIe 4.0', 'PCIe 5.0', 'SATA III'],
+    },
+}
+
+SHIPPING_METHODS = ['Osobní odběr', 'Zásilkovna', 'Kurýr PPL']
+PAYMENT_METHODS = ['Card', 'Transfer']
+CITIES = [('Praha', '11000'), ('Brno', '60200'), ('Ostrava', '70200'), ('Plzeň', '30100'), ('Olomouc', '77900')]
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Vygeneruje syntetický katalog pro benchmarky: vnořený strom kategorií, N produktů se specifikací "
+        "podle PRODUCT_TEMPLATES, uživatele, košíky a objednávky (rozložené do posledního roku). "
+        f"Vše má prefix '{PREFIX}-' a dá se smazat přes --clear."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--depth', type=int, default=3,
+                            help="Hloubka stromu kategorií (1 = jen kořeny, 3 = kořen/typ/značka, víc = další řady)")
+        parser.add_argument('--branching', type=int, default=2, help="Počet podkategorií na úrovni řad (--depth > 3)")
+        parser.add_argument('--seed', type=int, default=42, help="Stejný seed = stejná data")
+        parser.add_argument('--clear', action='store_true', help="Jen smazat dříve vygenerovaná data")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        if options['clear']:
+            self.clear()
+            self.stdout.write(self.style.SUCCESS(f"Vygenerovaná data smazána za {time.perf_counter() - started:.1f} s."))
+            return
+
+        if Category.objects.filter(slug__startswith=f"{PREFIX}-").exists():
+            raise CommandError("Vygenerovaná data už existují - nejdřív je smaž přes --clear.")
+        if options['depth'] < 1:
+            raise CommandError("--depth musí být alespoň 1.")
+
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            leaves = self.create_categories(options['depth'], options['branching'])
+            product_ids = self.create_products(rng, leaves, options['products'])
+            users = self.create_users(options['users'])
+            carts = self.create_carts(rng, users, product_ids)
+            orders = self.create_orders(rng, users, options['orders'])
+
+        # bulk_create obchází signály - indexy a cache dopočítáme najednou (jako po loaddata)
+        rebuild_facet_index()
+        rebuild_build_index()
+        backfill_sales_rollups()
+        rebuild_recommendations()
+        invalidate_category_tree()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Vygenerováno {len(leaves)} listových kategorií, {len(product_ids)} produktů, {len(users)} uživatelů, "
+            f"{carts} košíků a {orders} objednávek za {time.perf_counter() - started:.1f} s. "
+            f"Heslo uživatelů: {PASSWORD}"
+        ))
+
+    def clear(self):
+        with transaction.atomic():
+            Order.objects.filter(user__username__startswith=f"{PREFIX}-").delete()
+            User.objects.filter(username__startswith=f"{PREFIX}-").delete()
+            Product.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+            Category.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+        rebuild_facet_index()
+        rebuild_build_index()
+        backfill_sales_rollups()
+        rebuild_recommendations()
+        invalidate_category_tree()
+
+    def create_categories(self, depth, branching):
+        """Vrací listy stromu jako (kategorie, šablona, značka) - do nich padnou produkty"""
+        # Přes save(), ne bulk_create - materializovanou cestu (path) počítá Category.save()
+        leaves = []
+        for root_name, templates in CATEGORY_GROUPS.items():
+            root = Category.objects.create(name=root_name, slug=f"{PREFIX}-{slugify(root_name)}")
+            for template in templates:
+                if depth == 1:
+                    leaves += [(root, template, brand) for brand in BRANDS[template]]
+                    continue
+
+                type_category = Category.objects.create(
+                    name=TEMPLATE_NAMES[template], slug=f"{root.slug}-{slugify(template)}", parent=root,
+                )
+                for brand in BRANDS[template]:
+                    if depth == 2:
+                        leaves.append((type_category, template, brand))
+                        continue
+
+                    brand_category = Category.objects.create(
+                        name=f"{TEMPLATE_NAMES[template]} {brand}",
+                        slug=f"{type_category.slug}-{slugify(brand)}", parent=type_category,
+                    )
+                    level = [brand_category]
+                    for _ in range(depth - 3):
+                        level = [
+                            Category.objects.create(
+                                name=f"{parent.name} řada {chr(ord('A') + i)}",
+                                slug=f"{parent.slug}-{chr(ord('a') + i)}", parent=parent,
+                            )
+                            for parent in level for i in range(branching)
+                        ]
+                    leaves += [(category, template, brand) for category in level]
+        return leaves
+
+    def create_products(self, rng, leaves, count):
+        product_ids = []
+        batch = []
+        for i in range(count):
+            category, template, brand = rng.choice(leaves)
+            specification = make_specification(rng, template)
+            headline = " ".join(str(value) for value in list(specification.values())[:2])
+            low, high = PRICE_RANGES[template]
+
+            batch.append(Product(
+                category=category,
+                name=f"{brand} {headline} {rng.randint(100, 999)}",
+                slug=f"{PREFIX}-{i}",
+                description=f"{TEMPLATE_NAMES[template]} {brand}: " + ", ".join(f"{k} {v}" for k, v in specification.items()),
+                price=rng.randrange(low, high, 10) - 1, # Ceny typu 4 999 Kč
+                stock=rng.choice([0, 1, 3, 5, 10, 25, 100]),
+                is_available=rng.random() > 0.05,
+                specification=specification,
+                brand=brand,
+            ))
+            if len(batch) == BATCH_SIZE:
+                product_ids += [product.id for product in Product.objects.bulk_create(batch)]
+                batch = []
+        product_ids += [product.id for product in Product.objects.bulk_create(batch)]
+        return product_ids
+
+    def create_users(self, count):
+        password = make_password(PASSWORD) # Hashování je drahé - stejný hash pro všechny
+        return User.objects.bulk_create([
+            User(username=f"{PREFIX}-user-{i}", email=f"{PREFIX}-user-{i}@example.com", password=password)
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+
+    def create_carts(self, rng, users, product_ids):
+        # Zhruba polovina uživatelů má rozpracovaný košík
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in users if rng.random() < 0.5], batch_size=BATCH_SIZE)
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=product_id, quantity=rng.randint(1, 3))
+            for cart in carts
+            for product_id in rng.sample(product_ids, min(len(product_ids), rng.randint(1, 4)))
+        ], batch_size=BATCH_SIZE)
+        return len(carts)
+
+    def create_orders(self, rng, users, count):
+        if not users:
+            return 0
+        products = list(Product.objects.filter(slug__startswith=f"{PREFIX}-").values_list('id', 'price', 'name', 'slug', 'category_id', 'brand'))
+        if not products:
+            return 0
+
+        created = 0
+        for start in range(0, count, BATCH_SIZE):
+            orders = []
+            order_lines = []
+            for _ in range(min(BATCH_SIZE, count - start)):
+                user = rng.choice(users)
+                city, zip_code = rng.choice(CITIES)
+                lines = [(product, rng.randint(1, 3)) for product in rng.sample(products, min(len(products), rng.randint(1, 5)))]
+                orders.append(Order(
+                    user=user,
+                    full_name=f"Zákazník {user.username}",
+                    email=user.email,
+                    address=f"Testovací {rng.randint(1, 200)}",
+                    city=city,
+                    zip_code=zip_code,
+                    paid=rng.random() < 0.7,
+                    total_amount=sum(product[1] * quantity for product, quantity in lines),
+                    item_count=sum(quantity for _, quantity in lines),
+                    shipping_method=rng.choice(SHIPPING_METHODS),
+                    payment_method=rng.choice(PAYMENT_METHODS),
+                ))
+                order_lines.append(lines)
+
+            orders = Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order, product_id=product_id, product_name=name, product_slug=slug,
+                    product_category_id=category_id, product_brand=brand or '', price=price, quantity=quantity,
+                )
+                for order, lines in zip(orders, order_lines)
+                for (product_id, price, name, slug, category_id, brand), quantity in lines
+            ], batch_size=BATCH_SIZE)
+
+            # created_at je auto_now_add - historii rozložíme do posledního roku až po vložení
+            Order.objects.filter(id__in=[order.id for order in orders]).update(
+                created_at=RawSQL("NOW() - random() * INTERVAL '365 days'", [])
+            )
+            created += len(orders)
+        return created
+
+
+def make_specification(rng, template):
+    # Stejné klíče a typy hodnot jako šablona v adminu (check_specification v importu je pak spokojený)
+    values = dict(SPEC_VALUES, **SPEC_VALUES_BY_TEMPLATE.get(template, {}))
+    return {key: rng.choice(values[key]) if key in values else default for key, default in PRODUCT_TEMPLATES[template].items()}
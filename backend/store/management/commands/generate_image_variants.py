@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from store.categories import invalidate_category_tree
+from store.images import refresh_variants
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = "Vygeneruje zmenšené varianty obrázků (thumb/card/detail, WebP + záloha) pro produkty, které je nemají."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Přegenerovat i produkty, které varianty už mají")
+        parser.add_argument('--batch-size', type=int, default=200, help="Počet produktů načtených z DB najednou")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = failed = 0
+
+        products = Product.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_variants')
+        for product in products.iterator(chunk_size=options['batch_size']):
+            if refresh_variants(product, force=options['force']):
+                changed += 1
+                if not product.image_variants:
+                    failed += 1
+
+        if changed:
+            # Varianty se ukládají přes update() bez signálů - nová verze stromu zneplatní odpovědi v cache
+            invalidate_category_tree()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Varianty obrázků: {changed - failed} produktů hotovo, {failed} se nepodařilo "
+            f"(za {time.perf_counter() - started:.1f} s)."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from store.builds import rebuild_build_index
+from store.response_cache import ALL_PRODUCTS_SCOPE, bump_versions
+
+
+class Command(BaseCommand):
+    help = "Přepočítá od nuly index kompatibility pro konfigurátor PC (BuildPart) ze specifikací produktů."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Počet produktů načtených z DB najednou")
+
+    def handle(self, *args, **options):
+        count = rebuild_build_index(batch_size=options['batch_size'])
+        bump_versions([ALL_PRODUCTS_SCOPE]) # Odpovědi konfigurátoru v cache
+        self.stdout.write(self.style.SUCCESS(f"Index konfigurátoru přepočítán: {count} dílů."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from store.facets import rebuild_facet_index
+
+
+class Command(BaseCommand):
+    help = "Přepočítá od nuly index filtrů (ProductFacet) ze všech dostupných produktů."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Počet produktů načtených z DB najednou")
+
+    def handle(self, *args, **options):
+        count = rebuild_facet_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Index filtrů přepočítán: {count} hodnot."))
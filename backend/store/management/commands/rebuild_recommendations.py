@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from store.recommendations import MIN_SCORE, TOP_K, rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Přepočítá doporučení \"často kupováno společně\" (ProductRecommendation) z historie objednávek. "
+        "Pouštět pravidelně (cron) - nové objednávky se do doporučení dostanou až dalším přepočtem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help="Kolik doporučení uložit na produkt")
+        parser.add_argument('--min-score', type=int, default=MIN_SCORE,
+                            help="Minimální počet společných objednávek, aby pár šel do doporučení")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_recommendations(top_k=options['top_k'], min_score=options['min_score'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Doporučení přepočítána: {count} řádků za {time.perf_counter() - started:.1f} s."
+        ))
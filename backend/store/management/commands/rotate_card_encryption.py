@@ -0,0 +1,79 @@
+import time
+from cryptography.fernet import InvalidToken
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from store.models import SavedCard
+from store.utils import FALLBACK_KEYS, is_current_key, rotate_card
+
+
+class Command(BaseCommand):
+    help = (
+        "Přešifruje uložené karty (SavedCard.encrypted_number) aktuálním ENCRYPTION_KEY. "
+        "Jede po dávkách podle id, každá dávka je vlastní krátká transakce (zamkne jen svoje řádky). "
+        "Dá se kdykoliv přerušit a spustit znovu - karty s aktuálním klíčem se přeskočí, "
+        "nebo pokračovat od vypsaného id přes --start-after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--start-after', type=int, default=0, help="Pokračovat za tímto id (z výpisu průběhu)")
+        parser.add_argument('--sleep', type=float, default=0, help="Pauza mezi dávkami v sekundách (ať rotace nezatěžuje DB)")
+        parser.add_argument('--dry-run', action='store_true', help="Jen spočítat, kolik karet čeká na přešifrování")
+
+    def handle(self, *args, **options):
+        if not FALLBACK_KEYS and not options['dry_run']:
+            raise CommandError("ENCRYPTION_KEY_FALLBACKS je prázdný - není z čeho rotovat (starý klíč patří tam).")
+
+        batch_size = options['batch_size']
+        last_id = options['start_after']
+        total = SavedCard.objects.filter(id__gt=last_id).count()
+        started = time.perf_counter()
+        done = rotated = 0
+        failed = []
+
+        while True:
+            with transaction.atomic():
+                # 1. Zamkneme jen tuhle dávku - zbytek tabulky zůstává volný
+                cards = list(
+                    SavedCard.objects.select_for_update()
+                    .filter(id__gt=last_id).order_by('id')
+                    .only('id', 'encrypted_number')[:batch_size]
+                )
+                if not cards:
+                    break
+
+                # 2. Přešifrujeme jen karty se starým klíčem
+                changed = []
+                for card in cards:
+                    if is_current_key(card.encrypted_number):
+                        continue
+                    try:
+                        card.encrypted_number = rotate_card(card.encrypted_number)
+                    except InvalidToken:
+                        failed.append(card.id) # Nezná ji žádný klíč - necháme být a nahlásíme
+                        continue
+                    changed.append(card)
+
+                if changed and not options['dry_run']:
+                    SavedCard.objects.bulk_update(changed, ['encrypted_number'])
+
+            last_id = cards[-1].id
+            done += len(cards)
+            rotated += len(changed)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{done}/{total} karet ({rotated} přešifrováno, {len(failed)} chyb), "
+                f"poslední id {last_id}, {done / elapsed if elapsed else 0:.0f} karet/s"
+            )
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if failed:
+            self.stderr.write(self.style.WARNING(
+                f"Tyto karty nejde rozšifrovat žádným klíčem (id): {', '.join(map(str, failed[:100]))}"
+                + (" ..." if len(failed) > 100 else "")
+            ))
+
+        prefix = "[dry-run] Čeká na přešifrování" if options['dry_run'] else "Přešifrováno"
+        self.stdout.write(self.style.SUCCESS(f"{prefix}: {rotated} z {done} karet."))
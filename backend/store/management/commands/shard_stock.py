@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from store.inventory import DEFAULT_SHARDS, shard_stock, unshard_stock
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Rozdělí sklad hot produktu (výprodej) do několika slotů (StockShard), aby souběžné nákupy "
+        "nečekaly na zámek jednoho řádku. Product.stock pak průběžně dopočítává consolidate_stock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('products', nargs='+', help="Slug nebo id produktu")
+        parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS, help="Počet slotů")
+        parser.add_argument('--disable', action='store_true', help="Vrátit sklad zpět do Product.stock")
+
+    def handle(self, *args, **options):
+        if options['shards'] < 1:
+            raise CommandError("--shards musí být aspoň 1.")
+
+        for key in options['products']:
+            lookup = {'pk': int(key)} if key.isdigit() else {'slug': key}
+            product = Product.objects.filter(**lookup).only('id', 'name').first()
+            if product is None:
+                raise CommandError(f"Produkt {key} neexistuje.")
+
+            if options['disable']:
+                total = unshard_stock(product.id)
+                self.stdout.write(self.style.SUCCESS(f"{product.name}: sklad {total} ks vrácen do produktu."))
+            else:
+                total = shard_stock(product.id, options['shards'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{product.name}: sklad {total} ks rozdělen do {options['shards']} slotů."
+                ))
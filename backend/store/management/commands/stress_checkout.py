@@ -0,0 +1,94 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from store.models import Order, Product
+from store.serializers import OrderSerializer
+
+ORDER_DATA = {
+    'full_name': 'Zátěžový Test',
+    'email': 'stress@example.com',
+    'address': 'Testovací 1',
+    'city': 'Praha',
+    'zip_code': '11000',
+    'total_amount': 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Zátěžový test pokladny: mnoho vláken najednou kupuje jeden produkt s omezeným skladem. "
+        "Ověří, že se nepřeprodá, a že počet SQL dotazů na objednávku nezávisí na počtu položek. "
+        "Vytvořené produkty a objednávky na konci smaže."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50, help="Počáteční sklad testovacího produktu")
+        parser.add_argument('--orders', type=int, default=200, help="Počet pokusů o nákup (po 1 kusu)")
+        parser.add_argument('--threads', type=int, default=20)
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        products = []
+        order_ids = []
+
+        try:
+            hot = self.create_product(run_id, 'hot', options['stock'])
+            products.append(hot)
+
+            # 1. Souběžné nákupy jednoho produktu
+            def buy(_):
+                try:
+                    return self.place_order([(hot, 1)])
+                finally:
+                    connections.close_all() # Každé vlákno má vlastní spojení do DB
+
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                results = list(executor.map(buy, range(options['orders'])))
+
+            order_ids += [order_id for order_id in results if order_id]
+            sold = len(order_ids)
+            hot.refresh_from_db()
+
+            self.stdout.write(
+                f"Pokusů: {options['orders']}, prodáno: {sold}, zbývá skladem: {hot.stock} "
+                f"(počáteční sklad {options['stock']})"
+            )
+            if hot.stock < 0 or sold > options['stock'] or hot.stock != options['stock'] - sold:
+                raise CommandError("Přeprodáno! Sklad nesedí s počtem objednávek.")
+
+            # 2. Počet dotazů na objednávku s 1 a s 20 položkami
+            counts = {}
+            for lines in (1, 20):
+                line_products = [self.create_product(run_id, f"q{lines}-{i}", 10) for i in range(lines)]
+                products += line_products
+                with CaptureQueriesContext(connection) as queries:
+                    order_ids.append(self.place_order([(product, 1) for product in line_products]))
+                counts[lines] = len(queries)
+                self.stdout.write(f"Objednávka s {lines} položkami: {counts[lines]} SQL dotazů")
+
+            if counts[1] != counts[20]:
+                raise CommandError("Počet dotazů roste s počtem položek.")
+
+            self.stdout.write(self.style.SUCCESS("OK - žádné přeprodání, konstantní počet dotazů."))
+        finally:
+            Order.objects.filter(id__in=[order_id for order_id in order_ids if order_id]).delete()
+            Product.objects.filter(id__in=[product.id for product in products]).delete()
+
+    def create_product(self, run_id, name, stock):
+        return Product.objects.create(
+            name=f"Stress {run_id} {name}", slug=f"stress-{run_id}-{name}", price=100, stock=stock,
+        )
+
+    def place_order(self, lines):
+        data = dict(ORDER_DATA, items=[
+            {'product': product.id, 'quantity': quantity, 'price': product.price} for product, quantity in lines
+        ])
+        serializer = OrderSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return serializer.save().id
+        except serializers.ValidationError:
+            return None
@@ -0,0 +1,107 @@
+import threading
+from bisect import bisect_left
+from django.conf import settings
+
+# Hranice histogramu latence v sekundách (jako u Promethea, poslední koš je +Inf)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Kolikrát se stejný SQL (bez parametrů) musí v jednom requestu zopakovat, aby to byl podezřelý N+1
+DUPLICATE_QUERY_THRESHOLD = getattr(settings, 'STORE_METRICS_DUPLICATE_THRESHOLD', 3)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.query_time = 0.0
+        self.max_queries = 0
+        self.duplicate_requests = 0 # Počet requestů, kde se nějaký dotaz opakoval (N+1)
+        self.last_duplicate_sql = None
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "latency_ms_avg": round(self.latency_sum / self.requests * 1000, 2) if self.requests else 0,
+            "latency_buckets": {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets)},
+                "+Inf": self.latency_buckets[-1],
+            },
+            "queries_total": self.queries,
+            "queries_avg": round(self.queries / self.requests, 2) if self.requests else 0,
+            "queries_max": self.max_queries,
+            "sql_time_ms": round(self.query_time * 1000, 2),
+            "duplicate_query_requests": self.duplicate_requests,
+            "last_duplicate_sql": self.last_duplicate_sql,
+        }
+
+
+class MetricsRegistry:
+    """Statistiky podle názvu URL - drží je každý proces (worker) zvlášť, v paměti"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, duration, queries, query_time, duplicate_sql=None):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.latency_sum += duration
+            stats.latency_buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.queries += queries
+            stats.query_time += query_time
+            stats.max_queries = max(stats.max_queries, queries)
+            if duplicate_sql:
+                stats.duplicate_requests += 1
+                stats.last_duplicate_sql = duplicate_sql
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def prometheus(self):
+        """Export v textovém formátu Promethea (text/plain; version=0.0.4)"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def metric(name, kind, help_text, rows):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(rows)
+
+            metric("store_http_requests_total", "counter", "Počet requestů podle endpointu.", [
+                f'store_http_requests_total{{endpoint="{name}"}} {stats.requests}' for name, stats in endpoints
+            ])
+
+            histogram = []
+            for name, stats in endpoints:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    cumulative += count
+                    histogram.append(f'store_http_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+                histogram.append(f'store_http_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {stats.requests}')
+                histogram.append(f'store_http_request_duration_seconds_sum{{endpoint="{name}"}} {stats.latency_sum:.6f}')
+                histogram.append(f'store_http_request_duration_seconds_count{{endpoint="{name}"}} {stats.requests}')
+            metric("store_http_request_duration_seconds", "histogram", "Latence requestů.", histogram)
+
+            metric("store_db_queries_total", "counter", "Počet SQL dotazů.", [
+                f'store_db_queries_total{{endpoint="{name}"}} {stats.queries}' for name, stats in endpoints
+            ])
+            metric("store_db_query_duration_seconds_total", "counter", "Čas strávený v SQL.", [
+                f'store_db_query_duration_seconds_total{{endpoint="{name}"}} {stats.query_time:.6f}' for name, stats in endpoints
+            ])
+            metric("store_duplicate_query_requests_total", "counter", "Requesty s opakovaným (N+1) dotazem.", [
+                f'store_duplicate_query_requests_total{{endpoint="{name}"}} {stats.duplicate_requests}' for name, stats in endpoints
+            ])
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
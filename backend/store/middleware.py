@@ -0,0 +1,85 @@
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from .metrics import registry, DUPLICATE_QUERY_THRESHOLD
+
+
+class QueryCounter:
+    """execute_wrapper pro DB spojení - počítá dotazy a čas v SQL (funguje i s DEBUG=False)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1 # SQL bez parametrů - stejný dotaz v cyklu = N+1
+
+    def duplicate_sql(self):
+        if not self.statements:
+            return None
+        sql, count = self.statements.most_common(1)[0]
+        return sql if count >= DUPLICATE_QUERY_THRESHOLD else None
+
+
+class QueryMetricsMiddleware:
+    """
+    Volitelný middleware (zapíná se STORE_METRICS=1 v .env) - pro každý pojmenovaný endpoint
+    zaznamená počet requestů, latenci, počet a čas SQL dotazů a opakované dotazy.
+    Data vidí zaměstnanci na /api/manager/metrics/ (a /prometheus/).
+    """
+
+    sync_capable = True
+    async_capable = True # Pod ASGI nepřepíná async views zpátky do vlákna
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        counter = QueryCounter()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        self.record(request, counter, started)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+
+        # Spojení jsou vázaná na kontext requestu, async ORM je používá ve vlákně se stejným kontextem
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = await self.get_response(request)
+
+        self.record(request, counter, started)
+        return response
+
+    def record(self, request, counter, started):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            registry.record(
+                match.view_name,
+                time.perf_counter() - started,
+                counter.count,
+                counter.duration,
+                counter.duplicate_sql(),
+            )
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_alter_product_options_product_brand_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=255)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='store.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'key', 'value'), name='unique_product_facet')],
+            },
+        ),
+    ]
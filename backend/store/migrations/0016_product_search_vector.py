@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations, models
+
+# PostgreSQL neobsahuje český stemmer, proto stavíme na 'simple' + unaccent:
+# "grafická karta" najde i "graficka karta" a naopak.
+CREATE_SEARCH_CONFIG = """
+CREATE TEXT SEARCH CONFIGURATION czech_unaccent (COPY = simple);
+ALTER TEXT SEARCH CONFIGURATION czech_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+"""
+
+DROP_SEARCH_CONFIG = "DROP TEXT SEARCH CONFIGURATION IF EXISTS czech_unaccent;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_product_created_id_idx'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_SEARCH_CONFIG, DROP_SEARCH_CONFIG),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', config='czech_unaccent', weight='A'), '||', django.contrib.postgres.search.SearchVector('brand', config='czech_unaccent', weight='A'), django.contrib.postgres.search.SearchConfig('czech_unaccent')), '||', django.contrib.postgres.search.SearchVector('description', config='czech_unaccent', weight='B'), django.contrib.postgres.search.SearchConfig('czech_unaccent')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+    ]
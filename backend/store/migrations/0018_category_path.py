@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+def fill_category_paths(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build(category_id):
+        if category_id not in paths:
+            parent_id = parents.get(category_id)
+            paths[category_id] = (build(parent_id) if parent_id else '') + f"{category_id}/"
+        return paths[category_id]
+
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.path = build(category.id)
+    Category.objects.bulk_update(categories, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_product_spec_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_category_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_order_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('brand', models.CharField(blank=True, default='', max_length=50)),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('units', models.IntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('paid_revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('paid_units', models.IntegerField(default=0)),
+                ('paid_order_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'category', 'brand'), name='unique_sales_rollup', nulls_distinct=False)],
+            },
+        ),
+    ]
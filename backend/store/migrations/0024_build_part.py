@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0023_product_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuildPart',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='build_part', serialize=False, to='store.product')),
+                ('slot', models.CharField(max_length=20)),
+                ('socket', models.CharField(blank=True, default='', max_length=50)),
+                ('ram_type', models.CharField(blank=True, default='', max_length=20)),
+                ('power_draw', models.PositiveIntegerField(default=0)),
+                ('psu_watts', models.PositiveIntegerField(default=0)),
+                ('price', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('is_available', models.BooleanField(default=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_available', True)), fields=['slot', 'price'], name='build_part_slot_idx'), models.Index(condition=models.Q(('is_available', True)), fields=['slot', 'socket', 'price'], name='build_part_socket_idx'), models.Index(condition=models.Q(('is_available', True)), fields=['slot', 'ram_type', 'price'], name='build_part_ram_type_idx')],
+            },
+        ),
+    ]
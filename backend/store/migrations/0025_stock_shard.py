@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0024_build_part'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sharded_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='store.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'slot'), name='unique_stock_shard'), models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='stock_shard_not_negative')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Jedním UPDATE ... FROM pro celou tabulku (položek objednávek jsou miliony, RunPython by je tahal do Pythonu)
+FILL_SNAPSHOTS = (
+    "UPDATE store_orderitem SET product_name = p.name, product_slug = p.slug "
+    "FROM store_product p WHERE p.id = store_orderitem.product_id"
+)
+FILL_ITEM_COUNTS = (
+    "UPDATE store_order SET item_count = items.units "
+    "FROM (SELECT order_id, SUM(quantity) AS units FROM store_orderitem GROUP BY order_id) items "
+    "WHERE items.order_id = store_order.id"
+)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0026_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_slug',
+            field=models.SlugField(blank=True, db_index=False, default=''),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.product'),
+        ),
+        migrations.RunSQL(FILL_SNAPSHOTS, migrations.RunSQL.noop),
+        migrations.RunSQL(FILL_ITEM_COUNTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Stejně jako 0027 - jedním UPDATE ... FROM, položky bez produktu (smazaného) zůstanou bez kategorie
+FILL_SNAPSHOTS = (
+    "UPDATE store_orderitem SET product_category_id = p.category_id, product_brand = COALESCE(p.brand, '') "
+    "FROM store_product p WHERE p.id = store_orderitem.product_id"
+)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0027_order_item_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_category',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.category'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_brand',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.RunSQL(FILL_SNAPSHOTS, migrations.RunSQL.noop),
+    ]
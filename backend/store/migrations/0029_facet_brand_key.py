@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:10
+
+from django.db import migrations
+
+# Výrobce je v indexu filtrů pod ":brand" (store/facets.py). Řádky "brand" mohly obsahovat i klíč "brand"
+# ze specifikace - výrobce proto spočítáme znovu z produktů. Klíče specifikace s oddělovačem ?specs= se už neindexují.
+# Hodnoty klíče "brand" ze specifikace vrátí do indexu: python manage.py rebuild_facets
+MOVE_BRAND_FACETS = [
+    "DELETE FROM store_productfacet WHERE key = 'brand' OR key LIKE '%:%' OR key LIKE '%~%'",
+    "INSERT INTO store_productfacet (category_id, key, value, product_count) "
+    "SELECT category_id, ':brand', brand, COUNT(*) FROM store_product "
+    "WHERE is_available AND category_id IS NOT NULL AND brand <> '' "
+    "GROUP BY category_id, brand",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0028_order_item_category_brand'),
+    ]
+
+    operations = [
+        # Zpět jen přes rebuild_facets (staré řádky "brand" se z nových nedají oddělit)
+        migrations.RunSQL(MOVE_BRAND_FACETS, migrations.RunSQL.noop),
+    ]
@@ -1,18 +1,74 @@
 from django.db import models
+from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat, Substr, Upper
 from django.contrib.auth.models import User
 from .utils import encrypt_card
 
+# Textová konfigurace pro fulltext (simple + unaccent), vytváří ji migrace 0016
+SEARCH_CONFIG = 'czech_unaccent'
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True) # "pc-komponenty" (pro hezké URL)
 
     parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
 
+    # Materializovaná cesta z id předků, např. "1/5/12/" - celý podstrom = path__startswith="1/5/"
+    path = models.CharField(max_length=255, blank=True, default='', editable=False)
+
     def __str__(self):
         return self.name
     
     class Meta:
         verbose_name_plural = "Categories"
+        indexes = [
+            # varchar_pattern_ops, aby LIKE 'prefix%' šlo přes index i v české locale
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def build_path(self):
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+        return f"{parent_path}{self.pk}/"
+
+    def creates_cycle(self):
+        """Je rodič tahle kategorie nebo některý její potomek? (jeho cesta obsahuje naše id)"""
+        if not self.pk or not self.parent_id:
+            return False
+        if self.parent_id == self.pk:
+            return True
+        parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+        return str(self.pk) in parent_path.split('/')
+
+    def clean(self):
+        super().clean()
+        if self.creates_cycle():
+            raise ValidationError({'parent': "Kategorie nemůže být pod sebou ani pod svým potomkem."})
+
+    def save(self, *args, **kwargs):
+        # Cyklus by z cest udělal nesmysl a strom kategorií by se nedal načíst
+        if self.creates_cycle():
+            raise ValidationError({'parent': "Kategorie nemůže být pod sebou ani pod svým potomkem."})
+        super().save(*args, **kwargs)
+
+        # Cestu známe až po prvním uložení (potřebujeme id)
+        new_path = self.build_path()
+        if new_path == self.path:
+            return
+
+        old_path = self.path
+        Category.objects.filter(pk=self.pk).update(path=new_path)
+        self.path = new_path
+
+        # Přesun pod jiného rodiče - přepíšeme prefix i všem potomkům (jedním UPDATE)
+        if old_path:
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1))
+            )
 
 class Product(models.Model):
     # on_delete=models.SET_NULL znamená: když smažeš kategorii, produkt zůstane (bez kategorie)
@@ -22,19 +78,121 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=0)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Zmenšené varianty obrázku (WebP + záloha) - generuje store/images.py při uložení, viz ProductSerializer.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     stock = models.IntegerField(default=1)
+    # Sklad rozdělený do slotů StockShard (hot produkty při výprodeji) - stock je pak jen pro zobrazení,
+    # dopočítává ho consolidate_stock. Zapíná/vypíná: python manage.py shard_stock, viz store/inventory.py
+    sharded_stock = models.BooleanField(default=False, editable=False)
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     specification = models.JSONField(default=dict, null=True) # Pro uložení technických detailů jako JSON
     brand = models.CharField(max_length=50, blank=True, null=True) # Značka produktu (např. "ASUS", "Intel")
+
+    # Fulltext (tsvector) - počítá ho sama DB při každém INSERT/UPDATE, viz store/search.py
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('brand', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     
     class Meta:
         ordering = ('-created_at',) # Nejnovější produkty nahoře
+        indexes = [
+            # Index pro stránkování kurzorem (ProductCursorPagination řadí podle created_at + id)
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            # Filtr ?specs=socket:AM5 -> specification @> '{"socket": "AM5"}'
+            GinIndex(fields=['specification'], opclasses=['jsonb_path_ops'], name='product_spec_path_idx'),
+            # Explicitní hledání podřetězce ?specs=chip~4060 (viz store/spec_filters.py)
+            GinIndex(
+                OpClass(Upper(Cast('specification', models.TextField())), name='gin_trgm_ops'),
+                name='product_spec_trgm_idx',
+            ),
+            # Filtr značky v adminu (IndexedValuesFieldListFilter)
+            models.Index(fields=['brand'], name='product_brand_idx'),
+        ]
 
     def __str__(self):
         return self.name
     
+# Předpočítaný index filtrů (facet) - kolik dostupných produktů v kategorii má danou hodnotu parametru
+# Udržuje se průběžně přes signály (store/signals.py), celý se dá přepočítat: python manage.py rebuild_facets
+class ProductFacet(models.Model):
+    category = models.ForeignKey(Category, related_name='facets', on_delete=models.CASCADE)
+    key = models.CharField(max_length=100) # Klíč ze specification (např. "socket"), nebo ":brand" (výrobce)
+    value = models.CharField(max_length=255) # Hodnota převedená na string (např. "AM5")
+    product_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'key', 'value'], name='unique_product_facet'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} | {self.key}: {self.value} ({self.product_count})"
+
+# Jeden slot rozděleného skladu - nákupy si berou z náhodného slotu a navzájem se neblokují (store/inventory.py)
+class StockShard(models.Model):
+    product = models.ForeignKey(Product, related_name='stock_shards', on_delete=models.CASCADE, db_index=False) # Index je v constraintu níže
+    slot = models.PositiveSmallIntegerField()
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'slot'], name='unique_stock_shard'),
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name='stock_shard_not_negative'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} #{self.slot}: {self.quantity}"
+
+# Předpočítané "často kupováno společně" - top K sousedů každého produktu (store/recommendations.py)
+# Počítá se dávkově z historie objednávek: python manage.py rebuild_recommendations (např. z cronu)
+class ProductRecommendation(models.Model):
+    product = models.ForeignKey(Product, related_name='recommendations', on_delete=models.CASCADE, db_index=False) # Index je v constraintu níže
+    recommended = models.ForeignKey(Product, related_name='recommended_for', on_delete=models.CASCADE)
+    score = models.PositiveIntegerField() # V kolika objednávkách byly oba produkty spolu
+    rank = models.PositiveSmallIntegerField() # 1 = nejčastěji kupovaný spolu
+
+    class Meta:
+        constraints = [
+            # Zároveň index pro čtení: WHERE product_id = ... ORDER BY rank
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_product_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank}, {self.score}x)"
+
+# Index kompatibility pro konfigurátor PC (store/builds.py) - parametry ze specification převedené na sloupce.
+# Udržuje se přes signály při uložení produktu, celý se dá přepočítat: python manage.py rebuild_build_index
+class BuildPart(models.Model):
+    product = models.OneToOneField(Product, primary_key=True, related_name='build_part', on_delete=models.CASCADE)
+    slot = models.CharField(max_length=20) # cpu, motherboard, ram, gpu, ssd, psu
+    socket = models.CharField(max_length=50, blank=True, default='') # CPU a deska, velkými písmeny ("AM5")
+    ram_type = models.CharField(max_length=20, blank=True, default='') # RAM a deska ("DDR5")
+    power_draw = models.PositiveIntegerField(default=0) # Odhad odběru ve W (CPU, GPU)
+    psu_watts = models.PositiveIntegerField(default=0) # Výkon zdroje ve W
+
+    # Kopie z produktu, aby výběr kandidátů (WHERE ... ORDER BY price LIMIT) šel celý přes index
+    price = models.DecimalField(max_digits=10, decimal_places=0)
+    is_available = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['slot', 'price'], name='build_part_slot_idx', condition=models.Q(is_available=True)),
+            models.Index(fields=['slot', 'socket', 'price'], name='build_part_socket_idx', condition=models.Q(is_available=True)),
+            models.Index(fields=['slot', 'ram_type', 'price'], name='build_part_ram_type_idx', condition=models.Q(is_available=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.slot}: {self.product_id}"
+
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     full_name = models.CharField(max_length=100)
@@ -45,22 +203,75 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     paid = models.BooleanField(default=False)
     total_amount = models.DecimalField(max_digits=10, decimal_places=0, default=0)
+    # Počet kusů - přehled objednávek (OrderSummarySerializer) pak nemusí číst položky
+    item_count = models.PositiveIntegerField(default=0, editable=False)
 
     shipping_method = models.CharField(max_length=50, default="Standard") 
     payment_method = models.CharField(max_length=50, default="Card")      
 
+    class Meta:
+        indexes = [
+            # Manažerský přehled a export (OrderCursorPagination, filtr podle data)
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # Admin: filtr dopravy (IndexedValuesFieldListFilter) a hledání podřetězce (icontains -> UPPER(...) LIKE)
+            models.Index(fields=['shipping_method'], name='order_shipping_idx'),
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='order_full_name_trgm_idx'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='order_email_trgm_idx'),
+        ]
+
     def __str__(self):
         return f"Objednávka {self.id} - {self.full_name}"
     
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # Smazáním produktu historie objednávek nezmizí - název a slug jsou uložené z doby nákupu
+    product = models.ForeignKey(Product, null=True, blank=True, on_delete=models.SET_NULL)
+    product_name = models.CharField(max_length=200, blank=True, default='')
+    product_slug = models.SlugField(max_length=50, blank=True, default='', db_index=False)
+    # Kategorie a značka z doby nákupu - podle nich se sčítají statistiky tržeb (SalesRollup)
+    product_category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    product_brand = models.CharField(max_length=50, blank=True, default='')
     price = models.DecimalField(max_digits=10, decimal_places=0)
     quantity = models.IntegerField(default=1)
 
     def __str__(self):
         return f"{self.id}"
+
+    def snapshot(self, product):
+        """Uloží si údaje produktu z doby nákupu (pozdější přejmenování, přesun ani smazání je nezmění)"""
+        self.product_name = product.name
+        self.product_slug = product.slug
+        self.product_category_id = product.category_id
+        self.product_brand = product.brand or ''
+        return self
     
+# Předpočítané tržby po dnech / kategoriích / značkách (store/rollups.py)
+# Přičítá se při vytvoření a zaplacení objednávky, odečítá při smazání, z historie: python manage.py backfill_sales_rollups
+class SalesRollup(models.Model):
+    day = models.DateField()
+    # Bez FK constraintu - po smazání kategorie historie tržeb zůstane (jen s id)
+    category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    brand = models.CharField(max_length=50, blank=True, default='')
+
+    # Všechny vytvořené objednávky
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    units = models.IntegerField(default=0)
+    order_count = models.IntegerField(default=0)
+
+    # Z toho zaplacené
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    paid_units = models.IntegerField(default=0)
+    paid_order_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # nulls_distinct=False: řádek "bez kategorie" je pro daný den a značku taky jen jeden
+            models.UniqueConstraint(fields=['day', 'category', 'brand'], name='unique_sales_rollup', nulls_distinct=False),
+        ]
+
+    def __str__(self):
+        return f"{self.day} | {self.category_id} | {self.brand}: {self.revenue}"
+
 class SavedCard(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_cards')
     # Tady bude uložená ta "rozsypaná" šifra, ne číslo
@@ -104,5 +315,11 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # Jeden produkt = jeden řádek košíku (potřebujeme pro upsert v store/cart.py)
+            models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product'),
+        ]
+
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
\ No newline at end of file
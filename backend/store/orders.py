@@ -0,0 +1,55 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Order, OrderItem
+
+# Hodnoty ?paid=, které bereme jako ano/ne
+TRUE_VALUES = {'1', 'true', 'yes', 'ano'}
+FALSE_VALUES = {'0', 'false', 'no', 'ne'}
+
+
+def orders_with_items():
+    """Objednávky i s položkami - 1 dotaz navíc celkem, ne na každou objednávku (název produktu je v položce)"""
+    return Order.objects.prefetch_related(Prefetch('items', queryset=OrderItem.objects.order_by('id')))
+
+
+def parse_date_param(value):
+    try:
+        return parse_date(value or '')
+    except ValueError: # Např. 2026-02-31
+        return None
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(queryset, params):
+    """
+    Filtry pro manažerský přehled i export objednávek:
+    ?date_from=2026-01-01&date_to=2026-01-31&paid=true&shipping_method=PPL&payment_method=Card
+    """
+    # Datum převedeme na rozsah časů (created_at__date by nešlo přes index)
+    date_from = parse_date_param(params.get('date_from'))
+    date_to = parse_date_param(params.get('date_to'))
+    if date_from:
+        queryset = queryset.filter(created_at__gte=_start_of_day(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=_start_of_day(date_to + timedelta(days=1)))
+
+    paid = (params.get('paid') or '').lower()
+    if paid in TRUE_VALUES:
+        queryset = queryset.filter(paid=True)
+    elif paid in FALSE_VALUES:
+        queryset = queryset.filter(paid=False)
+
+    shipping_method = params.get('shipping_method')
+    if shipping_method:
+        queryset = queryset.filter(shipping_method=shipping_method)
+
+    payment_method = params.get('payment_method')
+    if payment_method:
+        queryset = queryset.filter(payment_method=payment_method)
+
+    return queryset
@@ -0,0 +1,158 @@
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+# Oddělovač hodnoty řazení a id v pozici kurzoru ("2026-01-31 12:00:00+00:00|1234")
+POSITION_SEPARATOR = '|'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Kurzor s pozicí (hodnota prvního sloupce řazení, id) - řazení musí končit id ve stejném směru.
+    DRF si pamatuje jen první sloupec a stejné hodnoty (stejné created_at, stejný search_rank
+    u hledání) dořeší přes offset - stránka "předchozí" pak vracela jiné produkty než cestou tam.
+    S id je pozice jednoznačná, offset je vždy 0 a podmínka je
+      created_at <= X AND (created_at < X OR id < Y)
+    (první část jde přes index, zbytek se dofiltruje jen na hranici).
+    """
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = super()._get_position_from_instance(instance, ordering)
+        return f"{value}{POSITION_SEPARATOR}{instance.pk}"
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is not None:
+            value, separator, pk = cursor.position.rpartition(POSITION_SEPARATOR)
+            if not separator or not pk.isdigit():
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def start_page(self, request, queryset, view):
+        """Načte parametry stránky, vrátí queryset stránky (+1 záznam navíc) a údaje z kurzoru"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip('-')
+            value, _, pk = current_position.rpartition(POSITION_SEPARATOR)
+            # Směr: (kurzor zpátky) XOR (řazení sestupně)
+            lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f"{order_attr}__{lookup}e": value}),
+                Q(**{f"{order_attr}__{lookup}": value}) | Q(**{f"pk__{lookup}": pk}),
+            )
+
+        # Jeden záznam navíc -> víme, jestli existuje další stránka
+        return queryset[offset:offset + self.page_size + 1], offset, reverse, current_position
+
+    def finish_page(self, results, offset, reverse, current_position):
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset, *state = self.start_page(request, queryset, view)
+        return self.finish_page(list(page_queryset), *state)
+
+
+class ProductCursorPagination(KeysetCursorPagination):
+    """
+    Stránkování produktů přes kurzor (keyset) místo OFFSET.
+    Každá stránka je jen "WHERE created_at <= X AND (...) ORDER BY ... LIMIT N",
+    takže 1000. stránka stojí stejně jako první.
+    """
+    # Stejné řazení jako Product.Meta.ordering + id, aby bylo pořadí jednoznačné
+    ordering = ('-created_at', '-id')
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100 # Strop, aby si nikdo nestáhl celou tabulku jedním requestem
+
+    def get_ordering(self, request, queryset, view):
+        # Při hledání (ProductSearchFilter přidá search_rank) řadíme podle relevance
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', '-id')
+        return self.ordering
+
+
+class AsyncProductCursorPagination(ProductCursorPagination):
+    """
+    Stejné stránkování (i formát kurzoru) pro async views - jen stránka se načte přes async ORM.
+    request musí být DRF Request (kvůli query_params).
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset, *state = self.start_page(request, queryset, view)
+        return self.finish_page([obj async for obj in page_queryset], *state)
+
+
+class OrderCursorPagination(KeysetCursorPagination):
+    """Manažerský přehled objednávek - nejnovější nahoře, stránkování kurzorem"""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def estimated_row_count(model):
+    """Odhad počtu řádků tabulky ze statistik PostgreSQL (pg_class.reltuples) - bez čtení tabulky"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row else -1 # -1 = tabulka ještě nebyla analyzovaná
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Stránkování admina nad tabulkami s miliony řádků (ModelAdmin.paginator).
+    Přesný COUNT(*) přes celou tabulku trvá sekundy, proto:
+      1. bez filtru a hledání bereme odhad ze statistik (po pár stránkách se to neliší)
+      2. s filtrem počítáme nejvýš max_exact_count řádků - další stránky admin nenabídne, je potřeba zúžit filtr
+    """
+    max_exact_count = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate >= self.max_exact_count:
+                return estimate
+        return queryset.order_by()[:self.max_exact_count].count()
@@ -1,4 +1,7 @@
 from rest_framework import permissions
+from .tokens import role_claims
+
+EMPLOYEE_GROUP = 'Employee'
 
 class IsEmployee(permissions.BasePermission):
     """
@@ -11,4 +14,20 @@ class IsEmployee(permissions.BasePermission):
             return False
         
         # 2. Musí být Admin NEBO ve skupině Employee
-        return request.user.is_staff or request.user.groups.filter(name='Employee').exists()
\ No newline at end of file
+        return request.user.is_staff or request.user.groups.filter(name=EMPLOYEE_GROUP).exists()
+
+class IsEmployeeClaim(IsEmployee):
+    """
+    Totéž co IsEmployee, ale věří rolím v JWT (store/tokens.py) - bez dotazu do DB.
+    Když token role nemá nebo jsou zastaralé (změnily se skupiny), ověří se postaru v DB.
+    """
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        claims = role_claims(request.auth, request.user.id)
+        if claims is None:
+            return super().has_permission(request, view)
+
+        is_staff, roles = claims
+        return is_staff or EMPLOYEE_GROUP in roles
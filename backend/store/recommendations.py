@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import connection, transaction
+from .models import OrderItem, Product, ProductRecommendation
+from .response_cache import RECOMMENDATIONS_SCOPE, bump_versions
+
+# Kolik doporučení držíme na produkt a od kolika společných objednávek je pár zajímavý
+TOP_K = getattr(settings, 'STORE_RECOMMENDATIONS_TOP_K', 10)
+MIN_SCORE = getattr(settings, 'STORE_RECOMMENDATIONS_MIN_SCORE', 1)
+
+
+def rebuild_recommendations(top_k=TOP_K, min_score=MIN_SCORE):
+    """
+    Přepočítá tabulku ProductRecommendation z celé historie objednávek.
+    Řídká matice společných nákupů = self-join položek přes order_id, GROUP BY dvojice produktů;
+    počítá ji DB a do tabulky jde rovnou jen top K sousedů každého produktu (jeden INSERT ... SELECT).
+    """
+    table = ProductRecommendation._meta.db_table
+    items = OrderItem._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (product_id, recommended_id, score, rank) "
+        f"SELECT product_id, recommended_id, score, rank FROM ("
+        f"  SELECT a.product_id, b.product_id AS recommended_id, COUNT(DISTINCT a.order_id) AS score,"
+        f"    ROW_NUMBER() OVER ("
+        f"      PARTITION BY a.product_id ORDER BY COUNT(DISTINCT a.order_id) DESC, b.product_id"
+        f"    ) AS rank"
+        f"  FROM {items} a JOIN {items} b ON b.order_id = a.order_id AND b.product_id <> a.product_id"
+        f"  GROUP BY a.product_id, b.product_id"
+        f"  HAVING COUNT(DISTINCT a.order_id) >= %s"
+        f") pairs WHERE rank <= %s"
+    )
+
+    # Čtenáři do konce transakce vidí stará doporučení, nikdy prázdnou tabulku
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [min_score, top_k])
+            count = cursor.rowcount
+
+    bump_versions([RECOMMENDATIONS_SCOPE])
+    return count
+
+
+def recommended_products(slug):
+    """Doporučení k produktu - jeden dotaz přes index (product_id, rank), historie objednávek se nečte"""
+    return (
+        Product.objects.filter(recommended_for__product__slug=slug, is_available=True)
+        .order_by('recommended_for__rank')
+    )
@@ -0,0 +1,163 @@
+import hashlib
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+from .categories import category_tree_version
+
+# Jak dlouho necháme odpověď v cache (platnost hlídají verze, timeout jen omezuje paměť)
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'STORE_RESPONSE_CACHE_TIMEOUT', 60 * 60)
+
+VERSION_KEY_PREFIX = 'store:version:'
+RESPONSE_KEY_PREFIX = 'store:response:'
+
+# Scope pro "celý katalog" (např. výpis produktů bez filtru kategorie)
+ALL_PRODUCTS_SCOPE = 'category:all'
+
+# Scope pro doporučení "často kupováno společně" - posouvá ho přepočet (store/recommendations.py)
+RECOMMENDATIONS_SCOPE = 'recommendations'
+
+
+def category_scope(category_id):
+    return f"category:{category_id}"
+
+
+def request_category_scope(category_id):
+    """
+    Scope výpisu podle ?category= z URL. Hodnota se převede na int jako v CategoryTree.get -
+    "05" nebo "5 " by jinak dostaly scope, který žádná změna produktu neposune.
+    Bez kategorie (nebo s nesmyslnou) výpis závisí na celém katalogu.
+    """
+    try:
+        return category_scope(int(category_id))
+    except (TypeError, ValueError):
+        return ALL_PRODUCTS_SCOPE
+
+
+def product_scope(slug):
+    return f"product:{slug}"
+
+
+def product_scopes(slug, category_path):
+    """Scopy, které změna produktu zneplatní: produkt, jeho kategorie + všichni předci, celý katalog"""
+    scopes = [product_scope(slug), ALL_PRODUCTS_SCOPE]
+    scopes += [category_scope(category_id) for category_id in (category_path or '').split('/') if category_id]
+    return scopes
+
+
+def versions_shared():
+    """Vidí verze všechny procesy? V LocMemCache má každý worker vlastní, posun v jednom ostatní nezneplatní"""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def get_versions(scopes):
+    keys = [VERSION_KEY_PREFIX + scope for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scopes):
+    """Zneplatní všechny uložené odpovědi, které na daných scopech závisí"""
+    cache.set_many({VERSION_KEY_PREFIX + scope: uuid.uuid4().hex for scope in set(scopes)}, None)
+
+
+def _response_cache_key(view, request, versions):
+    # Celá URL včetně schématu a hostu - kurzorové odkazy next/previous v odpovědi jsou absolutní
+    raw = '|'.join([type(view).__name__, request.build_absolute_uri(), *versions])
+    return RESPONSE_KEY_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix('W/') for value in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+class CachedResponseMixin:
+    """
+    Cache odpovědí pro anonymní návštěvníky (data katalogu jsou pro všechny stejná).
+
+    Klíč = view + celá URL s parametry + verze scopů (cache_scopes) + verze stromu kategorií.
+    Signály při změně Product/Category verze posunou, takže staré záznamy se už nikdy nepřečtou.
+    Z klíče je zároveň ETag - na If-None-Match odpovíme 304 bez sahání do DB i do cache s daty.
+    """
+
+    def cache_scopes(self, request, *args, **kwargs):
+        return []
+
+    def get_response_cache_key(self, request, *args, **kwargs):
+        versions = [category_tree_version()] + get_versions(self.cache_scopes(request, *args, **kwargs))
+        return _response_cache_key(self, request, versions)
+
+    def get(self, request, *args, **kwargs):
+        if request.user and request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request, *args, **kwargs)
+        etag = f'"{key.removeprefix(RESPONSE_KEY_PREFIX)}"'
+
+        if _etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache' # Prohlížeč/Next.js smí cachovat, ale vždy přes revalidaci
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class AsyncCachedResponseMixin:
+    """
+    Totéž co CachedResponseMixin pro async views (store/async_views.py) - stejné klíče a verze.
+    V cache je rovnou hotový JSON (bajty), view implementuje respond().
+    Async views nepřihlašují uživatele (katalog je pro všechny stejný), takže se cachuje vždy.
+    """
+
+    def cache_scopes(self, request, *args, **kwargs):
+        return []
+
+    async def respond(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def cached_body(self, request, *args, **kwargs):
+        versions = [category_tree_version()] + get_versions(self.cache_scopes(request, *args, **kwargs))
+        key = _response_cache_key(self, request, versions)
+        return key, cache.get(key)
+
+    async def get(self, request, *args, **kwargs):
+        # Verze i data jedním skokem do vlákna - async API cache (aget, aget_many) by jich udělalo ~6
+        key, body = await sync_to_async(self.cached_body)(request, *args, **kwargs)
+        etag = f'"{key.removeprefix(RESPONSE_KEY_PREFIX)}"'
+
+        if _etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        elif body is not None:
+            response = HttpResponse(body, content_type='application/json')
+        else:
+            response = await self.respond(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await cache.aset(key, response.content, RESPONSE_CACHE_TIMEOUT)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,115 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from .models import OrderItem, SalesRollup
+
+# Pořadí sloupců s čísly v tabulce SalesRollup
+PLACED_COLUMNS = ('revenue', 'units', 'order_count')
+PAID_COLUMNS = ('paid_revenue', 'paid_units', 'paid_order_count')
+
+
+def aggregate_items(items):
+    """
+    Položky objednávek sečtené po (den, kategorie, značka) - počítá to DB jedním GROUP BY.
+    Kategorie a značka jsou z doby nákupu (OrderItem.snapshot), ne aktuální z produktu - jinak by
+    se přičtení a pozdější odečtení téže objednávky po přesunu produktu trefily do jiných řádků.
+    """
+    return (
+        items.annotate(
+            day=TruncDate('order__created_at'), # Den v TIME_ZONE (Europe/Prague)
+            category_key=F('product_category_id'),
+            brand_key=F('product_brand'),
+        )
+        .values('day', 'category_key', 'brand_key')
+        .annotate(
+            revenue_sum=Sum(F('price') * F('quantity')),
+            units_sum=Sum('quantity'),
+            orders_sum=Count('order_id', distinct=True),
+        )
+        .order_by()
+    )
+
+
+def _upsert(rows, columns, sign=1):
+    """
+    Přičte (sign=1) nebo odečte (sign=-1) čísla do rollupu jedním dotazem:
+    INSERT ... ON CONFLICT ON CONSTRAINT unique_sales_rollup DO UPDATE SET x = x + EXCLUDED.x
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    table = SalesRollup._meta.db_table
+    all_columns = PLACED_COLUMNS + PAID_COLUMNS
+    params = []
+    for row in rows:
+        measures = dict.fromkeys(all_columns, 0)
+        measures.update(zip(columns, (
+            sign * row['revenue_sum'], sign * row['units_sum'], sign * row['orders_sum'],
+        )))
+        params += [row['day'], row['category_key'], row['brand_key']] + [measures[column] for column in all_columns]
+
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * (3 + len(all_columns))) + ')'] * len(rows))
+    updates = ', '.join(f"{column} = {table}.{column} + EXCLUDED.{column}" for column in columns)
+    sql = (
+        f"INSERT INTO {table} (day, category_id, brand, {', '.join(all_columns)}) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT ON CONSTRAINT unique_sales_rollup DO UPDATE SET {updates}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _record_order(order, sign):
+    # Položky sečteme hned (při mazání už po COMMITu nebudou), do rollupu až po COMMITu -
+    # řádek rollupu (den, kategorie, značka) sdílí všechny nákupy stejného produktu a jeho zámek
+    # by je jinak seřadil za sebe. Vytvoření i smazání v jedné transakci se tak přesně vyruší.
+    rows = list(aggregate_items(OrderItem.objects.filter(order=order)))
+    paid = order.paid
+
+    def apply():
+        _upsert(rows, PLACED_COLUMNS, sign)
+        if paid:
+            _upsert(rows, PAID_COLUMNS, sign)
+
+    transaction.on_commit(apply)
+
+
+def record_order_placed(order):
+    """Volá se po vytvoření objednávky i s položkami, uvnitř její transakce (OrderSerializer.create)"""
+    _record_order(order, 1)
+
+
+def record_order_deleted(order):
+    """Volá se před smazáním objednávky (pre_delete, viz store/signals.py), dokud má v DB položky"""
+    _record_order(order, -1)
+
+
+def record_orders_paid(order_ids, paid=True):
+    """Objednávky změnily stav zaplacení - přesuneme je mezi zaplacené (nebo zpět)"""
+    if not order_ids:
+        return
+    _upsert(aggregate_items(OrderItem.objects.filter(order_id__in=order_ids)), PAID_COLUMNS, 1 if paid else -1)
+
+
+def backfill_sales_rollups(batch_size=2000):
+    """Smaže rollupy a spočítá je znovu z celé historie objednávek"""
+    placed = aggregate_items(OrderItem.objects.all())
+    paid = aggregate_items(OrderItem.objects.filter(order__paid=True))
+
+    with transaction.atomic():
+        SalesRollup.objects.all().delete()
+        rows = {}
+        for row in placed.iterator(chunk_size=batch_size):
+            rows[(row['day'], row['category_key'], row['brand_key'])] = SalesRollup(
+                day=row['day'], category_id=row['category_key'], brand=row['brand_key'],
+                revenue=row['revenue_sum'], units=row['units_sum'], order_count=row['orders_sum'],
+            )
+        for row in paid.iterator(chunk_size=batch_size):
+            rollup = rows[(row['day'], row['category_key'], row['brand_key'])]
+            rollup.paid_revenue = row['revenue_sum']
+            rollup.paid_units = row['units_sum']
+            rollup.paid_order_count = row['orders_sum']
+        SalesRollup.objects.bulk_create(rows.values(), batch_size=batch_size)
+
+    return len(rows)
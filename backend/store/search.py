@@ -0,0 +1,45 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework import filters
+from .models import SEARCH_CONFIG
+
+# Jen "slova" (písmena vč. diakritiky a číslice) - zbytek by rozbil syntaxi tsquery
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_query(term):
+    """
+    Z textu od uživatele udělá tsquery, kde každé slovo je prefix:
+    "rtx 406" -> 'rtx:* & 406:*' (chová se podobně jako dřívější icontains)
+    """
+    tokens = TOKEN_RE.findall(term or '')
+    if not tokens:
+        return None
+    raw = ' & '.join(f"{token}:*" for token in tokens)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_products(queryset, term):
+    """Fulltext filtr + anotace search_rank (bez hledaného výrazu vrátí queryset beze změny)"""
+    query = build_search_query(term)
+    if query is None:
+        return queryset
+
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+
+
+class ProductSearchFilter(filters.BaseFilterBackend):
+    """
+    Náhrada za DRF SearchFilter (icontains = sekvenční scan přes description).
+    Hledá přes Product.search_vector (GIN index) a přidá anotaci search_rank,
+    podle které pak řadí ProductCursorPagination. ts_rank vrací real, přetypujeme
+    na double, aby se hodnota v kurzoru přesně vrátila zpět (jinak se stránky opakují).
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_products(queryset, request.query_params.get(self.search_param))
@@ -1,18 +1,31 @@
 import re
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from .models import Product, Order, OrderItem, SavedCard, SavedCard, Category, Cart, CartItem, UserProfile
 from django.contrib.auth.models import User # <--- Import modelu uživatele
+from .inventory import reserve_stock, OutOfStock
+from .rollups import record_order_placed
+from .images import variant_urls, variant_srcset
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'parent_id']
 
+# Zmenšené varianty obrázku: {"variants": {"thumb": {"webp": url, "fallback": url, "width", "height"}, ...},
+# "srcset": {"webp": "url 160w, url 480w, ...", "fallback": "..."}} - prázdné, dokud varianty nejsou
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        urls = variant_urls(value)
+        return {'variants': urls, 'srcset': variant_srcset(urls)}
+
 class ProductSerializer(serializers.ModelSerializer):
+    images = ImageVariantsField(source='image_variants')
+
     class Meta:
         model = Product
-        fields = ['id', 'category', 'name', 'slug', 'description', 'price', 'stock', 'image', 'is_available'] # Pošle všechny sloupce (název, cena, obrázek...)
+        fields = ['id', 'category', 'name', 'slug', 'description', 'price', 'stock', 'image', 'images', 'is_available'] # Pošle všechny sloupce (název, cena, obrázek...)
 
 # Nový Serializer pro registraci
 class UserSerializer(serializers.ModelSerializer):
@@ -101,45 +114,84 @@ class UserProfileSerializer(serializers.ModelSerializer):
         # 3. Zbytek (adresu atd.) uložíme normálně do Profilu
         return super().update(instance, validated_data)
 
+class PrefetchedProductField(serializers.PrimaryKeyRelatedField):
+    # Produkty načte dopředu OrderItemListSerializer (jedním dotazem), tady se jen sáhne do mapy
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None:
+            try:
+                return self.prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass # Neexistující/nesmyslné id -> standardní chybová hláška z rodiče
+        return super().to_internal_value(data)
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # Místo jednoho SELECTu na každou položku načteme všechny produkty objednávky najednou
+        ids = []
+        for item in data if isinstance(data, list) else []:
+            try:
+                ids.append(int(item.get('product')))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        self.child.fields['product'].prefetched = Product.objects.in_bulk(ids)
+        return super().to_internal_value(data)
+
 class OrderItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.ReadOnlyField(source='product.name')
+    product = PrefetchedProductField(queryset=Product.objects.all())
 
     class Meta:
         model = OrderItem
-        fields = ['product', 'product_name', 'quantity', 'price']
+        # Název a slug se ukládají při nákupu (OrderSerializer.create) - výpis nesahá do Product
+        fields = ['product', 'product_name', 'product_slug', 'quantity', 'price']
+        read_only_fields = ['product_name', 'product_slug']
+        list_serializer_class = OrderItemListSerializer
+        extra_kwargs = {'quantity': {'min_value': 1}} # Záporné množství by sklad naopak navýšilo
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True) # Objednávka obsahuje seznam položek
 
     class Meta:
         model = Order
-        fields = ['id', 'full_name', 'email', 'address', 'city', 'zip_code', 'total_amount','shipping_method', 'payment_method', 'items', 'created_at', 'paid']
+        fields = ['id', 'full_name', 'email', 'address', 'city', 'zip_code', 'total_amount','shipping_method', 'payment_method', 'items', 'item_count', 'created_at', 'paid']
 
     def create(self, validated_data):
         # Vytáhneme položky z dat
         items_data = validated_data.pop('items')
         
-        # 1. Vytvoříme samotnou objednávku
-        order = Order.objects.create(**validated_data)
-
-        # 2. Vytvoříme položky a odečteme ze skladu
-        for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
-            
-            # Kontrola skladu (backend validation)
-            if product.stock < quantity:
-                raise serializers.ValidationError(f"Produkt {product.name} není skladem v požadovaném množství.")
-            
-            # Odečtení ze skladu
-            product.stock -= quantity
-            product.save()
-
-            # Vytvoření položky
-            OrderItem.objects.create(order=order, **item_data)
+        # Celá objednávka je jedna transakce - když nevyjde jediná položka, nevznikne nic
+        with transaction.atomic():
+            # 1. Vytvoříme samotnou objednávku
+            order = Order.objects.create(**validated_data, item_count=sum(item_data['quantity'] for item_data in items_data))
+
+            # 2. Odečteme ze skladu (podmíněný UPDATE, nejde přeprodat ani při souběžných nákupech)
+            #    Hot produkty s rozděleným skladem berou z náhodného slotu (StockShard)
+            try:
+                reserve_stock(
+                    ((item_data['product'].id, item_data['quantity']) for item_data in items_data),
+                    sharded_ids={item_data['product'].id for item_data in items_data if item_data['product'].sharded_stock},
+                )
+            except OutOfStock as e:
+                raise serializers.ValidationError(f"Produkt {e.product_name} není skladem v požadovaném množství.")
+
+            # 3. Vytvoříme všechny položky jedním INSERTem (s údaji produktu z doby nákupu)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, **item_data).snapshot(item_data['product'])
+                for item_data in items_data
+            ])
+
+            # 4. Statistiky tržeb (SalesRollup) - přičtou se až po COMMITu, viz store/rollups.py
+            record_order_placed(order)
 
         return order
     
+# Přehled objednávek zákazníka - jen sloupce z tabulky Order, položky až v detailu
+class OrderSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = ['id', 'created_at', 'total_amount', 'item_count', 'paid']
+
 class SavedCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = SavedCard
@@ -151,16 +203,31 @@ class CartItemSerializer(serializers.ModelSerializer):
     name = serializers.ReadOnlyField(source='product.name')
     price = serializers.DecimalField(source='product.price', max_digits=10, decimal_places=0, read_only=True)
     image = serializers.ImageField(source='product.image', read_only=True)
+    images = ImageVariantsField(source='product.image_variants')
     slug = serializers.SlugField(source='product.slug', read_only=True)
     stock = serializers.IntegerField(source='product.stock', read_only=True)
 
     class Meta:
         model = CartItem
-        fields = ['id', 'product_id', 'name', 'price', 'quantity', 'image', 'slug', 'stock', ]
+        fields = ['id', 'product_id', 'name', 'price', 'quantity', 'image', 'images', 'slug', 'stock', ]
         
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Cart
-        fields = ['id', 'items']
\ No newline at end of file
+        fields = ['id', 'items']
+
+# Hromadná změna košíku (CartBatchView)
+class CartChangeSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(default=1)
+    mode = serializers.ChoiceField(choices=['set', 'add'], default='add')
+
+    def validate(self, data):
+        if data['mode'] == 'set' and data['quantity'] < 0:
+            raise serializers.ValidationError("Množství nemůže být záporné.")
+        return data
+
+class CartBatchSerializer(serializers.Serializer):
+    items = CartChangeSerializer(many=True, allow_empty=False, max_length=200) # Strop, ať jeden request nezahltí DB
@@ -0,0 +1,174 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Product, Category, Order
+from .facets import FACET_FIELDS, facet_entries, product_facet_entries, apply_facet_change
+from .categories import invalidate_category_tree, get_category_tree
+from .response_cache import product_scopes, bump_versions
+from .rollups import record_orders_paid, record_order_deleted
+from .images import refresh_variants, delete_variants
+from .builds import BUILD_FIELDS, refresh_build_part
+from .tokens import bump_roles
+from .authentication import user_cache
+
+
+# --- INDEX FILTRŮ (ProductFacet) ---
+
+def _touches_facets(update_fields):
+    # save(update_fields=['stock']) apod. index neovlivní, nemusíme nic počítat
+    if update_fields is None:
+        return True
+    fields = {name if name != 'category' else 'category_id' for name in update_fields}
+    return bool(fields & set(FACET_FIELDS))
+
+@receiver(pre_save, sender=Product)
+def remember_old_facets(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Před uložením si zapamatujeme, jak produkt vypadal v DB
+    instance._old_facet_entries = []
+    if raw or not instance.pk or not _touches_facets(update_fields):
+        return
+
+    old = Product.objects.filter(pk=instance.pk).values_list(*FACET_FIELDS).first()
+    if old:
+        instance._old_facet_entries = facet_entries(*old)
+
+@receiver(post_save, sender=Product)
+def update_facets_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Při loaddata (raw) index nepočítáme - po importu stačí spustit rebuild_facets
+    if raw or not _touches_facets(update_fields):
+        return
+    apply_facet_change(getattr(instance, '_old_facet_entries', []), product_facet_entries(instance))
+
+@receiver(post_delete, sender=Product)
+def update_facets_on_delete(sender, instance, **kwargs):
+    apply_facet_change(product_facet_entries(instance), [])
+
+
+# --- INDEX KONFIGURÁTORU PC (store/builds.py) ---
+
+@receiver(post_save, sender=Product)
+def update_build_part_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Při loaddata se nepočítá - po importu: python manage.py rebuild_build_index. Smazání řeší CASCADE.
+    if raw or (update_fields is not None and not set(update_fields) & set(BUILD_FIELDS)):
+        return
+    refresh_build_part(instance)
+
+
+# --- VARIANTY OBRÁZKŮ (store/images.py) ---
+# Až po COMMITu: Pillow nekóduje obrázky se zamčeným řádkem produktu a po rollbacku nezůstanou
+# v DB cesty ke smazaným souborům. Registrované před cache, aby se verze posunuly až s hotovými variantami.
+
+@receiver(post_save, sender=Product)
+def refresh_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Při loaddata se obrázky nesahá - existující katalog: python manage.py generate_image_variants
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    transaction.on_commit(lambda: refresh_variants(instance), robust=True)
+
+@receiver(post_delete, sender=Product)
+def delete_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants
+    transaction.on_commit(lambda: delete_variants(variants), robust=True)
+
+
+# --- CACHE ODPOVĚDÍ KATALOGU (store/response_cache.py) ---
+
+def _category_path(category_id):
+    category = get_category_tree().get(category_id) if category_id else None
+    return category.path if category else ''
+
+@receiver(pre_save, sender=Product)
+def remember_old_cache_scopes(sender, instance, raw=False, **kwargs):
+    # Produkt mohl změnit slug nebo kategorii - zneplatnit musíme i ty původní
+    instance._old_cache_scopes = []
+    if raw or not instance.pk:
+        return
+
+    old = Product.objects.filter(pk=instance.pk).values_list('slug', 'category__path').first()
+    if old:
+        instance._old_cache_scopes = product_scopes(*old)
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_cache_versions(sender, instance, raw=False, **kwargs):
+    if raw:
+        # loaddata - kategorie ještě nemusí být v DB, zneplatníme radši celý katalog
+        invalidate_category_tree()
+        return
+
+    scopes = getattr(instance, '_old_cache_scopes', []) + product_scopes(instance.slug, _category_path(instance.category_id))
+    # Až po COMMITu - request, který mezitím přečte starý řádek, by ho jinak uložil pod novou verzi
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+# --- STROM KATEGORIÍ (cache v paměti) ---
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_on_change(sender, **kwargs):
+    # Platí i pro loaddata (raw) - nový strom si při načtení sám dopočítá cesty.
+    # Verze stromu je součástí klíče každé odpovědi katalogu, takže se zneplatní i ty.
+    invalidate_category_tree()
+
+
+# --- STATISTIKY TRŽEB (SalesRollup) ---
+
+@receiver(pre_save, sender=Order)
+def remember_old_paid(sender, instance, raw=False, **kwargs):
+    instance._old_paid = None
+    if not raw and instance.pk:
+        instance._old_paid = Order.objects.filter(pk=instance.pk).values_list('paid', flat=True).first()
+
+@receiver(post_save, sender=Order)
+def update_rollups_on_paid_change(sender, instance, created, raw=False, **kwargs):
+    # Nové objednávky řeší OrderSerializer.create (položky tu ještě nejsou)
+    old_paid = getattr(instance, '_old_paid', None)
+    if raw or created or old_paid is None or old_paid == instance.paid:
+        return
+    record_orders_paid([instance.pk], paid=instance.paid)
+
+@receiver(pre_delete, sender=Order)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # Smazání v adminu i úklid benchmarků - položky jsou v DB jen do pre_delete (pak je smaže CASCADE)
+    record_order_deleted(instance)
+
+
+# --- ROLE V JWT (store/tokens.py) ---
+
+@receiver(post_save, sender=User)
+def bump_roles_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Změna is_staff, is_active, hesla... - přihlášení (last_login) role nemění.
+    # Nová verze zneplatní i uživatele v user_cache (store/authentication.py) ve všech procesech.
+    if raw or created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    user_cache.invalidate(instance.pk)
+    bump_roles([instance.pk])
+
+@receiver(post_delete, sender=User)
+def bump_roles_on_user_delete(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+    bump_roles([instance.pk])
+
+@receiver(m2m_changed, sender=User.groups.through)
+def bump_roles_on_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # group.user_set.clear() - v post_clear už nevíme, koho se to týkalo
+        instance._cleared_user_ids = list(instance.user_set.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        bump_roles([instance.pk]) # user.groups.add(...) / remove / clear
+    elif action == 'post_clear':
+        bump_roles(getattr(instance, '_cleared_user_ids', []))
+    else:
+        bump_roles(pk_set or []) # group.user_set.add(...) / remove
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def bump_roles_on_group_change(sender, instance, raw=False, created=False, **kwargs):
+    # Přejmenování nebo smazání skupiny mění role všem členům (mazání nespouští m2m_changed)
+    if raw or created:
+        return
+    bump_roles(instance.user_set.values_list('id', flat=True))
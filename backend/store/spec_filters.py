@@ -0,0 +1,82 @@
+import json
+import math
+from django.db.models import Q, TextField
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Upper
+
+# Formát parametru ?specs= (čárkami oddělené podmínky):
+#   socket:AM5      -> přesná shoda, jsonb containment  specification @> '{"socket": "AM5"}'
+#   cores:8         -> číslo, hledáme 8 i "8"          (oba dotazy umí GIN index), stejně 3.5, -5, True
+#   chip~4060       -> podřetězec (explicitně!), jde přes trigram index nad textem specifikace
+EXACT_SEPARATOR = ':'
+SUBSTRING_SEPARATOR = '~'
+
+# Hodnoty v indexu filtrů jsou str(value) z Pythonu (store/facets.py) - True/False/None nejsou JSON
+PYTHON_LITERALS = {'True': True, 'False': False, 'None': None}
+
+# Výraz, nad kterým je trigram index (migrace 0017) - musí sedět 1:1 s tím, co filtrujeme
+SPEC_TEXT_EXPRESSION = Upper(Cast('specification', TextField()))
+
+
+def parse_spec_filters(specs_param):
+    """Rozparsuje ?specs= na seznam (key, operator, value). Nesmyslné části přeskočí."""
+    parsed = []
+    for part in (specs_param or '').split(','):
+        exact_at = part.find(EXACT_SEPARATOR)
+        substring_at = part.find(SUBSTRING_SEPARATOR)
+        # Rozhoduje oddělovač, který je v textu dřív (hodnota sama může obsahovat ':' i '~')
+        positions = [(pos, op) for pos, op in ((exact_at, EXACT_SEPARATOR), (substring_at, SUBSTRING_SEPARATOR)) if pos > 0]
+        if not positions:
+            continue
+
+        pos, operator = min(positions)
+        key, value = part[:pos].strip(), part[pos + 1:].strip()
+        if key and value:
+            parsed.append((key, operator, value))
+    return parsed
+
+
+def spec_value_forms(value):
+    """Podoby hodnoty z URL, které může mít ve specifikaci: vždy text, k tomu číslo / bool / null ("8" -> "8", 8)"""
+    if value in PYTHON_LITERALS:
+        return [value, PYTHON_LITERALS[value]]
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return [value]
+    # Text v uvozovkách, seznam a objekt nejsou hodnoty z indexu filtrů. NaN/Infinity jsonb nezná.
+    if isinstance(parsed, (str, list, dict)) or (isinstance(parsed, float) and not math.isfinite(parsed)):
+        return [value]
+    return [value, parsed]
+
+
+def exact_spec_q(key, value):
+    # Frontend posílá všechno jako text ("8"), v DB může být číslo 8
+    q = Q()
+    for form in spec_value_forms(value):
+        q |= Q(specification__contains={key: form})
+    return q
+
+
+def apply_spec_filters(queryset, specs_param):
+    """Přidá do querysetu podmínky na specification tak, aby je obsloužily indexy"""
+    substring_filters = []
+
+    for key, operator, value in parse_spec_filters(specs_param):
+        if operator == EXACT_SEPARATOR:
+            queryset = queryset.filter(exact_spec_q(key, value))
+        else:
+            substring_filters.append((key, value))
+
+    if substring_filters:
+        queryset = queryset.alias(spec_text=SPEC_TEXT_EXPRESSION)
+        for i, (key, value) in enumerate(substring_filters):
+            # 1. Předvýběr přes trigram index (hodnota se vyskytuje "někde" ve specifikaci)
+            # 2. Přesná kontrola, že je to opravdu hodnota daného klíče (už jen nad kandidáty)
+            #    KeyTextTransform = specification ->> 'key', klíč jde do SQL jako parametr
+            alias = f"spec_value_{i}"
+            queryset = queryset.alias(**{alias: KeyTextTransform(key, 'specification')}).filter(
+                spec_text__contains=value.upper(), **{f"{alias}__icontains": value}
+            )
+
+    return queryset
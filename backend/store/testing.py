@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries, using='default'):
+    """
+    V testu ohlídá, že blok kódu nepoloží víc než max_queries SQL dotazů:
+
+        with query_budget(5):
+            client.get('/api/cart/')
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    if len(context) > max_queries:
+        statements = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1))
+        raise QueryBudgetExceeded(
+            f"Překročen rozpočet dotazů: {len(context)} > {max_queries}\n{statements}"
+        )
+
+
+def assert_endpoint_query_budget(client, method, url, max_queries, **kwargs):
+    """Zavolá endpoint přes testovacího klienta a selže, když překročí rozpočet. Vrací response."""
+    with query_budget(max_queries):
+        response = getattr(client, method.lower())(url, **kwargs)
+    return response
+
@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock
+from cryptography.fernet import Fernet, MultiFernet
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from .admin import PRODUCT_TEMPLATES
+from .authentication import CachedJWTAuthentication, user_cache
+from .builds import check_build, rebuild_build_index
+from .cart import MODE_ADD, MODE_SET, UnknownProducts, apply_cart_changes, get_cart
+from .catalog import price_histogram
+from .catalog_io import ProductImporter, read_records
+from .checks import check_shared_cache
+from .exports import ORDER_CSV_HEADER, order_csv_rows
+from .facets import facet_entries
+from .images import IMAGE_VARIANTS, variant_storage
+from .inventory import claim_sharded_stock, consolidate_stock, shard_stock
+from .categories import _load_categories, get_category_tree
+from .models import BuildPart, CartItem, Category, Order, OrderItem, Product, ProductFacet, ProductRecommendation, SalesRollup, SavedCard, StockShard
+from .orders import orders_with_items
+from .pagination import EstimatedCountPaginator, ProductCursorPagination
+from .recommendations import rebuild_recommendations
+from .search import build_search_query
+from .serializers import OrderSerializer
+from .spec_filters import apply_spec_filters, parse_spec_filters
+from .testing import QueryBudgetExceeded, assert_endpoint_query_budget, query_budget
+from .tokens import add_role_claims, role_claims
+from .utils import decrypt_card, is_current_key
 
-# Create your tests here.
+ORDER_DATA = {
+    'full_name': 'Test Testovací',
+    'email': 'test@example.com',
+    'address': 'Testovací 1',
+    'city': 'Praha',
+    'zip_code': '11000',
+    'total_amount': 0,
+}
+
+
+def create_product(name, stock, **fields):
+    fields.setdefault('slug', name.lower().replace(' ', '-'))
+    fields.setdefault('price', 100)
+    return Product.objects.create(name=name, stock=stock, **fields)
+
+
+def order_serializer(lines):
+    """Zvalidovaný OrderSerializer jako z pokladny - lines = [(produkt, kusy), ...]"""
+    serializer = OrderSerializer(data=dict(ORDER_DATA, items=[
+        {'product': product.id, 'quantity': quantity, 'price': product.price} for product, quantity in lines
+    ]))
+    serializer.is_valid(raise_exception=True)
+    return serializer
+
+
+def place_order(lines):
+    """Vrátí vytvořenou objednávku, nebo None, když zboží není skladem"""
+    try:
+        return order_serializer(lines).save()
+    except serializers.ValidationError:
+        return None
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def in_other_connection(function):
+    """Zavolá function v samostatném vlákně (vlastní spojení do DB, necommitnutá data nevidí) a vrátí výsledek"""
+    result = []
+
+    def worker():
+        try:
+            result.append(function())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+# --- POKLADNA (OrderSerializer.create, store/inventory.py) ---
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """Souběžné nákupy - skutečné transakce v samostatných vláknech, proto TransactionTestCase"""
+
+    THREADS = 16
+
+    def run_concurrently(self, lines_for_thread):
+        orders = []
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+        lock = threading.Lock()
+
+        def worker(index):
+            try:
+                barrier.wait() # Všechna vlákna začnou nakupovat najednou
+                order = place_order(lines_for_thread(index))
+                with lock:
+                    orders.append(order)
+            except Exception as e: # Chyba ve vlákně by se jinak ztratila
+                with lock:
+                    errors.append(e)
+            finally:
+                connections.close_all() # Každé vlákno má vlastní spojení do DB
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        return [order for order in orders if order is not None]
+
+    def test_no_oversell(self):
+        product = create_product('Hot produkt', stock=5)
+
+        orders = self.run_concurrently(lambda index: [(product, 1)])
+
+        product.refresh_from_db()
+        self.assertEqual(len(orders), 5)
+        self.assertEqual(product.stock, 0)
+
+    def test_multi_line_orders_are_all_or_nothing(self):
+        first = create_product('Prvni produkt', stock=4)
+        second = create_product('Druhy produkt', stock=3)
+
+        # Polovina vláken má položky v opačném pořadí - zámky se přesto berou ve stejném (bez deadlocku)
+        orders = self.run_concurrently(
+            lambda index: [(first, 1), (second, 1)] if index % 2 else [(second, 1), (first, 1)]
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(len(orders), 3)
+        self.assertEqual((first.stock, second.stock), (1, 0))
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(OrderItem.objects.count(), 6)
+
+
+class CheckoutQueryBudgetTests(TestCase):
+    # Objednávka, kontrola a podmíněný UPDATE skladu, položky (jeden INSERT), součty pro statistiky + savepoint
+    CHECKOUT_QUERIES = 7
+
+    def test_query_count_does_not_grow_with_lines(self):
+        products = [create_product(f"Produkt {i}", stock=10) for i in range(20)]
+        one_line = order_serializer([(products[0], 1)])
+        twenty_lines = order_serializer([(product, 1) for product in products])
+        get_category_tree() # Strom kategorií (scopy cache) se načítá jen jednou za proces
+
+        with query_budget(self.CHECKOUT_QUERIES) as one_line_queries:
+            one_line.save()
+        with query_budget(self.CHECKOUT_QUERIES) as twenty_lines_queries:
+            twenty_lines.save()
+
+        self.assertEqual(len(one_line_queries), len(twenty_lines_queries))
+
+    def test_out_of_stock_creates_nothing(self):
+        in_stock = create_product('Skladem', stock=5)
+        sold_out = create_product('Vyprodano', stock=0)
+
+        self.assertIsNone(place_order([(in_stock, 1), (sold_out, 1)]))
+
+        in_stock.refresh_from_db()
+        self.assertEqual(in_stock.stock, 5)
+        self.assertFalse(Order.objects.exists())
+
+
+
+
+class ShardedStockTests(TransactionTestCase):
+    """Rozdělený sklad (StockShard) - zámky slotů drží jiné spojení, proto TransactionTestCase"""
+
+    def setUp(self):
+        self.product = create_product('Hot produkt', stock=20)
+        shard_stock(self.product.id, shards=4) # 4 sloty po 5 kusech
+
+    def slots(self):
+        return list(StockShard.objects.filter(product=self.product).order_by('slot').values_list('quantity', flat=True))
+
+    def claim_while_locked(self, slots, quantity):
+        """claim_sharded_stock, zatímco jiná transakce drží zámky na slotech slots. Čekání na zámek = chyba."""
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_locks():
+            with transaction.atomic():
+                list(StockShard.objects.select_for_update().filter(product=self.product, slot__in=slots))
+                locked.set()
+                release.wait(10)
+            return True
+
+        thread = threading.Thread(target=in_other_connection, args=(hold_locks,))
+        thread.start()
+        try:
+            locked.wait(10)
+            with transaction.atomic():
+                with connections['default'].cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '1s'")
+                return claim_sharded_stock(self.product.id, quantity)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_locked_slots_are_skipped(self):
+        self.assertTrue(self.claim_while_locked([0, 1, 2], 2))
+        self.assertEqual(self.slots(), [5, 5, 5, 3])
+
+    def test_quantity_is_combined_from_slots(self):
+        with transaction.atomic():
+            self.assertTrue(claim_sharded_stock(self.product.id, 12)) # Žádný slot sám nestačí
+            self.assertFalse(claim_sharded_stock(self.product.id, 9))
+            self.assertIsNone(claim_sharded_stock(create_product('Bezny', stock=5).id, 1))
+        self.assertEqual(sum(self.slots()), 8)
+
+    def test_checkout_does_not_oversell(self):
+        self.product.refresh_from_db()
+        orders = [place_order([(self.product, 3)]) for _ in range(8)]
+
+        self.assertEqual(len([order for order in orders if order]), 6)
+        self.assertEqual(sum(self.slots()), 2)
+        self.assertEqual(consolidate_stock(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+# --- HISTORIE OBJEDNÁVEK (OrderItem.snapshot, /api/my-orders/) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('zakaznik', password='heslo')
+        self.product = create_product('Procesor', stock=10, brand='AMD')
+
+    def order_for(self, user, lines):
+        order = place_order(lines)
+        Order.objects.filter(pk=order.pk).update(user=user)
+        return order
+
+    def get(self, url, user=None):
+        return self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user or self.user)}")
+
+    def test_checkout_stores_product_snapshot(self):
+        order = place_order([(self.product, 2), (create_product('Chladic', stock=10), 1)])
+
+        self.assertEqual(order.item_count, 3)
+        self.assertEqual(
+            list(order.items.order_by('id').values_list('product_name', 'product_slug', 'product_brand')),
+            [('Procesor', 'procesor', 'AMD'), ('Chladic', 'chladic', '')],
+        )
+
+    def test_deleted_product_keeps_order_history(self):
+        order = self.order_for(self.user, [(self.product, 1)])
+
+        self.product.delete()
+
+        item = self.get(f"/api/my-orders/{order.id}/").json()['items'][0]
+        self.assertEqual((item['product'], item['product_name'], item['product_slug']), (None, 'Procesor', 'procesor'))
+
+    def test_order_list_is_paginated_summary(self):
+        orders = [self.order_for(self.user, [(self.product, 1)]) for _ in range(3)]
+        self.order_for(User.objects.create_user('cizi'), [(self.product, 1)])
+
+        first = self.get('/api/my-orders/?page_size=2').json()
+        self.assertEqual(set(first['results'][0]), {'id', 'created_at', 'total_amount', 'item_count', 'paid'})
+        self.assertIsNotNone(first['next'])
+
+        second = self.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        ids = [order['id'] for order in first['results'] + second['results']]
+        self.assertEqual(ids, [order.id for order in reversed(orders)])
+
+    def test_other_users_order_is_not_found(self):
+        other = User.objects.create_user('cizi')
+        order = self.order_for(other, [(self.product, 1)])
+
+        self.assertEqual(self.get(f"/api/my-orders/{order.id}/").status_code, 404)
+        self.assertEqual(self.get(f"/api/my-orders/{order.id}/", user=other).status_code, 200)
+
+
+
+# --- EXPORT OBJEDNÁVEK (store/exports.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderExportTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.products = [create_product(f"Produkt {i}", stock=100) for i in range(3)]
+        self.orders = [place_order([(product, 1) for product in self.products[:i % 3 + 1]]) for i in range(5)]
+        Order.objects.filter(pk=self.orders[0].pk).update(paid=True)
+
+    def export(self, export_format, query='', user=None):
+        user = user or User.objects.create_user('manazer', is_staff=True)
+        response = self.client.get(
+            f"/api/manager/orders/export/{export_format}/{query}",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+        )
+        if not response.streaming:
+            return response, None
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_items_are_prefetched_per_chunk(self):
+        with mock.patch('store.exports.EXPORT_CHUNK_SIZE', 2):
+            with query_budget(10) as queries:
+                rows = list(order_csv_rows(orders_with_items().order_by('id')))
+
+        # 1 dotaz na objednávky (čtou se kurzorem po dávkách) + 1 na položky každé dávky (5 objednávek -> 3 dávky)
+        self.assertEqual(len(queries), 1 + 3)
+        self.assertEqual(len(rows), 1 + sum(len(order.items.all()) for order in self.orders))
+
+    def test_csv_has_row_per_item(self):
+        response, content = self.export('csv', '?paid=true')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0], ORDER_CSV_HEADER)
+        self.assertEqual([(row[0], row[12]) for row in rows[1:]], [(str(self.orders[0].id), 'Produkt 0')])
+
+    def test_ndjson_has_line_per_order(self):
+        response, content = self.export('ndjson')
+
+        orders = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([order['id'] for order in orders], [order.id for order in reversed(self.orders)])
+        self.assertEqual([item['product_name'] for item in orders[-1]['items']], ['Produkt 0'])
+
+    def test_unknown_format_and_customer(self):
+        self.assertEqual(self.export('xlsx')[0].status_code, 404)
+        self.assertEqual(self.export('csv', user=User.objects.create_user('zakaznik'))[0].status_code, 403)
+
+# --- KOŠÍK (store/cart.py) ---
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('zakaznik', password='heslo')
+        self.products = [create_product(f"Produkt {i}", stock=10) for i in range(20)]
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity'))
+
+    def test_changes_are_upserted(self):
+        first, second, third = self.products[:3]
+        apply_cart_changes(self.user, [(first.id, 2, MODE_ADD), (second.id, 1, MODE_ADD)])
+
+        apply_cart_changes(self.user, [
+            (first.id, 1, MODE_ADD), # Existující řádek se navýší (ON CONFLICT DO UPDATE)
+            (second.id, 5, MODE_SET),
+            (third.id, 1, MODE_ADD),
+            (third.id, 2, MODE_ADD), # Stejný produkt v jedné dávce se sečte
+        ])
+
+        self.assertEqual(self.quantities(), {first.id: 3, second.id: 5, third.id: 3})
+        self.assertEqual(CartItem.objects.count(), 3)
+
+    def test_zero_or_less_removes_line(self):
+        first, second = self.products[:2]
+        apply_cart_changes(self.user, [(first.id, 2, MODE_ADD), (second.id, 2, MODE_ADD)])
+
+        apply_cart_changes(self.user, [(first.id, -2, MODE_ADD), (second.id, 0, MODE_SET)])
+
+        self.assertEqual(self.quantities(), {})
+
+    def test_unknown_product_changes_nothing(self):
+        first = self.products[0]
+        apply_cart_changes(self.user, [(first.id, 1, MODE_ADD)])
+
+        with self.assertRaises(UnknownProducts) as raised:
+            apply_cart_changes(self.user, [(first.id, 5, MODE_SET), (0, 1, MODE_ADD)])
+
+        self.assertEqual(raised.exception.product_ids, [0])
+        self.assertEqual(self.quantities(), {first.id: 1})
+
+    def test_query_count_does_not_grow_with_changes(self):
+        get_cart(self.user)
+        with query_budget(10) as one_change:
+            apply_cart_changes(self.user, [(self.products[0].id, 1, MODE_ADD)])
+        with query_budget(10) as twenty_changes:
+            apply_cart_changes(self.user, [(product.id, 1, MODE_ADD) for product in self.products])
+
+        self.assertEqual(len(one_change), len(twenty_changes))
+        self.assertEqual(len(self.quantities()), 20)
+
+# --- VARIANTY OBRÁZKŮ (store/images.py) ---
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'image_variants': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+}
+
+
+def png_file(size=(600, 400)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='produkt.png')
+
+
+@override_settings(STORAGES=IN_MEMORY_STORAGES)
+class ImageVariantTests(TestCase):
+    def create_product_with_image(self):
+        product = Product(name='S obrazkem', slug='s-obrazkem', price=100, stock=1)
+        product.image.save('produkt.png', png_file(), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
+        return product
+
+    def variant_files_exist(self, variants):
+        storage = variant_storage()
+        return all(storage.exists(variants[name][key]) for name in IMAGE_VARIANTS for key in ('webp', 'fallback'))
+
+    def test_variants_are_generated_on_save(self):
+        product = self.create_product_with_image()
+
+        self.assertEqual(product.image_variants['card']['width'], 480)
+        self.assertTrue(product.image_variants['thumb']['webp'].endswith('.webp'))
+
+    def test_decompression_bomb_does_not_block_save(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), self.assertLogs('store.images', 'ERROR'):
+            product = self.create_product_with_image()
+
+        self.assertEqual(product.image_variants, {})
+
+    def test_storage_error_does_not_block_save(self):
+        # Např. chyba Cloudinary API - není to OSError ani ValueError
+        broken_storage = mock.Mock(**{'save.side_effect': RuntimeError("API error")})
+        with mock.patch('store.images.variant_storage', return_value=broken_storage), self.assertLogs('store.images', 'ERROR'):
+            product = self.create_product_with_image()
+
+        self.assertEqual(product.image_variants, {})
+
+    def test_variants_are_generated_after_commit(self):
+        product = Product(name='S obrazkem', slug='s-obrazkem', price=100, stock=1)
+        product.image.save('produkt.png', png_file(), save=False)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.save()
+            self.assertEqual(Product.objects.get(pk=product.pk).image_variants, {})
+
+        for callback in callbacks:
+            callback()
+        product.refresh_from_db()
+        self.assertIn('card', product.image_variants)
+
+    def test_rollback_keeps_old_variant_files(self):
+        product = self.create_product_with_image()
+        old_variants = product.image_variants
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            product.image.save('jiny.png', png_file((300, 200)), save=False)
+            product.save()
+            raise RuntimeError # Např. chyba v inline formuláři adminu
+
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants, old_variants)
+        self.assertTrue(self.variant_files_exist(old_variants))
+
+    def test_rolled_back_delete_keeps_variant_files(self):
+        product = self.create_product_with_image()
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            product.delete()
+            raise RuntimeError
+
+        self.assertTrue(self.variant_files_exist(Product.objects.get(slug='s-obrazkem').image_variants))
+
+
+# --- IMPORT KATALOGU (store/catalog_io.py) ---
+
+class CatalogImportTests(TestCase):
+    def import_lines(self, *lines):
+        return ProductImporter(batch_size=2).run(read_records(StringIO("\n".join(lines)), 'jsonl'))
+
+    def write_file(self, name, text):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+
+    def call(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(*args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_broken_lines_are_row_errors(self):
+        importer = self.import_lines(
+            json.dumps({'name': 'Prvni', 'price': 1000}),
+            '{"name": "Rozbity", ',
+            json.dumps(['ne', 'objekt']),
+            json.dumps({'name': 'Desetinna cena', 'price': 1299.5}),
+            json.dumps({'name': 'Desetinny sklad', 'price': 100, 'stock': '2.5'}),
+            json.dumps({'name': 'Posledni', 'price': '1299.0', 'stock': 3}),
+        )
+
+        self.assertEqual(importer.created, 2)
+        self.assertEqual([line for line, reason in importer.errors], [2, 3, 4, 5])
+        self.assertEqual(Product.objects.get(name='Posledni').price, 1299)
+
+    def test_build_index_rebuild_in_batches(self):
+        for template in ('CPU', 'Motherboard', 'RAM', 'PSU', 'Laptop'):
+            Product.objects.bulk_create([
+                Product(name=f"{template} {i}", slug=f"{template.lower()}-{i}", price=1000, specification=PRODUCT_TEMPLATES[template])
+                for i in range(3)
+            ])
+
+        self.assertEqual(rebuild_build_index(batch_size=2), 12) # Laptop do konfigurátoru nepatří
+        self.assertEqual(BuildPart.objects.count(), 12)
+
+    def test_duplicate_slug_in_batch_is_a_row_error(self):
+        path = self.write_file('produkty.jsonl', "\n".join(json.dumps(row) for row in [
+            {'slug': 'ryzen', 'name': 'Ryzen stary', 'price': 100},
+            {'slug': 'ryzen', 'name': 'Ryzen novy', 'price': 200},
+            {'slug': 'intel', 'name': 'Intel', 'price': 300},
+        ]))
+
+        stdout, stderr = self.call('import_catalog', path)
+
+        self.assertIn("nové: 2, upravené: 0, chyby: 1", stdout)
+        self.assertIn("řádek 1: slug 'ryzen' se opakuje na řádku 2", stderr)
+        self.assertEqual(Product.objects.get(slug='ryzen').name, 'Ryzen novy')
+
+    def test_category_without_slug_stops_import(self):
+        path = self.write_file('kategorie.csv', "name,parent\nProcesory,\n")
+
+        with self.assertRaisesMessage(CommandError, "řádek 1: chybí slug"):
+            self.call('import_catalog', path, '--model', 'categories')
+        self.assertFalse(Category.objects.exists())
+
+    def test_csv_export_import_round_trip(self):
+        category = Category.objects.create(name='Procesory', slug='procesory')
+        create_product('Ryzen', stock=3, category=category, brand='AMD', specification=PRODUCT_TEMPLATES['CPU'])
+        path = self.write_file('produkty.csv', '')
+        self.call('export_catalog', '--output', path)
+        Product.objects.filter(slug='ryzen').update(name='Prepsano', specification={})
+
+        stdout, stderr = self.call('import_catalog', path)
+
+        self.assertIn("nové: 0, upravené: 1, chyby: 0", stdout)
+        product = Product.objects.get(slug='ryzen')
+        self.assertEqual((product.name, product.category_id, product.specification), ('Ryzen', category.id, PRODUCT_TEMPLATES['CPU']))
+
+
+
+# --- ADMIN NAD VELKÝMI TABULKAMI (EstimatedCountPaginator, store/admin.py) ---
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            create_product(f"Produkt {i}", stock=i)
+
+    def test_unfiltered_count_is_estimated(self):
+        paginator = EstimatedCountPaginator(Product.objects.all(), 2)
+        with mock.patch('store.pagination.estimated_row_count', return_value=50000):
+            with query_budget(0): # Žádný COUNT(*) přes tabulku
+                self.assertEqual(paginator.count, 50000)
+
+    def test_small_or_unanalyzed_table_is_counted(self):
+        for estimate in (-1, 100):
+            with mock.patch('store.pagination.estimated_row_count', return_value=estimate):
+                self.assertEqual(EstimatedCountPaginator(Product.objects.all(), 2).count, 5)
+
+    def test_filtered_count_is_capped(self):
+        with mock.patch.object(EstimatedCountPaginator, 'max_exact_count', 3):
+            paginator = EstimatedCountPaginator(Product.objects.filter(stock__gte=1), 2)
+            self.assertEqual((paginator.count, paginator.num_pages), (3, 2))
+
+    def test_order_search_by_number(self):
+        orders = [Order.objects.create(**ORDER_DATA) for _ in range(2)]
+        self.client.force_login(User.objects.create_superuser('admin', password='heslo'))
+
+        response = self.client.get('/admin/store/order/', {'q': f"#{orders[1].id}"})
+
+        self.assertEqual([order.id for order in response.context['cl'].result_list], [orders[1].id])
+
+# --- KONFIGURÁTOR PC (store/builds.py) ---
+
+class BuildCandidateTests(TestCase):
+    def create_part(self, name, template, stock=5, **fields):
+        return create_product(name, stock=stock, specification=PRODUCT_TEMPLATES[template], **fields)
+
+    def test_candidates_are_in_stock_and_available(self):
+        board = self.create_part('Deska', 'Motherboard')
+        in_stock = self.create_part('Pamet skladem', 'RAM')
+        self.create_part('Pamet vyprodana', 'RAM', stock=0)
+        self.create_part('Pamet nedostupna', 'RAM', is_available=False)
+        sold_out = self.create_part('Pamet prodana', 'RAM')
+        Product.objects.filter(pk=sold_out.pk).update(stock=0) # Jako pokladna - bez signálů
+
+        result = check_build({'motherboard': board.id})
+
+        self.assertEqual(result['candidates']['ram'], [in_stock])
+
+    def test_sold_out_selected_part_is_a_problem(self):
+        board = self.create_part('Deska', 'Motherboard')
+        Product.objects.filter(pk=board.pk).update(stock=0)
+
+        result = check_build({'motherboard': board.id})
+
+        self.assertEqual(result['problems'], [{'slots': ['motherboard'], 'message': "Deska není skladem"}])
+
+
+# --- INDEX FILTRŮ (ProductFacet, store/facets.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FacetIndexTests(TestCase):
+    def facet_counts(self):
+        return {(category, key, value): count for category, key, value, count in ProductFacet.objects.values_list(
+            'category_id', 'key', 'value', 'product_count'
+        )}
+
+    def test_incremental_index_matches_rebuild(self):
+        cpus = Category.objects.create(name='Procesory', slug='procesory')
+        gpus = Category.objects.create(name='Grafiky', slug='grafiky')
+        ryzen = create_product('Ryzen', stock=5, category=cpus, brand='AMD', specification={'socket': 'AM5', 'cores': 8})
+        intel = create_product('Intel', stock=5, category=cpus, brand='Intel', specification={'socket': 'LGA1700', 'cores': 8})
+        radeon = create_product('Radeon', stock=5, category=gpus, brand='AMD', specification={'chip': 'RX 7600'})
+        self.assertEqual(self.facet_counts()[(cpus.id, 'cores', '8')], 2)
+
+        intel.category = gpus
+        intel.save()
+        ryzen.specification = {'socket': 'AM5', 'cores': 16}
+        ryzen.save()
+        radeon.is_available = False
+        radeon.save()
+        ryzen.delete()
+
+        expected = {(gpus.id, ':brand', 'Intel'): 1, (gpus.id, 'socket', 'LGA1700'): 1, (gpus.id, 'cores', '8'): 1}
+        self.assertEqual(self.facet_counts(), expected)
+        call_command('rebuild_facets', stdout=StringIO())
+        self.assertEqual(self.facet_counts(), expected)
+
+    def test_unusable_spec_keys_are_skipped(self):
+        category = Category.objects.create(name='Procesory', slug='procesory')
+        # Delší klíč než ProductFacet.key by shodil uložení (DataError), s oddělovačem se podle něj filtrovat nedá
+        create_product('Ryzen', stock=5, category=category, specification={'x' * 150: 'a', 'a:b': 1, 'a~b': 2, 'cores': 8})
+
+        self.assertEqual(self.facet_counts(), {(category.id, 'cores', '8'): 1})
+
+    def test_spec_key_brand_is_not_the_manufacturer(self):
+        category = Category.objects.create(name='Chladice', slug='chladice')
+        create_product('Chladic', stock=5, category=category, brand='AMD', specification={'brand': 'Noctua'})
+
+        filters = self.client.get(f"/api/filters/?category={category.id}").json()
+
+        self.assertEqual([(item['label'], item['options']) for item in filters], [('Výrobce', ['AMD']), ('Brand', ['Noctua'])])
+
+
+
+
+# --- STRÁNKOVÁNÍ KATALOGU KURZOREM (ProductCursorPagination, store/pagination.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductCursorTests(TestCase):
+    def setUp(self):
+        self.products = [create_product(f"Procesor {i}", stock=1) for i in range(7)]
+        # Polovina se stejným created_at - pořadí musí dořešit id
+        Product.objects.filter(pk__in=[product.pk for product in self.products[:4]]).update(created_at=self.products[0].created_at)
+
+    def walk(self, url):
+        """Projde všechny stránky tam a zpátky, vrátí (stránky dopředu, stránky zpátky) jako seznamy slugů"""
+        forward, backward = [], []
+        while url:
+            page = self.client.get(url).json()
+            forward.append([product['slug'] for product in page['results']])
+            last, url = page, page['next']
+        url = last['previous']
+        while url:
+            page = self.client.get(url).json()
+            backward.append([product['slug'] for product in page['results']])
+            url = page['previous']
+        return forward, backward
+
+    def test_pages_round_trip(self):
+        forward, backward = self.walk('/api/products/?page_size=2')
+
+        self.assertEqual(sum(forward, []), list(Product.objects.order_by('-created_at', '-id').values_list('slug', flat=True)))
+        self.assertEqual(backward, list(reversed(forward[:-1])))
+
+    def test_search_pages_round_trip(self):
+        # Všechny produkty mají stejný search_rank
+        forward, backward = self.walk('/api/products/?page_size=3&search=procesor')
+
+        self.assertEqual(sorted(sum(forward, [])), sorted(product.slug for product in self.products))
+        self.assertEqual(backward, list(reversed(forward[:-1])))
+
+    def test_invalid_cursor_is_not_found(self):
+        cursor = base64.b64encode(b'p=2026-01-01').decode() # Pozice bez id (formát DRF)
+        self.assertEqual(self.client.get('/api/products/', {'cursor': cursor}).status_code, 404)
+
+    def test_page_size_is_capped(self):
+        create_product('Navic', stock=1) # 8 produktů, strop 5 níže
+        with mock.patch.object(ProductCursorPagination, 'max_page_size', 5):
+            self.assertEqual(len(self.client.get('/api/products/?page_size=1000').json()['results']), 5)
+
+
+# --- ASYNC KATALOG (store/async_views.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncCatalogParityTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Procesory', slug='procesory')
+        for i in range(5):
+            create_product(f"Procesor {i}", stock=1, category=self.category, brand='AMD', specification={'socket': 'AM5', 'cores': i})
+        create_product('Skrin', stock=1)
+
+    def assertSameResponse(self, path, params=None):
+        sync = self.client.get(f"/api/{path}", params)
+        asynchronous = self.client.get(f"/api/async/{path}", params)
+
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        # Odkazy na další stránky vedou na vlastní endpoint, kurzor je stejný
+        self.assertEqual(asynchronous.content.replace(b'/api/async/', b'/api/'), sync.content)
+        return sync
+
+    def test_catalog_endpoints_match(self):
+        self.assertSameResponse('categories/')
+        self.assertSameResponse('products/procesor-1/')
+        self.assertSameResponse('products/neexistuje/')
+        self.assertSameResponse('filters/', {'category': self.category.id})
+        self.assertSameResponse('filters/')
+        for params in ({}, {'category': self.category.id, 'specs': 'cores:3'}, {'search': 'procesor'}, {'cursor': 'rozbity'}):
+            self.assertSameResponse('products/', params)
+
+    def test_pages_match(self):
+        url = 'products/?page_size=2&search=procesor'
+        while url:
+            url = self.assertSameResponse(url).json()['next']
+            url = url and url.split('/api/')[1]
+
+# --- VYHLEDÁVÁNÍ (store/search.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        create_product('Graficka karta RTX 4060', stock=1, brand='MSI', slug='rtx-4060')
+        create_product('Grafická karta RTX 4070', stock=1, brand='Gigabyte', slug='rtx-4070')
+        create_product('Skříň Midi', stock=1, description='Pro grafické karty do 330 mm', slug='skrin')
+
+    def search(self, term):
+        return [product['slug'] for product in self.client.get('/api/products/', {'search': term}).json()['results']]
+
+    def test_words_are_prefixes(self):
+        self.assertEqual(self.search('rtx 406'), ['rtx-4060'])
+        self.assertEqual(self.search('gigab'), ['rtx-4070']) # Značka
+        self.assertEqual(self.search('RTX karta'), ['rtx-4070', 'rtx-4060'])
+
+    def test_name_ranks_above_description(self):
+        # Název (váha A) před popisem (váha B)
+        self.assertEqual(self.search('grafick')[-1], 'skrin')
+        self.assertEqual(sorted(self.search('grafick')), ['rtx-4060', 'rtx-4070', 'skrin'])
+
+    def test_operators_in_term_are_ignored(self):
+        self.assertIsNone(build_search_query(' !&| '))
+        self.assertEqual(self.search('rtx-4060 & !|'), ['rtx-4060'])
+
+# --- FILTRY SPECIFIKACE (store/spec_filters.py) ---
+
+class SpecFilterTests(TestCase):
+    def filtered(self, specs):
+        return set(apply_spec_filters(Product.objects.all(), specs).values_list('name', flat=True))
+
+    def test_parse(self):
+        self.assertEqual(parse_spec_filters(" socket:AM5,chip~4060,,bez oddělovače,:AM5,socket:,url:http://a~b"), [
+            ('socket', ':', 'AM5'),
+            ('chip', '~', '4060'),
+            ('url', ':', 'http://a~b'), # Rozhoduje první oddělovač, zbytek patří hodnotě
+        ])
+
+    def test_every_facet_option_matches_its_product(self):
+        specification = {'cores': 8, 'ghz': 3.5, 'offset': -5, 'oc': True, 'igpu': False, 'tdp': None, 'socket': 'AM5'}
+        create_product('Procesor', stock=1, specification=specification)
+        create_product('Jiny', stock=1, specification={'cores': 6, 'ghz': 4, 'offset': 5, 'oc': False, 'socket': 'AM4'})
+
+        for category_id, key, value in facet_entries(1, None, specification, True):
+            with self.subTest(key=key, value=value):
+                self.assertEqual(self.filtered(f"{key}:{value}"), {'Procesor'})
+
+    def test_exact_value_matches_number_and_text(self):
+        create_product('Cislo', stock=1, specification={'cores': 8})
+        create_product('Text', stock=1, specification={'cores': '8'})
+        create_product('Jine', stock=1, specification={'cores': 16, 'threads': 8})
+
+        self.assertEqual(self.filtered('cores:8'), {'Cislo', 'Text'})
+        self.assertEqual(self.filtered('cores:NaN'), set()) # Jen jako text, jsonb NaN nezná
+
+    def test_exact_is_case_sensitive_and_substring_is_not(self):
+        create_product('Karta', stock=1, specification={'chip': 'RTX 4060', 'vram': '8GB'})
+        create_product('Deska', stock=1, specification={'chipset': 'B650', 'model': '4060'})
+
+        self.assertEqual(self.filtered('chip:rtx 4060'), set())
+        self.assertEqual(self.filtered('chip:RTX 4060'), {'Karta'})
+        self.assertEqual(self.filtered('chip~rtx 40'), {'Karta'})
+        self.assertEqual(self.filtered('chip~4060'), {'Karta'}) # Jen hodnota daného klíče, ne "4060" jinde
+        self.assertEqual(self.filtered('chip~4060,vram:8GB'), {'Karta'})
+
+
+
+# --- HISTOGRAM CEN (price_histogram, store/catalog.py) ---
+
+class PriceHistogramTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Procesory', slug='procesory')
+
+    def histogram(self, prices, buckets):
+        for i, price in enumerate(prices):
+            create_product(f"Procesor {i}", stock=1, price=price, category=self.category)
+        return price_histogram(Product.objects.filter(category=self.category), buckets)
+
+    def test_maximum_falls_into_last_bucket(self):
+        histogram = self.histogram([100, 100, 200, 500], buckets=4)
+
+        self.assertEqual((histogram['min'], histogram['max'], histogram['count']), (100, 500, 4))
+        # width_bucket() dává maximu koš buckets + 1 - musí skončit v posledním
+        self.assertEqual([bucket['count'] for bucket in histogram['buckets']], [2, 1, 0, 1])
+        self.assertEqual((histogram['buckets'][0]['from'], histogram['buckets'][-1]['to']), (100, 500))
+
+    def test_equal_prices_give_one_bucket(self):
+        histogram = self.histogram([300, 300, 300], buckets=20)
+
+        self.assertEqual(histogram['buckets'], [{'from': 300, 'to': 300, 'count': 3}])
+
+    def test_empty_category(self):
+        empty = {'min': None, 'max': None, 'count': 0, 'buckets': []}
+        self.assertEqual(self.histogram([], buckets=20), empty)
+        self.assertEqual(price_histogram(Product.objects.none()), empty)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_endpoint_ignores_price_filter(self):
+        self.histogram([100, 900], buckets=2)
+
+        response = self.client.get(f"/api/price-histogram/?category={self.category.id}&min_price=500&buckets=2")
+
+        self.assertEqual(response.json()['count'], 2) # Posuvník ukazuje celý rozsah
+        self.assertEqual(self.client.get('/api/price-histogram/?buckets=x').status_code, 400)
+
+
+# --- DOPORUČENÍ "ČASTO KUPOVÁNO SPOLEČNĚ" (store/recommendations.py) ---
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = [create_product(name, stock=100) for name in ('A', 'B', 'C')]
+
+    def recommendations(self):
+        return {
+            (row.product.name, row.rank): (row.recommended.name, row.score)
+            for row in ProductRecommendation.objects.select_related('product', 'recommended')
+        }
+
+    def test_top_k_by_shared_orders(self):
+        for lines in ([self.a, self.b], [self.a, self.b], [self.a, self.c], [self.b, self.c]):
+            place_order([(product, 1) for product in lines])
+
+        self.assertEqual(rebuild_recommendations(top_k=1, min_score=1), 3)
+        # Shoda skóre (C: A i B jednou) -> rozhoduje nižší id
+        self.assertEqual(self.recommendations(), {
+            ('A', 1): ('B', 2), ('B', 1): ('A', 2), ('C', 1): ('A', 1),
+        })
+
+        rebuild_recommendations(top_k=10, min_score=2)
+        self.assertEqual(self.recommendations(), {('A', 1): ('B', 2), ('B', 1): ('A', 2)})
+
+    def test_deleted_product_is_skipped(self):
+        for _ in range(2):
+            place_order([(self.a, 1), (self.c, 1)])
+        self.c.delete() # Položky objednávek zůstanou s product_id NULL
+
+        self.assertEqual(rebuild_recommendations(min_score=1), 0)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_endpoint_returns_ranked_products(self):
+        place_order([(self.a, 1), (self.b, 1), (self.c, 1)])
+        place_order([(self.a, 1), (self.c, 1)])
+        rebuild_recommendations(min_score=1)
+
+        response = self.client.get('/api/products/a/recommendations/')
+
+        self.assertEqual([product['name'] for product in response.json()], ['C', 'B'])
+
+# --- STROM KATEGORIÍ (Category.path, store/categories.py) ---
+
+class CategoryCycleTests(TestCase):
+    def test_parent_cannot_be_a_descendant(self):
+        root = Category.objects.create(name='Komponenty', slug='komponenty')
+        child = Category.objects.create(name='Procesory', slug='procesory', parent=root)
+
+        root.parent = child
+        with self.assertRaises(ValidationError):
+            root.save()
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+
+    def test_cycle_from_raw_update_does_not_break_tree(self):
+        first = Category.objects.create(name='Prvni', slug='prvni')
+        second = Category.objects.create(name='Druha', slug='druha', parent=first)
+        Category.objects.filter(pk=first.pk).update(parent=second, path='') # Jako ruční UPDATE nebo fixtures
+
+        with self.assertLogs('store.categories', 'WARNING'):
+            paths = {category.id: category.path for category in _load_categories()}
+
+        self.assertEqual(paths[first.id], f"{second.id}/{first.id}/")
+        self.assertEqual(paths[second.id], f"{second.id}/")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryTreeCommitTests(TransactionTestCase):
+    def category_slugs(self):
+        return {category['slug'] for category in self.client.get('/api/categories/').json()}
+
+    def test_request_during_change_does_not_keep_old_tree(self):
+        root = Category.objects.create(name='Komponenty', slug='komponenty')
+        self.assertEqual(self.category_slugs(), {'komponenty'})
+
+        with transaction.atomic():
+            Category.objects.create(name='Procesory', slug='procesory', parent=root)
+            self.assertEqual(in_other_connection(self.category_slugs), {'komponenty'})
+
+        self.assertEqual(self.category_slugs(), {'komponenty', 'procesory'})
+
+    def test_rolled_back_category_does_not_stay_in_tree(self):
+        Category.objects.create(name='Komponenty', slug='komponenty')
+        get_category_tree()
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Category.objects.create(name='Docasna', slug='docasna')
+            self.assertEqual(len(get_category_tree().by_id), 2) # Vlastní transakce změnu vidí
+            raise RuntimeError
+
+        self.assertEqual(len(get_category_tree().by_id), 1)
+
+
+# --- CACHE ODPOVĚDÍ (store/response_cache.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES, ALLOWED_HOSTS=['testserver', 'shop.example', 'api.example'])
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Procesory', slug='procesory')
+        self.product = create_product('Procesor', stock=5, category=self.category)
+
+    def product_names(self, url, **headers):
+        return [product['name'] for product in self.client.get(url, **headers).json()['results']]
+
+    def test_padded_category_id_is_invalidated(self):
+        url = f"/api/products/?category=0{self.category.id}"
+        self.assertEqual(self.product_names(url), ['Procesor'])
+
+        self.product.name = 'Procesor novy'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        self.assertEqual(self.product_names(url), ['Procesor novy'])
+
+    def test_links_are_cached_per_host(self):
+        create_product('Druhy procesor', stock=5, category=self.category)
+        url = '/api/products/?page_size=1'
+
+        first = self.client.get(url, HTTP_HOST='shop.example').json()['next']
+        second = self.client.get(url, HTTP_HOST='api.example').json()['next']
+
+        self.assertTrue(first.startswith('http://shop.example/'))
+        self.assertTrue(second.startswith('http://api.example/'))
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['store.W001'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheCommitTests(TransactionTestCase):
+    def product_name(self):
+        return self.client.get('/api/products/p1/').json()['name']
+
+    def test_request_during_save_does_not_cache_old_row(self):
+        product = create_product('Old', stock=5, slug='p1')
+        self.assertEqual(self.product_name(), 'Old')
+
+        with transaction.atomic():
+            product.name = 'New'
+            product.save()
+            # Souběžný request ještě vidí starý řádek (a uloží ho do cache)
+            self.assertEqual(in_other_connection(self.product_name), 'Old')
+
+        self.assertEqual(self.product_name(), 'New')
+
+
+# --- STATISTIKY TRŽEB (store/rollups.py) ---
+
+class SalesRollupTests(TestCase):
+    def rollup(self, category):
+        return SalesRollup.objects.filter(category=category).values_list('revenue', 'units', 'order_count').get()
+
+    def test_rollup_uses_category_from_time_of_purchase(self):
+        cpus = Category.objects.create(name='Procesory', slug='procesory')
+        other = Category.objects.create(name='Ostatni', slug='ostatni')
+        product = create_product('Procesor', stock=5, category=cpus, brand='AMD')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order([(product, 2)])
+        product.category = other
+        product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order([(product, 1)])
+
+        self.assertEqual(self.rollup(cpus), (200, 2, 1))
+        self.assertEqual(self.rollup(other), (100, 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete() # Odečte se z kategorie, ve které se nakupovalo - ne z té současné
+        self.assertEqual(self.rollup(cpus), (0, 0, 0))
+        self.assertEqual(self.rollup(other), (100, 1, 1))
+
+
+
+# --- ROTACE KLÍČE KARET (rotate_card_encryption, store/utils.py) ---
+
+class CardKeyRotationTests(TestCase):
+    def setUp(self):
+        old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+        self.old, self.new, self.unknown = Fernet(old_key), Fernet(new_key), Fernet(Fernet.generate_key())
+        # Jako po výměně klíče v .env: nový v ENCRYPTION_KEY, starý v ENCRYPTION_KEY_FALLBACKS
+        for target, value in [
+            ('store.utils.primary_cipher', self.new),
+            ('store.utils.cipher_suite', MultiFernet([self.new, self.old])),
+            ('store.management.commands.rotate_card_encryption.FALLBACK_KEYS', [old_key]),
+        ]:
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        user = User.objects.create_user('zakaznik')
+        self.cards = [
+            SavedCard.objects.create(user=user, encrypted_number=cipher.encrypt(number.encode()).decode(), last_4=number[-4:], expiry='12/30')
+            for cipher, number in [
+                (self.old, '4111111111111111'), (self.old, '4222222222222222'), (self.new, '4333333333333333'),
+                (self.unknown, '4444444444444444'), (self.old, '4555555555555555'),
+            ]
+        ]
+
+    def rotate(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('rotate_card_encryption', '--batch-size=2', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def on_new_key(self):
+        return [is_current_key(card.encrypted_number) for card in SavedCard.objects.order_by('id')]
+
+    def test_resume_and_rerun(self):
+        self.rotate(f"--start-after={self.cards[1].id}")
+        self.assertEqual(self.on_new_key(), [False, False, True, False, True])
+
+        # Opakované spuštění od začátku dokončí zbytek, už přešifrované přeskočí
+        stdout, stderr = self.rotate()
+        self.assertEqual(self.on_new_key(), [True, True, True, False, True])
+        self.assertIn("Přešifrováno: 2 z 5 karet.", stdout)
+        self.assertEqual(
+            [decrypt_card(card.encrypted_number) for card in SavedCard.objects.order_by('id') if card.id != self.cards[3].id],
+            ['4111111111111111', '4222222222222222', '4333333333333333', '4555555555555555'],
+        )
+
+    def test_unknown_key_is_reported_and_left_untouched(self):
+        stdout, stderr = self.rotate()
+
+        self.assertIn(f"(id): {self.cards[3].id}", stderr)
+        self.assertEqual(SavedCard.objects.get(pk=self.cards[3].pk).encrypted_number, self.cards[3].encrypted_number)
+
+    def test_dry_run_changes_nothing(self):
+        stdout, stderr = self.rotate('--dry-run')
+
+        self.assertIn("Čeká na přešifrování: 3 z 5 karet.", stdout)
+        self.assertEqual(self.on_new_key(), [False, False, True, False, False])
+
+    def test_requires_fallback_key(self):
+        with mock.patch('store.management.commands.rotate_card_encryption.FALLBACK_KEYS', []):
+            with self.assertRaises(CommandError):
+                self.rotate()
+
+# --- ROLE V JWT A CACHE UŽIVATELŮ (store/tokens.py, store/authentication.py) ---
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenRoleTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('manazer', password='heslo')
+        self.token = add_role_claims(AccessToken.for_user(self.user), self.user)
+
+    def test_claims_are_not_trusted_without_shared_cache(self):
+        self.assertIsNone(role_claims(self.token, self.user.id))
+
+    def test_roles_are_bumped_after_commit(self):
+        with mock.patch('store.tokens.versions_shared', return_value=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.groups.add(Group.objects.create(name='Manazer'))
+                # Před COMMITem jsou v DB pro ostatní spojení pořád staré skupiny - verze se ještě nemění
+                self.assertEqual(role_claims(self.token, self.user.id), (False, []))
+            self.assertIsNone(role_claims(self.token, self.user.id))
+
+    def test_deactivated_user_is_rejected_without_shared_cache(self):
+        authentication = CachedJWTAuthentication()
+        self.assertEqual(authentication.get_user(self.token), self.user)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False) # Bez signálů, jako z jiného workeru
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.get_user(self.token)
+
+
+# --- ROZPOČET DOTAZŮ ENDPOINTŮ (store/testing.py) ---
+# Produktů i položek je víc, takže dotaz na každý řádek (N+1) rozpočet hned překročí.
+# S cache v paměti procesu se User načítá z DB při každém requestu (viz CachedJWTAuthentication) - je v rozpočtu.
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EndpointQueryBudgetTests(TransactionTestCase):
+    """TransactionTestCase - strom kategorií i cache se zneplatňují až po COMMITu, jinak by se načítaly při každém requestu"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.category = Category.objects.create(name='Procesory', slug='procesory')
+        self.products = [
+            create_product(f"Procesor {i}", stock=10, category=self.category, brand='AMD', specification={'socket': 'AM5', 'cores': i})
+            for i in range(10)
+        ]
+        get_category_tree() # Strom kategorií se načítá jen jednou za proces
+
+        self.user = User.objects.create_user('zakaznik', password='heslo', is_staff=True)
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {AccessToken.for_user(self.user)}"}
+        for _ in range(3):
+            place_order([(product, 1) for product in self.products[:4]])
+        Order.objects.update(user=self.user)
+
+    def assertBudgets(self, budgets, **kwargs):
+        for url, max_queries in budgets.items():
+            with self.subTest(url=url):
+                response = assert_endpoint_query_budget(self.client, 'get', url, max_queries, **kwargs)
+                self.assertEqual(response.status_code, 200)
+
+    def test_catalog_endpoints(self):
+        self.assertBudgets({
+            '/api/categories/': 0, # Strom je v paměti procesu
+            '/api/products/': 1,
+            '/api/products/?search=procesor': 1,
+            '/api/products/?specs=socket:AM5,cores:3': 1,
+            f"/api/products/{self.products[0].slug}/": 1,
+            f"/api/filters/?category={self.category.id}": 1, # Jen index ProductFacet
+            f"/api/price-histogram/?category={self.category.id}": 1,
+        })
+
+    def test_customer_endpoints(self):
+        self.client.post('/api/cart/batch/', {
+            'items': [{'product_id': product.id, 'quantity': 1} for product in self.products]
+        }, content_type='application/json', **self.auth)
+        order = Order.objects.first()
+
+        self.assertBudgets({
+            '/api/cart/': 3, # User, košík, položky i s produkty
+            '/api/my-orders/': 2, # User, souhrn objednávek (bez položek)
+            f"/api/my-orders/{order.id}/": 3, # User, objednávka, položky jedním dotazem
+            '/api/manager/orders/': 3,
+            '/api/saved-cards/': 2,
+        }, **self.auth)
+
+    def test_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            assert_endpoint_query_budget(self.client, 'get', '/api/products/', 0)
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .response_cache import get_versions, bump_versions, versions_shared
+
+# Role v JWT (claims) - IsEmployeeClaim pak rozhoduje bez dotazu do DB.
+# Každý uživatel má v cache "verzi rolí"; token ji nese s sebou. Když se změní skupiny nebo is_staff,
+# signály (store/signals.py) verzi posunou a claims ze starších tokenů se přestanou brát (ověří se v DB).
+# Verzi musí vidět všechny workery (Redis, REDIS_URL) - s cache v paměti procesu se claims nevěří vůbec.
+
+STAFF_CLAIM = 'is_staff'
+ROLES_CLAIM = 'roles'
+ROLES_VERSION_CLAIM = 'roles_ver'
+
+
+def roles_scope(user_id):
+    return f"roles:{user_id}"
+
+
+def bump_roles(user_ids):
+    """Zneplatní role v tokenech daných uživatelů - až po COMMITu, dřív jsou v DB pořád staré skupiny"""
+    scopes = [roles_scope(user_id) for user_id in user_ids]
+    # Token vydaný před COMMITem by jinak dostal už novou verzi, ale staré role
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+def add_role_claims(token, user):
+    token[STAFF_CLAIM] = user.is_staff
+    token[ROLES_CLAIM] = sorted(group.name for group in user.groups.all())
+    token[ROLES_VERSION_CLAIM] = get_versions([roles_scope(user.id)])[0]
+    return token
+
+
+def role_claims(token, user_id):
+    """(is_staff, role) z tokenu, pokud jsou pořád aktuální - jinak None (pak je potřeba se zeptat DB)"""
+    if token is None or ROLES_VERSION_CLAIM not in token or not versions_shared():
+        return None
+    if get_versions([roles_scope(user_id)])[0] != token[ROLES_VERSION_CLAIM]:
+        return None
+    return token.get(STAFF_CLAIM, False), token.get(ROLES_CLAIM, [])
+
+
+class StoreTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Přihlášení (/api/token/) - access i refresh token nesou role"""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
+
+
+class StoreTokenRefreshSerializer(TokenRefreshSerializer):
+    """Obnovení (/api/token/refresh/) - role se načtou znovu, ne zkopírují ze starého refresh tokenu"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.prefetch_related('groups').get(**{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]})
+        data['access'] = str(add_role_claims(access, user))
+        return data
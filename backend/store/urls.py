@@ -1,17 +1,31 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('categories/', views.CategoryListView.as_view(), name='categories'),
     path('products/', views.ProductListView.as_view(), name='product-list'),
     path('products/<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('products/<slug:slug>/recommendations/', views.ProductRecommendationsView.as_view(), name='product-recommendations'),
+    path('build/', views.BuildCheckView.as_view(), name='build-check'),
     path('orders/', views.OrderCreateView.as_view(), name='create-order'),
     path('my-orders/', views.UserOrderListView.as_view(), name='my-orders'),
+    path('my-orders/<int:pk>/', views.UserOrderDetailView.as_view(), name='my-order-detail'),
     path('save-card/', views.SaveCardView.as_view(), name='save-card'),
     path('saved-cards/', views.SavedCardListView.as_view(), name='saved-cards'),
     path('manager/orders/', views.ManagerAllOrdersView.as_view(), name='manager-orders'),
+    path('manager/orders/export/<str:export_format>/', views.ManagerOrderExportView.as_view(), name='manager-orders-export'),
+    path('manager/analytics/sales/', views.ManagerSalesAnalyticsView.as_view(), name='manager-sales-analytics'),
+    path('manager/metrics/', views.ManagerMetricsView.as_view(), name='manager-metrics'),
+    path('manager/metrics/prometheus/', views.ManagerPrometheusMetricsView.as_view(), name='manager-metrics-prometheus'),
     path('register/', views.RegisterView.as_view(), name='register'),
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
     path('cart/', views.CartAPIView.as_view(), name='cart'),
+    path('cart/batch/', views.CartBatchView.as_view(), name='cart-batch'),
     path('filters/', views.FilterOptionsView.as_view(), name='product-filters'),
+    path('price-histogram/', views.PriceHistogramView.as_view(), name='price-histogram'),
+    # Async varianty katalogu pro ASGI server (stejná data jako výše)
+    path('async/categories/', async_views.AsyncCategoryListView.as_view(), name='async-categories'),
+    path('async/products/', async_views.AsyncProductListView.as_view(), name='async-product-list'),
+    path('async/products/<slug:slug>/', async_views.AsyncProductDetailView.as_view(), name='async-product-detail'),
+    path('async/filters/', async_views.AsyncFilterOptionsView.as_view(), name='async-product-filters'),
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 import os
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 
 # 1. Načteme klíč z prostředí (z .env)
 # Klíč je v .env jako text (string), ale Fernet potřebuje byty (bytes).
@@ -12,7 +12,15 @@ if not key_str:
 # 2. Převedeme string na bytes (to je to .encode())
 KEY = key_str.encode() 
 
-cipher_suite = Fernet(KEY)
+# 3. Staré klíče (oddělené čárkou) - jen pro čtení karet zašifrovaných před rotací.
+# Postup rotace: nový klíč do ENCRYPTION_KEY, starý do ENCRYPTION_KEY_FALLBACKS,
+# pak python manage.py rotate_card_encryption a nakonec starý klíč z fallbacků smazat.
+FALLBACK_KEYS = [key.strip().encode() for key in os.getenv('ENCRYPTION_KEY_FALLBACKS', '').split(',') if key.strip()]
+
+primary_cipher = Fernet(KEY)
+
+# Šifruje vždy prvním (aktuálním) klíčem, dešifruje kterýmkoliv
+cipher_suite = MultiFernet([primary_cipher] + [Fernet(key) for key in FALLBACK_KEYS])
 
 def encrypt_card(card_number):
     """Zašifruje číslo karty"""
@@ -22,5 +30,17 @@ def decrypt_card(encrypted_card):
     """Rozšifruje řetězec zpět na číslo karty"""
     return cipher_suite.decrypt(encrypted_card.encode()).decode()
 
+def is_current_key(encrypted_card):
+    """Je karta už zašifrovaná aktuálním klíčem? (pak ji rotace přeskočí)"""
+    try:
+        primary_cipher.decrypt(encrypted_card.encode())
+        return True
+    except InvalidToken:
+        return False
+
+def rotate_card(encrypted_card):
+    """Přešifruje kartu aktuálním klíčem (InvalidToken, když ji nezná žádný klíč)"""
+    return cipher_suite.rotate(encrypted_card.encode()).decode()
+
 def get_last_4(card_number):
-    return card_number[-4:]
\ No newline at end of file
+    return card_number[-4:]
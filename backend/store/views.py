@@ -1,91 +1,101 @@
-from rest_framework import generics, permissions, status, filters
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .permissions import IsEmployee
-from .models import Product, Order, OrderItem, SavedCard, Category, CartItem, Cart, UserProfile
-from .serializers import OrderSerializer, SavedCardSerializer, ProductSerializer, UserSerializer, CategorySerializer, CartSerializer, CartItemSerializer, UserProfileSerializer
+from .permissions import IsEmployeeClaim
+from .authentication import StatelessJWTAuthentication
+from .pagination import ProductCursorPagination, OrderCursorPagination
+from .search import ProductSearchFilter
+from .categories import get_category_tree, subtree_q
+from .catalog import filter_products, facet_rows, build_filter_options, price_histogram, HISTOGRAM_BUCKETS, MAX_HISTOGRAM_BUCKETS, PRICE_PARAMS
+from .response_cache import CachedResponseMixin, ALL_PRODUCTS_SCOPE, RECOMMENDATIONS_SCOPE, request_category_scope, product_scope
+from .recommendations import recommended_products
+from .builds import SLOT_TEMPLATES, DEFAULT_CANDIDATE_LIMIT, BuildError, check_build
+from .models import Product, Order, OrderItem, SavedCard, Category, CartItem, Cart, UserProfile, SalesRollup
+from .serializers import OrderSerializer, OrderSummarySerializer, SavedCardSerializer, ProductSerializer, UserSerializer, CategorySerializer, CartItemSerializer, UserProfileSerializer, CartBatchSerializer
+from .metrics import registry as metrics_registry
+from .orders import orders_with_items, filter_orders, parse_date_param
+from .exports import ORDER_EXPORT_FORMATS
+from .cart import get_cart, serialize_cart, apply_cart_changes, UnknownProducts, MODE_ADD
 from django.contrib.auth.models import User
-from django.db.models import Q, Count
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Sum
 import re
 
 
 # 1. NOVÉ VIEW PRO SEZNAM KATEGORIÍ
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CachedResponseMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny] # Kategorie může vidět každý
 
+    def list(self, request, *args, **kwargs):
+        # Strom kategorií je v paměti procesu (store/categories.py), DB se neptáme
+        return Response(get_category_tree().data)
+
 # 2. UPRAVENÉ VIEW PRO PRODUKTY (FILTROVÁNÍ)
-class ProductListView(generics.ListAPIView):
+class ProductListView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name', 'description']
+    filter_backends = [ProductSearchFilter] # Fulltext přes search_vector (?search=...)
+    pagination_class = ProductCursorPagination # Stránkování přes kurzor (?cursor=..., ?page_size=...)
 
-    def get_queryset(self):
-        queryset = Product.objects.filter(is_available=True) # Zobrazujeme jen dostupné
+    def cache_scopes(self, request, *args, **kwargs):
+        return [request_category_scope(request.query_params.get('category'))]
 
-        # 1. Kategorie (včetně podkategorií)
-        category_id = self.request.query_params.get('category')
-        if category_id:
-            try:
-                category = Category.objects.get(id=category_id)
-                queryset = queryset.filter(
-                    Q(category=category) | Q(category__parent=category)
-                )
-            except Category.DoesNotExist:
-                return Product.objects.none()
-        
-        # 2. Značka (Brand) - Samostatný sloupec
-        brand = self.request.query_params.get('brand')
-        if brand:
-            queryset = queryset.filter(brand__iexact=brand)
-
-        # 3. Cena (Min & Max)
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-
-        # 4. Specifikace (JSON Field: specification)
-        specs_param = self.request.query_params.get('specs')
-        if specs_param:
-            try:
-                filters_list = specs_param.split(',')
-                for f in filters_list:
-                    if ':' not in f:
-                        continue
-                        
-                    key, value = f.split(':', 1)
-                    
-                    # OPRAVA: Používáme 'specification' (jednotné číslo)
-                    # A řešíme problém String vs Integer (Frontend posílá "8", DB má 8)
-                    
-                    if value.isdigit():
-                        # Pokud je hodnota číslo (např. "8"), hledáme v JSONu buď číslo 8, nebo text "8"
-                        queryset = queryset.filter(
-                            Q(**{f"specification__{key}": int(value)}) | 
-                            Q(**{f"specification__{key}": value})
-                        )
-                    else:
-                        # Pokud je to text (např. "AM5"), hledáme case-insensitive shodu
-                        queryset = queryset.filter(**{f"specification__{key}__icontains": value})
-                        
-            except Exception as e:
-                print(f"Chyba při filtrování specs: {e}")
-                pass
-
-        return queryset
+    def get_queryset(self):
+        # Zobrazujeme jen dostupné, filtry z query params viz store/catalog.py
+        return filter_products(Product.objects.filter(is_available=True), self.request.query_params, get_category_tree())
 
 # Endpoint pro detail jednoho produktu (podle slugu - hezké URL)
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     lookup_field = 'slug'
 
+    def cache_scopes(self, request, *args, **kwargs):
+        return [product_scope(kwargs['slug'])]
+
+# "Často kupováno společně" k detailu produktu - čte jen předpočítanou tabulku (store/recommendations.py)
+class ProductRecommendationsView(CachedResponseMixin, generics.ListAPIView):
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def cache_scopes(self, request, *args, **kwargs):
+        # Odpověď obsahuje cizí produkty (cena, sklad) - zneplatní ji změna kteréhokoliv produktu i přepočet
+        return [ALL_PRODUCTS_SCOPE, RECOMMENDATIONS_SCOPE]
+
+    def get_queryset(self):
+        return recommended_products(self.kwargs['slug'])
+
+# Konfigurátor PC: /api/build/?cpu=<id>&motherboard=<id>&ram=&gpu=&ssd=&psu=&limit=20
+# Vrátí nekompatibility vybraných dílů, chybějící sloty a kompatibilní kandidáty do volných slotů.
+# Čte jen index BuildPart (store/builds.py) - jeden dotaz na vybrané díly + jeden na každý volný slot.
+class BuildCheckView(CachedResponseMixin, generics.RetrieveAPIView):
+    permission_classes = [permissions.AllowAny]
+    MAX_LIMIT = 50
+
+    def cache_scopes(self, request, *args, **kwargs):
+        return [ALL_PRODUCTS_SCOPE]
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            selected = {slot: int(request.query_params[slot]) for slot in SLOT_TEMPLATES if request.query_params.get(slot)}
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_CANDIDATE_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "Díly a limit musí být čísla"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            build = check_build(selected, limit)
+        except BuildError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        context = self.get_serializer_context()
+        build['parts'] = {slot: ProductSerializer(product, context=context).data for slot, product in build['parts'].items()}
+        build['candidates'] = {
+            slot: ProductSerializer(products, many=True, context=context).data for slot, products in build['candidates'].items()
+        }
+        return Response(build)
+
 class OrderCreateView(generics.CreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
@@ -95,14 +105,26 @@ class OrderCreateView(generics.CreateAPIView):
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(user=user)
 
-# View pro výpis objednávek přihlášeného uživatele
+# View pro výpis objednávek přihlášeného uživatele - jen souhrn po stránkách, položky viz UserOrderDetailView
 class UserOrderListView(generics.ListAPIView):
-    serializer_class = OrderSerializer
+    serializer_class = OrderSummarySerializer
+    pagination_class = OrderCursorPagination
+    authentication_classes = [StatelessJWTAuthentication] # Stačí user.id z tokenu, bez dotazu na User
     permission_classes = [permissions.IsAuthenticated] # Musí být přihlášen
 
     def get_queryset(self):
-        # Vrátí jen objednávky toho, kdo o ně žádá
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        # Vrátí jen objednávky toho, kdo o ně žádá (čte se jen tabulka Order)
+        return Order.objects.filter(user_id=self.request.user.id).only(*OrderSummarySerializer.Meta.fields)
+
+# Detail jedné objednávky i s položkami - frontend si ho načte až při rozbalení
+class UserOrderDetailView(generics.RetrieveAPIView):
+    serializer_class = OrderSerializer
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Cizí objednávka -> 404 (nepřiznáme, že existuje)
+        return orders_with_items().filter(user_id=self.request.user.id)
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
@@ -120,15 +142,107 @@ class RegisterView(generics.CreateAPIView):
     # --- SEKCE PRO ZAMĚSTNANCE ---
 
 class ManagerAllOrdersView(generics.ListAPIView):
-    # Vrátí VŠECHNY objednávky seřazené od nejnovějších
-    queryset = Order.objects.all().order_by('-created_at')
+    # Vrátí objednávky od nejnovějších - po stránkách, s filtry (viz store/orders.py)
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     
     # Tady nasadíme našeho "vyhazovače"
-    permission_classes = [IsEmployee]
+    permission_classes = [IsEmployeeClaim]
+
+    def get_queryset(self):
+        return filter_orders(orders_with_items(), self.request.query_params)
+
+# Export objednávek pro zaměstnance - streamuje se po dávkách, paměť nezávisí na počtu objednávek
+# /api/manager/orders/export/csv/ nebo /ndjson/ (+ stejné filtry jako přehled)
+class ManagerOrderExportView(APIView):
+    permission_classes = [IsEmployeeClaim]
+
+    def get(self, request, export_format):
+        if export_format not in ORDER_EXPORT_FORMATS:
+            return Response({"error": "Podporované formáty: csv, ndjson"}, status=status.HTTP_404_NOT_FOUND)
+
+        orders = filter_orders(orders_with_items(), request.query_params).order_by('-created_at', '-id')
+        content_type, rows = ORDER_EXPORT_FORMATS[export_format]
+
+        response = StreamingHttpResponse(rows(orders), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+        return response
+
+# Přehled tržeb pro zaměstnance - čte jen předpočítané SalesRollup, ne objednávky
+# ?group_by=day|category|brand&date_from=...&date_to=...&category=<id>&brand=...
+# Pozn.: order_count je počet objednávek ve skupině - objednávka s více kategoriemi se v součtu kategorií objeví víckrát.
+class ManagerSalesAnalyticsView(APIView):
+    permission_classes = [IsEmployeeClaim]
+
+    GROUP_FIELDS = {'day': 'day', 'category': 'category_id', 'brand': 'brand'}
+    MEASURES = ('revenue', 'units', 'order_count', 'paid_revenue', 'paid_units', 'paid_order_count')
+
+    def get(self, request):
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in self.GROUP_FIELDS:
+            return Response({"error": "group_by musí být day, category nebo brand"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = SalesRollup.objects.all()
+
+        date_from = parse_date_param(request.query_params.get('date_from'))
+        date_to = parse_date_param(request.query_params.get('date_to'))
+        if date_from:
+            rollups = rollups.filter(day__gte=date_from)
+        if date_to:
+            rollups = rollups.filter(day__lte=date_to)
+
+        category_id = request.query_params.get('category')
+        if category_id:
+            category = get_category_tree().get(category_id)
+            if category is None:
+                return Response({"error": "Kategorie nenalezena"}, status=status.HTTP_404_NOT_FOUND)
+            rollups = rollups.filter(subtree_q(category))
+
+        brand = request.query_params.get('brand')
+        if brand:
+            rollups = rollups.filter(brand__iexact=brand)
+
+        sums = {f"sum_{measure}": Sum(measure) for measure in self.MEASURES}
+        field = self.GROUP_FIELDS[group_by]
+        tree = get_category_tree()
+
+        rows = []
+        for row in rollups.values(field).annotate(**sums).order_by(field):
+            item = {group_by: row[field]}
+            if group_by == 'category':
+                category = tree.get(row[field])
+                item['category_name'] = category.name if category else None
+            item.update({measure: row[f"sum_{measure}"] for measure in self.MEASURES})
+            rows.append(item)
+
+        totals = rollups.aggregate(**sums)
+        return Response({
+            "group_by": group_by,
+            "totals": {measure: totals[f"sum_{measure}"] or 0 for measure in self.MEASURES},
+            "rows": rows,
+        })
+
+# Statistiky endpointů (QueryMetricsMiddleware) - jen pro zaměstnance
+class ManagerMetricsView(APIView):
+    permission_classes = [IsEmployeeClaim]
+
+    def get(self, request):
+        return Response(metrics_registry.snapshot())
+
+    def delete(self, request):
+        # Vynulování statistik (např. před měřením)
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ManagerPrometheusMetricsView(APIView):
+    permission_classes = [IsEmployeeClaim]
+
+    def get(self, request):
+        return HttpResponse(metrics_registry.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # 1. API pro uložení karty (POST)
 class SaveCardView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -145,122 +259,109 @@ class SaveCardView(APIView):
             return Response({"error": "Neplatná expirace. Použijte formát MM/YY"}, status=status.HTTP_400_BAD_REQUEST)
 
         # ... (zbytek ukládání) ...
-        card = SavedCard(user=user, expiry=expiry, brand="Visa")
+        card = SavedCard(user_id=user.id, expiry=expiry, brand="Visa")
         card.save_card_number(card_number) 
         
         return Response({"message": "Karta bezpečně uložena"}, status=status.HTTP_201_CREATED)
     
 # 2. API pro výpis uložených karet (GET) - aby si ji příště mohl vybrat
 class SavedCardListView(generics.ListAPIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = SavedCardSerializer
     
     def get_queryset(self):
         # Vrátí jen karty přihlášeného uživatele
-        return SavedCard.objects.filter(user=self.request.user)
+        return SavedCard.objects.filter(user_id=self.request.user.id)
 
 # 3. API pro správu košíku
 class CartAPIView(APIView):
+    authentication_classes = [StatelessJWTAuthentication] # Stačí user.id z tokenu, bez dotazu na User
     permission_classes = [permissions.IsAuthenticated] # Jen pro přihlášené
 
     def get(self, request):
         # Najde nebo vytvoří košík pro uživatele
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        cart = get_cart(request.user)
+        return Response(serialize_cart(cart))
 
     def post(self, request):
-        # Přidání zboží
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        product_id = request.data.get('product_id')
-        quantity = int(request.data.get('quantity', 1))
+        # Přidání zboží (záporné quantity ubírá)
+        try:
+            product_id = int(request.data.get('product_id'))
+            quantity = int(request.data.get('quantity', 1))
+        except (TypeError, ValueError):
+            return Response({"error": "Neplatný produkt nebo množství"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+            cart = apply_cart_changes(request.user, [(product_id, quantity, MODE_ADD)])
+        except UnknownProducts:
             return Response({"error": "Produkt nenalezen"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Pokud už tam produkt je, zvýšíme množství
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-        
-        if not created:
-            cart_item.quantity += quantity
-        else:
-            cart_item.quantity = quantity
-            
-        cart_item.save()
-
         # Vrátíme celý aktualizovaný košík
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        return Response(serialize_cart(cart))
 
     def delete(self, request):
         # Odebrání zboží (podle ID produktu)
         product_id = request.data.get('product_id')
-        cart = Cart.objects.get(user=request.user)
+        cart = Cart.objects.get(user_id=request.user.id)
         
         # Smažeme položku
         CartItem.objects.filter(cart=cart, product_id=product_id).delete()
         
         return Response({"message": "Položka odebrána"})
     
-class FilterOptionsView(APIView):
-    def get(self, request):
+# 4. API pro hromadnou změnu košíku - víc řádků jedním requestem
+# POST {"items": [{"product_id": 1, "quantity": 2, "mode": "set"}, {"product_id": 5, "quantity": -1}]}
+class CartBatchView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        changes = [(item['product_id'], item['quantity'], item['mode']) for item in serializer.validated_data['items']]
+        try:
+            cart = apply_cart_changes(request.user, changes)
+        except UnknownProducts as e:
+            return Response({"error": "Produkt nenalezen", "product_ids": e.product_ids}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(serialize_cart(cart))
+    
+class FilterOptionsView(CachedResponseMixin, generics.ListAPIView):
+    def cache_scopes(self, request, *args, **kwargs):
+        return [request_category_scope(request.query_params.get('category'))]
+
+    def list(self, request, *args, **kwargs):
         category_id = request.query_params.get('category')
         
         if not category_id:
             return Response({"error": "Category ID required"}, status=400)
 
-        # 1. Získáme produkty v kategorii (včetně podkategorií)
-        try:
-            category = Category.objects.get(id=category_id)
-            products = Product.objects.filter(
-                Q(category=category) | Q(category__parent=category)
-            ).filter(is_available=True)
-        except Category.DoesNotExist:
+        # 1. Kategorie (včetně všech podkategorií)
+        category = get_category_tree().get(category_id)
+        if category is None:
             return Response({"filters": []})
 
-        filters = []
+        # Čteme jen z předpočítaného indexu (ProductFacet), produkty vůbec nenačítáme
+        return Response(build_filter_options(facet_rows(category)))
 
-        # 2. FILTR: BRAND (Výrobce)
-        # Získáme unikátní brandy, které mají alespoň 1 produkt
-        brands = products.values_list('brand', flat=True).distinct().order_by('brand')
-        # Odstraníme None/Prázdné hodnoty
-        brands = [b for b in brands if b]
-        
-        if brands:
-            filters.append({
-                "id": "brand",
-                "label": "Výrobce",
-                "options": brands
-            })
-
-        # 3. FILTR: DYNAMICKÉ SPECIFIKACE (JSON)
-        # Projdeme všechny produkty a sesbíráme klíče a hodnoty
-        # POZNÁMKA: Toto může být pomalé, pokud máš miliony produktů, ale pro tisíce je to OK.
-        specs_map = {}
-
-        for product in products:
-            if not product.specification:
-                continue
-            
-            for key, value in product.specification.items():
-                if key not in specs_map:
-                    specs_map[key] = set()
-                specs_map[key].add(str(value)) # Převedeme na string pro jistotu
-
-        # Převedeme mapu na seznam filtrů
-        for key, values in specs_map.items():
-            # Hezký název (např. "cpu_family" -> "Cpu Family")
-            label = key.replace("_", " ").title()
-            
-            # Seřadíme možnosti
-            sorted_options = sorted(list(values))
-
-            filters.append({
-                "id": key,
-                "label": label,
-                "options": sorted_options
-            })
-
-        return Response(filters)
\ No newline at end of file
+# Rozložení cen pro posuvník ceny - stejné filtry jako výpis produktů, kromě ceny samotné
+class PriceHistogramView(CachedResponseMixin, generics.RetrieveAPIView):
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [ProductSearchFilter]
+
+    def cache_scopes(self, request, *args, **kwargs):
+        return [request_category_scope(request.query_params.get('category'))]
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            buckets = int(request.query_params.get('buckets', HISTOGRAM_BUCKETS))
+        except ValueError:
+            return Response({"error": "buckets musí být číslo"}, status=status.HTTP_400_BAD_REQUEST)
+        buckets = max(1, min(buckets, MAX_HISTOGRAM_BUCKETS))
+
+        # Posuvník ukazuje celý rozsah, ne jen aktuálně vybraný interval
+        params = {key: value for key, value in request.query_params.items() if key not in PRICE_PARAMS}
+        queryset = filter_products(Product.objects.filter(is_available=True), params, get_category_tree())
+        return Response(price_histogram(self.filter_queryset(queryset), buckets))
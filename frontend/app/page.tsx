@@ -4,6 +4,7 @@ import { useEffect, useState } from "react";
 import Link from "next/link";
 import { useSearchParams } from "next/navigation";
 import FilterSidebar from "@/components/FilterSideBar"; // Ujisti se, že cesta sedí
+import ProductImage, { ProductImages } from "@/components/ProductImage";
 
 // --- TYPY ---
 interface Product {
@@ -14,6 +15,7 @@ interface Product {
   category: number;
   slug: string;
   image: string | null;
+  images?: ProductImages;
   stock: number;
   is_available: boolean;
 }
@@ -34,6 +36,7 @@ export default function Home() {
   const [categories, setCategories] = useState<CategoryNode[]>([]);
   const [selectedCategory, setSelectedCategory] = useState<number | null>(null);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState<string | null>(null); // Další stránka (kurzor z API)
 
   // Stavy pro filtry
   const [activeFilters, setActiveFilters] = useState<any>({});
@@ -87,12 +90,25 @@ export default function Home() {
     fetch(url)
       .then((res) => res.json())
       .then((data) => {
-        setProducts(data);
+        setProducts(data.results);
+        setNextUrl(data.next);
         setLoading(false);
       })
       .catch((err) => console.error("Chyba produktů:", err));
   }, [selectedCategory, searchTerm, activeFilters, priceRange]); 
 
+  // 3. DOČTENÍ DALŠÍ STRÁNKY
+  const loadMore = () => {
+    if (!nextUrl) return;
+    fetch(nextUrl)
+      .then((res) => res.json())
+      .then((data) => {
+        setProducts((prev) => [...prev, ...data.results]);
+        setNextUrl(data.next);
+      })
+      .catch((err) => console.error("Chyba produktů:", err));
+  };
+
   const handleCategoryChange = (id: number | null) => {
     setSelectedCategory(id);
     setActiveFilters({});
@@ -197,7 +213,14 @@ export default function Home() {
                               </div>
                               
                               {product.image ? (
-                              <img src={product.image} alt={product.name} className="relative z-10 object-contain h-full w-full opacity-80 group-hover:opacity-100 group-hover:scale-105 transition-all duration-300 grayscale group-hover:grayscale-0" />
+                              <ProductImage
+                                image={product.image}
+                                images={product.images}
+                                variant="card"
+                                sizes="(min-width: 1024px) 320px, 100vw"
+                                alt={product.name}
+                                className="relative z-10 object-contain h-full w-full opacity-80 group-hover:opacity-100 group-hover:scale-105 transition-all duration-300 grayscale group-hover:grayscale-0"
+                              />
                               ) : (
                                 <div className="text-gray-700 font-mono text-xs border border-gray-800 px-4 py-2">[ NO_IMAGE_DATA ]</div>
                               )}
@@ -247,6 +270,17 @@ export default function Home() {
                 )}
                 </div>
             )}
+
+            {!loading && nextUrl && (
+                <div className="flex justify-center mt-10">
+                    <button 
+                        onClick={loadMore} 
+                        className="border border-gray-700 text-gray-400 px-6 py-3 font-mono text-xs uppercase hover:border-brand hover:text-brand transition-all"
+                    >
+                        [ LOAD_MORE_DATA ]
+                    </button>
+                </div>
+            )}
         </div>
       </div>
     </main>
@@ -1,6 +1,7 @@
 import Link from "next/link";
 import { notFound } from "next/navigation";
 import AddToCartButton from "@/components/AddToCartButton";
+import ProductImage, { ProductImages } from "@/components/ProductImage";
 
 interface Product {
   id: number;
@@ -10,10 +11,25 @@ interface Product {
   category: string;
   slug: string;
   image: string | null;
+  images?: ProductImages;
   is_available: boolean;
   stock: number;
 }
 
+// "Často kupováno společně" - předpočítané na backendu, chyba doporučení detail nerozbije
+async function getRecommendations(slug: string): Promise<Product[]> {
+  try {
+    const res = await fetch(`http://backend:8000/api/products/${slug}/recommendations/`, {
+      cache: "no-store",
+    });
+    if (!res.ok) return [];
+    return res.json();
+  } catch (error) {
+    console.error(error);
+    return [];
+  }
+}
+
 async function getProduct(slug: string) {
   try {
     const res = await fetch(`http://backend:8000/api/products/${slug}/`, {
@@ -33,12 +49,15 @@ export default async function ProductPage({
   params: Promise<{ slug: string }>;
 }) {
   const { slug } = await params;
-  const product: Product | null = await getProduct(slug);
+  const [product, recommendations]: [Product | null, Product[]] = await Promise.all([
+    getProduct(slug),
+    getRecommendations(slug),
+  ]);
 
   if (!product) notFound();
 
   return (
-    <main className="min-h-screen bg-background text-primary p-8 flex justify-center items-center font-sans">
+    <main className="min-h-screen bg-background text-primary p-8 flex flex-col justify-center items-center font-sans">
       <div className="max-w-6xl w-full grid grid-cols-1 md:grid-cols-2 gap-12">
         
         {/* LEVÁ ČÁST - Obrázek (Scan window) */}
@@ -52,8 +71,11 @@ export default async function ProductPage({
                 <div className="absolute inset-0 opacity-10 bg-[linear-gradient(rgba(255,255,255,0.05)_1px,transparent_1px),linear-gradient(90deg,rgba(255,255,255,0.05)_1px,transparent_1px)] bg-[size:20px_20px]"></div>
                 
                 {product.image ? (
-                <img
-                    src={product.image}
+                <ProductImage
+                    image={product.image}
+                    images={product.images}
+                    variant="detail"
+                    sizes="(min-width: 1024px) 50vw, 100vw"
                     alt={product.name}
                     className="max-h-full max-w-full object-contain grayscale group-hover:grayscale-0 transition-all duration-500 scale-90 group-hover:scale-100 drop-shadow-[0_0_15px_rgba(255,255,255,0.1)]"
                 />
@@ -123,6 +145,43 @@ export default async function ProductPage({
             </div>
         </div>
       </div>
+
+      {/* Často kupováno společně */}
+      {recommendations.length > 0 && (
+        <section className="max-w-6xl w-full mt-16">
+          <h2 className="text-xl font-bold text-brand mb-6 uppercase tracking-wider border-b border-gray-800 pb-2">
+            Frequently bought together
+          </h2>
+          <div className="grid grid-cols-2 md:grid-cols-5 gap-4">
+            {recommendations.map((item) => (
+              <Link
+                key={item.id}
+                href={`/products/${item.slug}`}
+                className="bg-surface border-2 border-gray-800 hover:border-brand p-4 flex flex-col transition-colors"
+              >
+                <div className="h-32 flex items-center justify-center mb-3">
+                  {item.image ? (
+                    <ProductImage
+                      image={item.image}
+                      images={item.images}
+                      variant="thumb"
+                      sizes="160px"
+                      alt={item.name}
+                      className="max-h-full max-w-full object-contain"
+                    />
+                  ) : (
+                    <div className="text-gray-600 font-mono text-xs">[ NO VISUAL DATA ]</div>
+                  )}
+                </div>
+                <span className="text-sm font-bold uppercase line-clamp-2 mb-2">{item.name}</span>
+                <span className="text-primary font-bold mt-auto">
+                  {item.price.toLocaleString("cs-CZ")} <span className="text-brand text-sm">Kč</span>
+                </span>
+              </Link>
+            ))}
+          </div>
+        </section>
+      )}
     </main>
   );
 }
\ No newline at end of file
@@ -2,18 +2,22 @@
 
 import { useEffect, useState } from "react";
 import { useRouter } from "next/navigation";
+import Link from "next/link";
 import { useAuthStore } from "@/store/authStore";
 import { useCartStore } from "@/store/cartStore";
 
-interface OrderItem { product: number; product_name: string; quantity: number; price: number; }
-interface Order { id: number; created_at: string; total_amount: number; paid: boolean; items: OrderItem[]; shipping_method: string; payment_method: string; }
+interface OrderItem { product: number | null; product_name: string; product_slug: string; quantity: number; price: number; }
+// Přehled objednávky (my-orders/) - položky se načtou až při rozbalení (my-orders/<id>/)
+interface OrderSummary { id: number; created_at: string; total_amount: number; item_count: number; paid: boolean; }
 
 export default function ProfilePage() {
   const { token, isAuthenticated, logout } = useAuthStore();
   const clearCart = useCartStore((state) => state.clearCart);
   const router = useRouter();
   
-  const [orders, setOrders] = useState<Order[]>([]);
+  const [orders, setOrders] = useState<OrderSummary[]>([]);
+  const [nextUrl, setNextUrl] = useState<string | null>(null); // Další stránka (kurzor z API)
+  const [orderItems, setOrderItems] = useState<Record<number, OrderItem[]>>({});
   const [loading, setLoading] = useState(true);
   const [isHydrated, setIsHydrated] = useState(false);
 
@@ -23,12 +27,29 @@ export default function ProfilePage() {
   useEffect(() => {
     if (isHydrated && isAuthenticated && token) {
       fetch("http://127.0.0.1:8000/api/my-orders/", { headers: { "Authorization": `Bearer ${token}` } })
-      .then(res => res.ok ? res.json() : [])
-      .then(data => { setOrders(Array.isArray(data) ? data : []); setLoading(false); })
+      .then(res => res.ok ? res.json() : { results: [], next: null })
+      .then(data => { setOrders(data.results ?? []); setNextUrl(data.next ?? null); setLoading(false); })
       .catch(() => { setOrders([]); setLoading(false); });
     }
   }, [token, isHydrated, isAuthenticated]);
 
+  const loadMore = () => {
+    if (!nextUrl) return;
+    fetch(nextUrl, { headers: { "Authorization": `Bearer ${token}` } })
+      .then(res => res.json())
+      .then(data => { setOrders(prev => [...prev, ...data.results]); setNextUrl(data.next); })
+      .catch(err => console.error("Failed to load orders", err));
+  };
+
+  // Položky objednávky až při prvním rozbalení
+  const loadItems = (orderId: number) => {
+    if (orderItems[orderId]) return;
+    fetch(`http://127.0.0.1:8000/api/my-orders/${orderId}/`, { headers: { "Authorization": `Bearer ${token}` } })
+      .then(res => res.json())
+      .then(data => setOrderItems(prev => ({ ...prev, [orderId]: data.items ?? [] })))
+      .catch(err => console.error("Failed to load order detail", err));
+  };
+
   if (!isHydrated || !isAuthenticated) return null;
 
   return (
@@ -50,7 +71,7 @@ export default function ProfilePage() {
         ) : (
           <div className="space-y-6">
             {orders.map((order) => {
-              const totalItems = order.items.reduce((sum, i) => sum + i.quantity, 0);
+              const items = orderItems[order.id];
               return (
                 <div key={order.id} className="bg-surface border-2 border-gray-800 p-6 hover:border-brand transition-colors">
                   <div className="flex justify-between items-start mb-4 border-b border-gray-800 pb-4 font-mono">
@@ -66,15 +87,22 @@ export default function ProfilePage() {
                     </div>
                   </div>
 
-                  <details className="group">
+                  <details className="group" onToggle={(e) => { if (e.currentTarget.open) loadItems(order.id); }}>
                     <summary className="cursor-pointer font-mono text-brand hover:text-white flex justify-between items-center text-sm uppercase">
-                      <span>[ {totalItems} UNITS DETECTED ] - EXPAND VIEW</span>
+                      <span>[ {order.item_count} UNITS DETECTED ] - EXPAND VIEW</span>
                       <span className="group-open:rotate-180 transition-transform">▼</span>
                     </summary>
                     <div className="mt-4 space-y-2 border-t border-gray-800 pt-2 text-sm font-mono text-secondary">
-                      {order.items.map((item, idx) => (
+                      {!items ? (
+                        <p className="text-brand animate-pulse">LOADING ITEMS...</p>
+                      ) : items.map((item, idx) => (
                         <div key={idx} className="flex justify-between">
-                          <span>{item.quantity}x {item.product_name}</span>
+                          {/* Produkt mohl být mezitím smazán - název zůstává z doby nákupu */}
+                          {item.product ? (
+                            <Link href={`/products/${item.product_slug}`} className="hover:text-brand">{item.quantity}x {item.product_name}</Link>
+                          ) : (
+                            <span>{item.quantity}x {item.product_name}</span>
+                          )}
                           <span>{item.price} Kč/unit</span>
                         </div>
                       ))}
@@ -83,6 +111,14 @@ export default function ProfilePage() {
                 </div>
               );
             })}
+
+            {nextUrl && (
+              <div className="flex justify-center">
+                <button onClick={loadMore} className="border border-gray-700 text-gray-400 px-6 py-3 font-mono text-xs uppercase hover:border-brand hover:text-brand transition-all">
+                  [ LOAD_MORE_DATA ]
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -2,12 +2,14 @@
 
 import { useCartStore } from "../store/cartStore";
 import { useState, useEffect } from "react";
+import { ProductImages } from "./ProductImage";
 
 interface Product {
   id: number;
   name: string;
   price: number;
   image: string | null;
+  images?: ProductImages;
   slug: string;
   stock: number; // Přidáno stock
 }
@@ -36,7 +38,7 @@ export default function AddToCartButton({ product }: { product: Product }) {
       name: product.name,
       price: product.price,
       quantity: 1,
-      image: product.image || undefined,
+      image: product.images?.variants?.thumb?.fallback || product.image || undefined,
       slug: product.slug,
       stock: product.stock, // Předáváme stock dál
     });
@@ -14,6 +14,13 @@ interface FilterOption {
   options: string[];
 }
 
+interface PriceHistogram {
+  min: number | null;
+  max: number | null;
+  count: number;
+  buckets: { from: number; to: number; count: number }[];
+}
+
 interface FilterProps {
   categories: Category[];
   selectedCategory: number | null;
@@ -40,6 +47,9 @@ export default function FilterSidebar({
   const [dynamicFilters, setDynamicFilters] = useState<FilterOption[]>([]);
   const [loadingFilters, setLoadingFilters] = useState(false);
 
+  // Rozložení cen (histogram z API) pro výběr rozsahu ceny
+  const [histogram, setHistogram] = useState<PriceHistogram | null>(null);
+
   // EFEKT: Když se změní kategorie, načti filtry z API
   useEffect(() => {
     if (!selectedCategory) {
@@ -62,6 +72,27 @@ export default function FilterSidebar({
 
   }, [selectedCategory]);
 
+  // EFEKT: Histogram cen - stejné filtry jako výpis produktů (cenu samotnou backend ignoruje)
+  useEffect(() => {
+    const params = new URLSearchParams();
+    if (selectedCategory) params.append("category", selectedCategory.toString());
+    if (currentFilters.brand) params.append("brand", currentFilters.brand);
+
+    const otherSpecs = Object.entries(currentFilters)
+        .filter(([key]) => key !== "brand")
+        .map(([key, val]) => `${key}:${val}`)
+        .join(',');
+    if (otherSpecs) params.append("specs", otherSpecs);
+
+    fetch(`http://127.0.0.1:8000/api/price-histogram/?${params.toString()}`)
+        .then(res => res.json())
+        .then(data => setHistogram(data))
+        .catch(err => {
+            console.error("Failed to load price histogram", err);
+            setHistogram(null);
+        });
+  }, [selectedCategory, currentFilters]);
+
 
   const toggleCategory = (id: number) => {
     setExpandedCats(prev => prev.includes(id) ? prev.filter(c => c !== id) : [...prev, id]);
@@ -81,6 +112,17 @@ export default function FilterSidebar({
     onPriceChange(minPrice, maxPrice);
   };
 
+  // Klik na sloupec histogramu nastaví rozsah ceny na jeho interval
+  const selectBucket = (from: number, to: number) => {
+    const min = Math.floor(from).toString();
+    const max = Math.ceil(to).toString();
+    setMinPrice(min);
+    setMaxPrice(max);
+    onPriceChange(min, max);
+  };
+
+  const highestBucket = histogram ? Math.max(1, ...histogram.buckets.map(b => b.count)) : 1;
+
   return (
     <aside className="w-full md:w-72 flex-shrink-0 border-r-2 border-gray-800 bg-background p-6 hidden md:block overflow-y-auto h-screen sticky top-20">
       
@@ -137,9 +179,22 @@ export default function FilterSidebar({
       {/* 2. CENA */}
       <div className="mb-10">
         <h2 className="text-sm font-bold text-brand uppercase mb-3 font-mono">Price Limit</h2>
+        {histogram && histogram.count > 0 && (
+            <div className="flex items-end gap-px h-12 mb-2">
+                {histogram.buckets.map((bucket) => (
+                    <button
+                        key={bucket.from}
+                        onClick={() => selectBucket(bucket.from, bucket.to)}
+                        title={`${Math.floor(bucket.from)} - ${Math.ceil(bucket.to)} (${bucket.count})`}
+                        className="flex-1 bg-gray-700 hover:bg-brand transition-colors"
+                        style={{ height: `${Math.max(4, (bucket.count / highestBucket) * 100)}%` }}
+                    />
+                ))}
+            </div>
+        )}
         <div className="flex gap-2 mb-2">
-            <input type="number" placeholder="MIN" value={minPrice} onChange={(e) => setMinPrice(e.target.value)} className="w-full bg-surface border border-gray-700 text-xs p-2 text-white font-mono focus:border-brand outline-none" />
-            <input type="number" placeholder="MAX" value={maxPrice} onChange={(e) => setMaxPrice(e.target.value)} className="w-full bg-surface border border-gray-700 text-xs p-2 text-white font-mono focus:border-brand outline-none" />
+            <input type="number" placeholder={histogram?.min != null ? `MIN ${Math.floor(histogram.min)}` : "MIN"} value={minPrice} onChange={(e) => setMinPrice(e.target.value)} className="w-full bg-surface border border-gray-700 text-xs p-2 text-white font-mono focus:border-brand outline-none" />
+            <input type="number" placeholder={histogram?.max != null ? `MAX ${Math.ceil(histogram.max)}` : "MAX"} value={maxPrice} onChange={(e) => setMaxPrice(e.target.value)} className="w-full bg-surface border border-gray-700 text-xs p-2 text-white font-mono focus:border-brand outline-none" />
         </div>
         <button onClick={applyPrice} className="w-full border border-gray-600 text-secondary text-xs py-1 hover:border-brand hover:text-brand uppercase transition-colors">
             [ SET RANGE ]
@@ -0,0 +1,48 @@
+// Obrázek produktu se zmenšenými variantami z API (pole "images" v ProductSerializer).
+// Prohlížeč si podle "sizes" vybere nejmenší dostačující variantu, WebP má přednost.
+
+export interface ImageVariant {
+  webp: string;
+  fallback: string;
+  width: number;
+  height: number;
+}
+
+export interface ProductImages {
+  variants: Partial<Record<"thumb" | "card" | "detail", ImageVariant>>;
+  srcset: { webp?: string; fallback?: string };
+}
+
+interface Props {
+  image: string | null;
+  images?: ProductImages;
+  variant: "thumb" | "card" | "detail";
+  sizes: string;
+  alt: string;
+  className?: string;
+}
+
+export default function ProductImage({ image, images, variant, sizes, alt, className }: Props) {
+  const chosen = images?.variants?.[variant];
+
+  // Varianty ještě nejsou (nebo se nepovedly) - ukážeme originál
+  if (!chosen || !images?.srcset?.webp) {
+    return image ? <img src={image} alt={alt} className={className} loading="lazy" /> : null;
+  }
+
+  return (
+    <picture>
+      <source type="image/webp" srcSet={images.srcset.webp} sizes={sizes} />
+      <img
+        src={chosen.fallback}
+        srcSet={images.srcset.fallback}
+        sizes={sizes}
+        width={chosen.width}
+        height={chosen.height}
+        alt={alt}
+        className={className}
+        loading="lazy"
+      />
+    </picture>
+  );
+}
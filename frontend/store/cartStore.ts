@@ -112,7 +112,7 @@ export const useCartStore = create<CartState>()(
                     name: serverItem.name,
                     price: serverItem.price,
                     quantity: serverItem.quantity,
-                    image: serverItem.image,
+                    image: serverItem.images?.variants?.thumb?.fallback || serverItem.image, // Do košíku stačí náhled
                     slug: serverItem.slug,
                     stock: serverItem.stock || 99 // Načteme stock ze serveru
                 }));